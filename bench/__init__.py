@@ -0,0 +1,4 @@
+import os
+
+# Benchmarks run offline; config.py only needs a placeholder token to import
+os.environ.setdefault("DISCORD_TOKEN", "offline-bench")
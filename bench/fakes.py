@@ -0,0 +1,157 @@
+"""Minimal stand-ins for the discord.py objects the cogs touch during a command.
+
+Every API call sleeps for ``api_latency`` seconds to model the Discord REST round trip
+and records when the interaction was first acknowledged and last answered.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, api: "FakeDiscordApi"):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.mention = f"<@{user_id}>"
+        self._api = api
+
+    def __str__(self) -> str:
+        return self.name
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> None:
+        await self._api.call("dm")
+
+
+class FakeMember(FakeUser):
+    def __init__(self, user_id: int, name: str, api: "FakeDiscordApi"):
+        super().__init__(user_id, name, api)
+        self.roles: List[Any] = []
+        self.nick: Optional[str] = None
+
+    async def edit(self, nick: Optional[str] = None, reason: Optional[str] = None, **kwargs) -> None:
+        await self._api.call("member_edit")
+        self.nick = nick
+
+    async def add_roles(self, *roles, reason: Optional[str] = None) -> None:
+        await self._api.call("add_roles")
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, api: "FakeDiscordApi", guild: Optional["FakeGuild"] = None):
+        self.id = channel_id
+        self.guild = guild
+        self._api = api
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> None:
+        await self._api.call("channel_send")
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, api: "FakeDiscordApi"):
+        self.id = guild_id
+        self.name = "Load Test Guild"
+        self._api = api
+        self.members: Dict[int, FakeMember] = {}
+
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        return self.members.get(user_id)
+
+    def get_role(self, role_id: int) -> Any:
+        return None
+
+
+class FakeDiscordApi:
+    def __init__(self, latency: float = 0.08):
+        self.latency = latency
+        self.calls: Dict[str, int] = {}
+
+    async def call(self, kind: str) -> None:
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+
+class FakeClient:
+    def __init__(self, api: FakeDiscordApi, staff_channel_id: Optional[int] = None, guild: Optional[FakeGuild] = None):
+        self._api = api
+        self.app_queue: Any = None
+        self.channels: Dict[int, FakeChannel] = {}
+        if staff_channel_id:
+            self.channels[staff_channel_id] = FakeChannel(staff_channel_id, api, guild)
+
+    def get_channel(self, channel_id: int) -> Optional[FakeChannel]:
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id: int) -> None:
+        return None
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, kind: str) -> None:
+        if self._done:
+            raise RuntimeError("Interaction has already been responded to")
+        await self._interaction.api.call(kind)
+        self._done = True
+        self._interaction.mark_ack()
+
+    async def defer(self, ephemeral: bool = False, thinking: bool = False) -> None:
+        await self._respond("defer")
+
+    async def send_message(self, content: Optional[str] = None, **kwargs) -> None:
+        await self._respond("send_message")
+        self._interaction.mark_reply(content)
+
+    async def send_modal(self, modal: Any) -> None:
+        await self._respond("send_modal")
+
+    async def edit_message(self, **kwargs) -> None:
+        await self._respond("edit_message")
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction"):
+        self._interaction = interaction
+
+    async def send(self, content: Optional[str] = None, **kwargs) -> None:
+        await self._interaction.api.call("followup")
+        self._interaction.mark_reply(content)
+
+
+class FakeInteraction:
+    def __init__(self, user: FakeUser, client: FakeClient, api: FakeDiscordApi, guild: Optional[FakeGuild] = None):
+        self.user = user
+        self.client = client
+        self.guild = guild
+        self.guild_id = guild.id if guild is not None else None
+        self.api = api
+        self.message = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.created_at = time.perf_counter()
+        self.acked_at: Optional[float] = None
+        self.last_reply_at: Optional[float] = None
+        self.replies: List[Optional[str]] = []
+
+    def mark_ack(self) -> None:
+        self.acked_at = time.perf_counter()
+
+    def mark_reply(self, content: Optional[str]) -> None:
+        self.last_reply_at = time.perf_counter()
+        self.replies.append(content)
+
+    @property
+    def ack_latency(self) -> Optional[float]:
+        return None if self.acked_at is None else self.acked_at - self.created_at
+
+    @property
+    def total_latency(self) -> Optional[float]:
+        end = self.last_reply_at or self.acked_at
+        return None if end is None else end - self.created_at
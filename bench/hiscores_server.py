@@ -0,0 +1,129 @@
+"""Local stand-in for index_lite.ws, serving every HISCORE_MODULE variant.
+
+Standalone:  python -m bench.hiscores_server --port 8099 --latency-ms 250
+Then point the bot at it with HISCORES_BASE_URL=http://127.0.0.1:8099
+"""
+import argparse
+import asyncio
+import random
+import zlib
+from collections import Counter
+from typing import Callable, Optional, Set
+
+from aiohttp import web
+
+from bench.payloads import synthetic_index_lite
+from utils.constants import HISCORE_MODULE
+
+MODULE_PATHS = {
+    f"m=hiscore_oldschool_{suffix}" if suffix else "m=hiscore_oldschool": acct
+    for acct, suffix in HISCORE_MODULE.items()
+}
+
+
+class StandInHiscores:
+    def __init__(
+        self,
+        latency_ms: float = 250.0,
+        jitter_ms: float = 150.0,
+        tail_prob: float = 0.0,
+        tail_ms: float = 5000.0,
+        not_found_rate: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        player_tables: Optional[Callable[[str], Set[str]]] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tail_prob = tail_prob
+        self.tail_ms = tail_ms
+        self.not_found_rate = not_found_rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        # Which account types a player is listed under (default: every table)
+        self.player_tables = player_tables
+        self.stats: Counter = Counter()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/{module}/index_lite.ws", self.handle)
+        return app
+
+    def _delay(self) -> float:
+        ms = self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if self.tail_prob and self.rng.random() < self.tail_prob:
+            ms += self.tail_ms
+        return max(0.0, ms) / 1000.0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        acct = MODULE_PATHS.get(request.match_info["module"])
+        player = request.query.get("player", "")
+        self.stats["requests"] += 1
+        self.stats[f"module:{acct}"] += 1
+        await asyncio.sleep(self._delay())
+        listed = self.player_tables is None or acct in self.player_tables(player)
+        if acct is None or not player or not listed:
+            self.stats["404"] += 1
+            return web.Response(status=404, text="Not found")
+        roll = self.rng.random()
+        if roll < self.error_rate:
+            self.stats["5xx"] += 1
+            return web.Response(status=503, text="Service unavailable")
+        if roll < self.error_rate + self.not_found_rate:
+            self.stats["404"] += 1
+            return web.Response(status=404, text="Not found")
+        self.stats["200"] += 1
+        # Stable payload per (player, module) so repeated lookups agree
+        body = synthetic_index_lite(random.Random(zlib.crc32(f"{player.lower()}|{acct}".encode())))
+        return web.Response(body=body, content_type="text/plain")
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{bound}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def add_server_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=250.0, help="Mean hiscores response time")
+    parser.add_argument("--jitter-ms", type=float, default=150.0, help="Uniform ± jitter on response time")
+    parser.add_argument("--tail-prob", type=float, default=0.01, help="Chance of an extra slow-tail delay")
+    parser.add_argument("--tail-ms", type=float, default=5000.0, help="Extra delay for slow-tail responses")
+    parser.add_argument("--not-found-rate", type=float, default=0.05, help="Fraction of 404 responses")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+
+
+def server_from_args(args: argparse.Namespace) -> StandInHiscores:
+    return StandInHiscores(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tail_prob=args.tail_prob,
+        tail_ms=args.tail_ms,
+        not_found_rate=args.not_found_rate,
+        error_rate=args.error_rate,
+        seed=getattr(args, "seed", None),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_server_args(parser)
+    args = parser.parse_args()
+    server = server_from_args(args)
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Startup cost of the legacy all-intents gateway setup vs lean mode.
+
+Replays a synthetic GUILD_CREATE (members plus presences, as delivered after chunking
+with every intent on) through discord.py's connection state under each gateway
+configuration, in a fresh subprocess per mode so peak RSS isn't shared:
+
+    python -m bench.intents --members 50000 --presences 0.3
+
+This measures what the bot itself pays to parse and cache the guild; on a live
+gateway the full mode also waits for the member-chunk round trips before on_ready.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+GUILD_ID = 900000000000000000
+
+
+def synthetic_guild(members: int, presence_fraction: float, include_presences: bool) -> Dict[str, Any]:
+    member_rows: List[Dict[str, Any]] = []
+    presences: List[Dict[str, Any]] = []
+    for n in range(members):
+        user_id = str(100000000000000000 + n)
+        member_rows.append({
+            "user": {"id": user_id, "username": f"member{n}", "discriminator": "0",
+                     "global_name": f"Member {n}", "avatar": None},
+            "roles": [],
+            "joined_at": "2024-01-01T00:00:00+00:00",
+            "nick": f"rsn{n} | alt{n}" if n % 3 == 0 else None,
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        })
+        if include_presences and n < members * presence_fraction:
+            presences.append({
+                "user": {"id": user_id},
+                "guild_id": str(GUILD_ID),
+                "status": "online",
+                "activities": [{"name": "RuneLite", "type": 0}],
+                "client_status": {"desktop": "online"},
+            })
+    return {
+        "id": str(GUILD_ID),
+        "name": "Bench Guild",
+        "owner_id": "1",
+        "member_count": members,
+        "roles": [{"id": str(GUILD_ID), "name": "@everyone", "permissions": "0", "position": 0,
+                   "color": 0, "hoist": False, "managed": False, "mentionable": False}],
+        "channels": [],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+        "members": member_rows,
+        "presences": presences,
+    }
+
+
+def run_mode(mode: str, members: int, presence_fraction: float) -> Dict[str, float]:
+    import discord
+
+    from utils.members import gateway_options
+
+    options = gateway_options(lean=(mode == "lean"))
+    intents = options["intents"]
+    # The gateway only sends presences and the full member list when those intents are on
+    payload = synthetic_guild(members if intents.members else 0, presence_fraction, intents.presences)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    client = discord.Client(**options)
+    state = client._connection
+    tracemalloc.start()
+    started = time.perf_counter()
+    guild = state._add_guild_from_data(payload)  # type: ignore[arg-type]
+    elapsed = time.perf_counter() - started
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del payload
+
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "parse_ms": elapsed * 1e3,
+        "cached_members": len(guild.members),
+        "heap_mb": traced / 2**20,
+        "peak_rss_mb": rss_after / 1024,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=50000, help="Guild member count")
+    parser.add_argument("--presences", type=float, default=0.3, help="Fraction of members online")
+    parser.add_argument("--mode", choices=("full", "lean"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.members, args.presences)))
+        return
+
+    print(f"GUILD_CREATE with {args.members:,} members, {args.presences:.0%} online\n")
+    print(f"{'mode':<6} {'parse':>10} {'cached':>9} {'heap':>9} {'peak RSS':>10} {'RSS growth':>11}")
+    for mode in ("full", "lean"):
+        out = subprocess.run(
+            [sys.executable, "-m", "bench.intents", "--mode", mode,
+             "--members", str(args.members), "--presences", str(args.presences)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode:<6} {r['parse_ms']:8.0f}ms {r['cached_members']:>9,} {r['heap_mb']:7.1f}MB "
+              f"{r['peak_rss_mb']:8.1f}MB {r['rss_growth_mb']:9.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
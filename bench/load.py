@@ -0,0 +1,166 @@
+"""End-to-end load test: concurrent /apply submissions and /points lookups
+against a local hiscores stand-in, with fake Discord interactions.
+
+Run from the repo root:
+    python -m bench.load --levels 10,50,100,250 --latency-ms 300 --discord-latency-ms 80
+
+For each concurrency level it fires that many ApplicationModal.on_submit calls and
+that many Points.points calls at once and reports p50/p95/p99 ack latency (must stay
+under Discord's 3 s window), completion latency (15 min followup window) and event-loop lag.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+import cogs.applications as applications
+import utils.guild_settings as guild_settings
+import utils.hiscores as hiscores
+from bench.fakes import FakeClient, FakeDiscordApi, FakeGuild, FakeInteraction, FakeMember
+from bench.hiscores_server import add_server_args, server_from_args
+from cogs.points import Points
+from config import HISCORES_BURST, HISCORES_RATE
+from utils.app_queue import ApplicationQueue
+from utils.metrics import REGISTRY
+from utils.perf import LoopLagMonitor, summarize
+from utils.ratelimit import PriorityTokenBucket
+
+ACK_DEADLINE = 3.0
+FOLLOWUP_DEADLINE = 15 * 60.0
+FAKE_STAFF_CHANNEL_ID = 1
+
+_ids = itertools.count(1000)
+
+
+def _interaction(api: FakeDiscordApi, client: FakeClient, guild: FakeGuild) -> FakeInteraction:
+    user_id = next(_ids)
+    member = FakeMember(user_id, f"user{user_id}", api)
+    guild.members[user_id] = member
+    return FakeInteraction(member, client, api, guild)
+
+
+async def run_application(api: FakeDiscordApi, client: FakeClient, guild: FakeGuild, rsn: str) -> FakeInteraction:
+    interaction = _interaction(api, client, guild)
+    modal = applications.ApplicationModal(account_type="normal", application_type="member")
+    modal.osrs_name._value = rsn
+    modal.firecape._value = "Yes"
+    modal.infernal_cape._value = "No"
+    modal.alts._value = f"{rsn} alt"
+    await modal.on_submit(interaction)  # type: ignore[arg-type]
+    return interaction
+
+
+async def run_points(api: FakeDiscordApi, client: FakeClient, guild: FakeGuild, cog: Points, rsn: str) -> FakeInteraction:
+    interaction = _interaction(api, client, guild)
+    await Points.points.callback(cog, interaction, rsn, "normal")  # type: ignore[arg-type]
+    return interaction
+
+
+def report(label: str, interactions: List[FakeInteraction], errors: int) -> Dict[str, float]:
+    acks = [i.ack_latency for i in interactions if i.ack_latency is not None]
+    totals = [i.total_latency for i in interactions if i.total_latency is not None]
+    ack = summarize(acks)
+    total = summarize(totals)
+    missed_ack = sum(1 for i in interactions if i.ack_latency is None or i.ack_latency > ACK_DEADLINE)
+    missed_followup = sum(1 for t in totals if t > FOLLOWUP_DEADLINE)
+    print(
+        f"  {label:<12} ack p50/p95/p99 {ack['p50']*1e3:7.0f}/{ack['p95']*1e3:7.0f}/{ack['p99']*1e3:7.0f} ms   "
+        f"done p50/p95/p99 {total['p50']:6.2f}/{total['p95']:6.2f}/{total['p99']:6.2f} s   "
+        f">3s ack: {missed_ack}  >15m: {missed_followup}  errors: {errors}"
+    )
+    return {"missed_ack": missed_ack, "missed_followup": missed_followup, "errors": errors}
+
+
+async def run_level(level: int, args, server, cog: Points) -> bool:
+    api = FakeDiscordApi(args.discord_latency_ms / 1000.0)
+    guild = FakeGuild(1, api)
+    client = FakeClient(api, FAKE_STAFF_CHANNEL_ID, guild)
+    queue = None
+    if args.app_queue_workers:
+        # Same worker pool the Applications cog runs, backed by a throwaway DB
+        queue = ApplicationQueue(
+            os.path.join(tempfile.mkdtemp(), "app_queue.sqlite3"), args.app_queue_size, args.app_queue_workers
+        )
+        await queue.start(lambda job_id, job, interaction: applications.process_application(client, job, interaction))
+        client.app_queue = queue
+    lag = LoopLagMonitor(interval=0.01)
+    lag.start()
+    server.stats.clear()
+
+    # Unique names per level so the hiscores cache doesn't hide the fetch cost (unless asked to)
+    tag = "" if args.reuse_names else f"L{level}"
+    tasks = []
+    for n in range(level):
+        tasks.append(run_application(api, client, guild, f"app{tag}x{n}"))
+        tasks.append(run_points(api, client, guild, cog, f"pts{tag}x{n}"))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    if queue is not None:
+        await queue.join()
+        await queue.close()
+    elapsed = time.perf_counter() - started
+    await lag.stop()
+
+    apps = [r for r in results[0::2] if isinstance(r, FakeInteraction)]
+    pts = [r for r in results[1::2] if isinstance(r, FakeInteraction)]
+    app_errors = sum(1 for r in results[0::2] if isinstance(r, BaseException))
+    pts_errors = sum(1 for r in results[1::2] if isinstance(r, BaseException))
+
+    lag_s = lag.summary()
+    print(f"\nconcurrency {level}: {2 * level} interactions in {elapsed:.2f}s "
+          f"(hiscores: {dict(server.stats)})")
+    a = report("/apply", apps, app_errors)
+    p = report("/points", pts, pts_errors)
+    print(f"  loop lag     p50/p95/p99/max {lag_s['p50']*1e3:.1f}/{lag_s['p95']*1e3:.1f}/"
+          f"{lag_s['p99']*1e3:.1f}/{lag_s['max']*1e3:.1f} ms")
+    return a["missed_ack"] == 0 and p["missed_ack"] == 0 and a["missed_followup"] == 0 and p["missed_followup"] == 0
+
+
+async def amain(args) -> None:
+    server = server_from_args(args)
+    url = await server.start()
+    hiscores.HISCORES_BASE_URL = url
+    hiscores._limiter = PriorityTokenBucket(args.hiscores_rate, args.hiscores_burst)
+    guild_settings._store.defaults = guild_settings._store.defaults._replace(staff_channel_id=FAKE_STAFF_CHANNEL_ID)
+    hiscores.open_session()
+    cog = Points(None)  # type: ignore[arg-type]
+    print(f"hiscores stand-in at {url}; Discord API latency {args.discord_latency_ms:.0f} ms")
+    try:
+        for level in (int(x) for x in args.levels.split(",")):
+            ok = await run_level(level, args, server, cog)
+            if not ok and args.stop_on_failure:
+                print(f"\nDeadlines missed at concurrency {level}; stopping.")
+                break
+    finally:
+        await hiscores.close_session()
+        await server.stop()
+    print(f"\nhiscores cache: {hiscores.cache_stats()}")
+    print(f"hiscores rate limit: {hiscores.limiter_stats()}")
+    print("\nper-stage timings (all levels):")
+    for line in REGISTRY.dump_lines():
+        print(f"  {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="10,50,100", help="Comma-separated concurrency levels")
+    parser.add_argument("--discord-latency-ms", type=float, default=80.0, help="Simulated Discord REST latency")
+    parser.add_argument("--reuse-names", action="store_true", help="Reuse RSNs across levels (exercises the cache)")
+    parser.add_argument("--stop-on-failure", action="store_true", help="Stop at the first level that misses a deadline")
+    parser.add_argument("--app-queue-workers", type=int, default=0, help="Process /apply through the queue with N workers (0 = inline)")
+    parser.add_argument("--app-queue-size", type=int, default=50, help="Bounded queue size when --app-queue-workers is set")
+    # Defaults to the shipped limit (HISCORES_RATE/HISCORES_BURST); pass --hiscores-rate 0 to measure without it
+    parser.add_argument("--hiscores-rate", type=float, default=HISCORES_RATE, help="Global hiscores requests/s (0 = unlimited)")
+    parser.add_argument("--hiscores-burst", type=int, default=HISCORES_BURST, help="Rate-limit burst when --hiscores-rate is set")
+    parser.add_argument("--seed", type=int, default=None)
+    add_server_args(parser)
+    args = parser.parse_args()
+    asyncio.run(amain(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import random
+from typing import Optional
+
+from utils.constants import API_BOSS_ORDER
+
+SKILL_ROWS = 24  # Overall + 23 skills: rank,level,xp
+ACTIVITY_ROWS = 20  # clues, LMS, etc. between skills and bosses: rank,score
+
+
+def synthetic_index_lite(rng: Optional[random.Random] = None, ranked_fraction: float = 0.4) -> bytes:
+    # Same shape as index_lite.ws: skills, activities, then one row per API_BOSS_ORDER entry
+    rng = rng or random.Random()
+    lines = []
+    for _ in range(SKILL_ROWS):
+        lines.append(f"{rng.randint(1, 2_000_000)},{rng.randint(1, 99)},{rng.randint(0, 200_000_000)}")
+    for _ in range(ACTIVITY_ROWS):
+        lines.append(f"{rng.randint(1, 500_000)},{rng.randint(1, 5_000)}" if rng.random() < 0.5 else "-1,-1")
+    for _ in API_BOSS_ORDER:
+        if rng.random() < ranked_fraction:
+            lines.append(f"{rng.randint(1, 500_000)},{rng.randint(5, 5_000)}")
+        else:
+            lines.append("-1,-1")
+    return ("\n".join(lines) + "\n").encode("ascii")
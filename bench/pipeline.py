@@ -0,0 +1,162 @@
+"""Offline micro-benchmarks for the hiscores → points → rank pipeline.
+
+Run from the repo root:
+    python -m bench.pipeline                      # run and compare with the saved baseline
+    python -m bench.pipeline --save-baseline      # run and store results as the new baseline
+    python -m bench.pipeline --fail-on-regression # non-zero exit if any case is >threshold slower
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+from bench.payloads import synthetic_index_lite
+from cogs.applications import parse_alts, build_nickname
+from utils.constants import API_BOSS_ORDER
+from utils.hiscores import parse_csv_rows, parse_boss_tail, kc_map_from_tail, extract_boss_kc, compute_points
+from utils.points_table import get_boss_points, get_points_table
+from utils.ranks import get_rank_name
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline_baseline.json")
+
+
+def build_cases(seed: int) -> List[Tuple[str, Callable[[int], object]]]:
+    rng = random.Random(seed)
+    bodies = [synthetic_index_lite(rng) for _ in range(64)]
+    assert len(parse_boss_tail(bodies[0])) == len(API_BOSS_ORDER)
+    rows = [parse_csv_rows(b) for b in bodies]
+    kc_maps = [extract_boss_kc(r) for r in rows]
+    tails = [parse_boss_tail(b) for b in bodies]
+    boss_points = get_boss_points()
+    table = get_points_table()
+    totals = [compute_points(k, boss_points)[0] for k in kc_maps]
+    alts = ["Alt One, alt_two | Alt Three\nalt one; Fourth Alt", "", "Solo", "a,b,c,d,e,f,g,h"]
+
+    return [
+        ("parse_csv_rows (full)", lambda i: parse_csv_rows(bodies[i & 63])),
+        ("parse_boss_tail", lambda i: parse_boss_tail(bodies[i & 63])),
+        ("parse_boss_tail + kc_map", lambda i: kc_map_from_tail(parse_boss_tail(bodies[i & 63]))),
+        ("extract_boss_kc", lambda i: extract_boss_kc(rows[i & 63])),
+        ("compute_points", lambda i: compute_points(kc_maps[i & 63], boss_points)),
+        ("PointsTable.score_tail", lambda i: table.score_tail(tails[i & 63])),
+        ("get_rank_name", lambda i: get_rank_name(totals[i & 63])),
+        ("parse_alts", lambda i: parse_alts(alts[i & 3])),
+        ("build_nickname", lambda i: build_nickname("Main Name", alts[i & 3])),
+    ]
+
+
+def time_case(fn: Callable[[int], object], min_time: float) -> Tuple[float, int]:
+    # Best-of-5 per-call time, each round sized to run for at least min_time / 5
+    n = 1
+    while True:
+        t0 = time.perf_counter()
+        for i in range(n):
+            fn(i)
+        if time.perf_counter() - t0 >= min_time / 5:
+            break
+        n *= 2
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for i in range(n):
+            fn(i)
+        best = min(best, (time.perf_counter() - t0) / n)
+    return best, n
+
+
+def alloc_case(fn: Callable[[int], object], calls: int = 256) -> Tuple[float, float]:
+    # (peak traced bytes per call, blocks still referenced by the result per call)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        peak = 0
+        for i in range(calls):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            fn(i)
+            _, p = tracemalloc.get_traced_memory()
+            peak = max(peak, p - base)
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    before = sys.getallocatedblocks()
+    keep = [fn(i) for i in range(calls)]
+    retained = (sys.getallocatedblocks() - before) / calls
+    del keep
+    return float(peak), retained
+
+
+def run(min_time: float, seed: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name, fn in build_cases(seed):
+        per_call, _ = time_case(fn, min_time)
+        peak, retained = alloc_case(fn)
+        results[name] = {
+            "ns_per_call": per_call * 1e9,
+            "ops_per_sec": 1.0 / per_call,
+            "peak_bytes_per_call": peak,
+            "retained_blocks_per_call": retained,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown vs baseline (fraction)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds of timing per case")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    results = run(args.min_time, args.seed)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    regressions = []
+    print(f"{'case':<28} {'ns/call':>11} {'ops/s':>12} {'peak B/call':>12} {'blocks/call':>12} {'vs base':>9}")
+    for name, r in results.items():
+        delta = ""
+        base = baseline.get(name)
+        if base:
+            change = r["ns_per_call"] / base["ns_per_call"] - 1.0
+            delta = f"{change:+.1%}"
+            if change > args.threshold:
+                regressions.append(name)
+                delta += " !"
+        print(
+            f"{name:<28} {r['ns_per_call']:>11.0f} {r['ops_per_sec']:>12,.0f} "
+            f"{r['peak_bytes_per_call']:>12,.0f} {r['retained_blocks_per_call']:>12.1f} {delta:>9}"
+        )
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "boss_rows": len(API_BOSS_ORDER),
+                "created_at": time.time(),
+                "results": results,
+            }, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif not baseline:
+        print("No baseline found; run with --save-baseline to create one.")
+
+    if regressions:
+        print(f"Slower than baseline by >{args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Event-loop lag during a bulk roster scan, with and without the compute pool.
+
+Runs score_roster over N synthetic players against a hiscores stand-in in a
+separate process (so only the bot's own work lands on this event loop) and
+samples loop lag throughout. A leaderboard is attached as a KC listener, as in
+the bot. Modes:
+
+    legacy  parse each body on the loop as it arrives, score everything in one pass
+    inline  compute path with 0 workers (batched, yielding between batches)
+    pool    compute path on a process pool
+
+Run from the repo root:
+    python -m bench.roster_scan --players 5000 --workers 2 --lag-budget-ms 50
+
+Exits non-zero if a compute-path mode's p99 loop lag exceeds the budget.
+"""
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import utils.hiscores as hiscores
+import utils.roster as roster
+from utils.compute import ComputePool
+from utils.hiscores import fetch_boss_kc
+from utils.leaderboard import Leaderboard
+from utils.perf import LoopLagMonitor
+from utils.points_engine import compile_table, kc_matrix, score_matrix
+from utils.points_table import get_points_table
+from utils.ratelimit import PriorityTokenBucket
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_for_server(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(*url.removeprefix("http://").split(":"))
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def legacy_scan(entries: List[Tuple[str, str]], concurrency: int) -> int:
+    # The pre-pool path: tail parse + listeners per response, then one scoring pass
+    sem = asyncio.Semaphore(concurrency)
+
+    async def run(name: str, acct: str):
+        async with sem:
+            try:
+                return await fetch_boss_kc(name, acct)
+            except hiscores.HiscoresUnavailable:
+                return None
+
+    kc_maps = [m for m in await asyncio.gather(*(run(n, a) for n, a in entries)) if m is not None]
+    score_matrix(kc_matrix(kc_maps), compile_table(get_points_table()))
+    return len(kc_maps)
+
+
+async def compute_scan(entries: List[Tuple[str, str]], concurrency: int) -> int:
+    results = await roster.score_roster(entries, concurrency)
+    return sum(1 for r in results if r.found)
+
+
+async def run_mode(mode: str, args, pool: ComputePool) -> Dict[str, float]:
+    hiscores._cache.clear()
+    board = Leaderboard()
+    hiscores.add_kc_listener(board.update)
+    entries = [(f"{mode} player {n}", "normal") for n in range(args.players)]
+    lag = LoopLagMonitor(interval=0.01, history=100_000)
+    lag.start()
+    started = time.perf_counter()
+    try:
+        if mode == "legacy":
+            found = await legacy_scan(entries, args.concurrency)
+        else:
+            roster.score_bodies = pool.score_bodies  # route this mode through its own pool
+            found = await compute_scan(entries, args.concurrency)
+    finally:
+        hiscores.remove_kc_listener(board.update)
+        await lag.stop()
+    s = lag.summary()
+    s["seconds"] = time.perf_counter() - started
+    s["found"] = found
+    return s
+
+
+async def amain(args) -> int:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "bench.hiscores_server", "--port", str(port), "--latency-ms", str(args.latency_ms),
+         "--jitter-ms", str(args.latency_ms / 2), "--tail-prob", "0", "--not-found-rate", "0.05"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    hiscores.HISCORES_BASE_URL = url
+    hiscores.HISCORES_HEDGE = False
+    hiscores._limiter = PriorityTokenBucket(0, 1)
+    pools = {"inline": ComputePool(0, args.batch_size), "pool": ComputePool(args.workers, args.batch_size)}
+    pools["pool"].start()
+    failed = False
+    try:
+        await _wait_for_server(url)
+        hiscores.open_session()
+        # Warm the pool's worker processes so spawn cost isn't billed to the scan
+        await pools["pool"].score_bodies([b""] * args.workers)
+        print(f"{args.players} players, concurrency {args.concurrency}, hiscores ~{args.latency_ms:.0f} ms, "
+              f"{args.workers} workers, batches of {args.batch_size}")
+        for mode in args.modes.split(","):
+            s = await run_mode(mode, args, pools.get(mode, pools["inline"]))
+            over = mode != "legacy" and s["p99"] * 1e3 > args.lag_budget_ms
+            failed |= over
+            print(f"  {mode:<7} {s['seconds']:6.2f}s  found {int(s['found'])}  loop lag p50/p95/p99/max "
+                  f"{s['p50']*1e3:.1f}/{s['p95']*1e3:.1f}/{s['p99']*1e3:.1f}/{s['max']*1e3:.1f} ms"
+                  f"{'  OVER BUDGET' if over else ''}")
+        print(f"  pool stats: {pools['pool'].stats()}")
+    finally:
+        await hiscores.close_session()
+        pools["pool"].close()
+        server.terminate()
+        server.wait()
+    print(f"p99 loop-lag budget {args.lag_budget_ms:.0f} ms: {'FAILED' if failed else 'ok'}")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="Mean stand-in hiscores response time")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--modes", default="legacy,inline,pool")
+    parser.add_argument("--lag-budget-ms", type=float, default=50.0, help="Max p99 loop lag for the compute-path modes")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(amain(args)))
+
+
+if __name__ == "__main__":
+    main()
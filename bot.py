@@ -1,36 +1,211 @@
 import os
+import time
 import asyncio
+import argparse
 import logging
-import discord
-from discord.ext import commands
+from typing import Iterable, List, Optional
 
-from config import (
-    DISCORD_TOKEN,
-    GUILD_ID,
-    DEBUG,
-)
+from utils.startup import PROFILE
+
+with PROFILE.phase("import discord"):
+    import discord
+    from discord import app_commands
+    from discord.ext import commands
+
+with PROFILE.phase("import bot modules"):
+    from config import (
+        DISCORD_TOKEN,
+        GUILD_ID,
+        DEBUG,
+        SNAPSHOT_DB_PATH,
+        SNAPSHOT_FLUSH_INTERVAL,
+        SNAPSHOT_BATCH_SIZE,
+        KC_HISTORY_PATH,
+        METRICS_HOST,
+        METRICS_PORT,
+        METRICS_DUMP_INTERVAL,
+        LEAN_INTENTS,
+        SHARD_COUNT,
+        STARTUP_PROFILE_PATH,
+        PERF_LAG_INTERVAL,
+        PERF_LAG_HISTORY,
+    )
+    from utils.hiscores import open_session, close_session, cache_stats, add_kc_listener, remove_kc_listener
+    from utils.snapshots import SnapshotStore
+    from utils.kc_history import KCHistory
+    from utils.leaderboard import Leaderboard
+    from utils.metrics import MetricsExporter, observe_command
+    from utils.members import gateway_options, member_cache_stats
+    from utils.command_sync import sync_if_changed
+    from utils.guild_settings import guild_settings_stats
+    from utils.compute import start_compute_pool, close_compute_pool, compute_stats
+    from utils.perf import LoopLagMonitor
 
 logging.basicConfig(
     level=logging.DEBUG if DEBUG else logging.INFO,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 
-intents = discord.Intents.all()
-intents.message_content = True
-
-bot = commands.Bot(command_prefix="!", intents=intents)  # Prefix unused; all commands are slash
 logger = logging.getLogger("clan_bot")
 
 
-async def load_cogs():
+def _command_name(interaction: discord.Interaction) -> str:
+    command = interaction.command
+    return command.qualified_name if command else "unknown"
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    # Times every slash command from dispatch to completion or error
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        interaction.extras["started_at"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        started = interaction.extras.get("started_at")
+        if started is not None:
+            observe_command(_command_name(interaction), time.perf_counter() - started, outcome="error")
+        await super().on_error(interaction, error)
+
+
+# Loaded in setup_hook, before the gateway connects: the commands people reach for first
+CORE_EXTENSIONS = ("cogs.applications", "cogs.points", "cogs.admin")
+# Loaded in the background while the gateway handshake is in flight
+DEFERRED_EXTENSIONS = ("cogs.leaderboard", "cogs.gains", "cogs.sheets")
+
+# Stored snapshots are fed to the leaderboard in chunks so a large board doesn't stall the loop
+LEADERBOARD_LOAD_CHUNK = 500
+
+
+class ClanBot(commands.AutoShardedBot):
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("tree_cls", InstrumentedTree)
+        super().__init__(*args, **kwargs)
+        self.snapshots = SnapshotStore(SNAPSHOT_DB_PATH, SNAPSHOT_FLUSH_INTERVAL, SNAPSHOT_BATCH_SIZE)
+        self.kc_history = KCHistory(KC_HISTORY_PATH, SNAPSHOT_FLUSH_INTERVAL, SNAPSHOT_BATCH_SIZE)
+        # Ranks accepted clan members only; the roster is read from the snapshot DB in setup_hook
+        self.leaderboard = Leaderboard(members=())
+        self.metrics = MetricsExporter(METRICS_HOST, METRICS_PORT, METRICS_DUMP_INTERVAL)
+        # Always on (two wakeups a second at the default interval); read by /perf
+        self.loop_lag = LoopLagMonitor(PERF_LAG_INTERVAL, PERF_LAG_HISTORY)
+        self._warmup: Optional[asyncio.Task] = None
+        self._startup_reported = False
+
+    async def login(self, token: str) -> None:
+        # Includes setup_hook, which discord.py runs at the end of login
+        with PROFILE.phase("login"):
+            await super().login(token)
+
+    async def setup_hook(self):
+        # Only what the first interactions need; everything else is in _warm_up
+        with PROFILE.phase("setup_hook"):
+            # One pooled HTTP session for every cog's hiscores traffic
+            open_session()
+            start_compute_pool()
+            with PROFILE.phase("open snapshot store"):
+                await self.snapshots.start()
+                self.leaderboard.set_members(await self.snapshots.members())
+            # Listeners buffer until their stores open, so no lookup is missed meanwhile
+            add_kc_listener(self.snapshots.record)
+            add_kc_listener(self.kc_history.record)
+            add_kc_listener(self.leaderboard.update)
+            await self.metrics.start()
+            self.loop_lag.start()
+            await load_cogs(CORE_EXTENSIONS)
+        self._warmup = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self):
+        # Each step fails on its own: a broken KC history must not keep the leaderboard loading forever
+        with PROFILE.phase("warm-up", background=True):
+            await load_cogs(DEFERRED_EXTENSIONS, background=True)
+            try:
+                with PROFILE.phase("open kc history", background=True):
+                    await self.kc_history.start()
+            except Exception as e:
+                logger.exception(f"Failed to open KC history; /gains and /top_gains are unavailable: {e}")
+            try:
+                with PROFILE.phase("load leaderboard", background=True):
+                    rows = await self.snapshots.latest_all()
+                    loaded = 0
+                    for i in range(0, len(rows), LEADERBOARD_LOAD_CHUNK):
+                        # Members already looked up since connecting have newer KCs than the stored rows
+                        loaded += self.leaderboard.load(rows[i : i + LEADERBOARD_LOAD_CHUNK], keep_existing=True)
+                        await asyncio.sleep(0)
+                logger.info(f"Leaderboard loaded from snapshots ({loaded} players)")
+            except Exception as e:
+                logger.exception(f"Failed to load the leaderboard from snapshots; it fills from new lookups: {e}")
+            finally:
+                # Stop showing "still loading" either way
+                self.leaderboard.loaded = True
+
+    async def add_clan_members(self, players: Iterable[str], guild_id: Optional[int] = None) -> List[str]:
+        names = await self.snapshots.add_members(players, guild_id)
+        self.leaderboard.add_members(names)
+        # Lookups from before they joined (e.g. the application itself) put them on the board straight away
+        self.leaderboard.load(await self.snapshots.latest_for(names), keep_existing=True)
+        return names
+
+    async def remove_clan_members(self, players: Iterable[str]) -> List[str]:
+        removed = await self.snapshots.remove_members(players)
+        self.leaderboard.remove_members(removed)
+        return removed
+
+    async def wait_until_warm(self):
+        if self._warmup is None:
+            return
+        try:
+            if not self._warmup.done():
+                with PROFILE.phase("wait for warm-up"):
+                    await asyncio.shield(self._warmup)
+            else:
+                self._warmup.result()
+        except Exception as e:
+            logger.exception(f"Startup warm-up failed: {e}")
+
+    def report_startup(self):
+        # on_ready also fires after reconnects; the profile is only for the first
+        if self._startup_reported:
+            return
+        self._startup_reported = True
+        PROFILE.mark("ready")
+        PROFILE.report()
+
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        started = interaction.extras.get("started_at")
+        if started is not None:
+            observe_command(command.qualified_name, time.perf_counter() - started)
+
+    async def close(self):
+        try:
+            await super().close()
+        finally:
+            if self._warmup is not None and not self._warmup.done():
+                self._warmup.cancel()
+                await asyncio.gather(self._warmup, return_exceptions=True)
+            logger.info(f"Hiscores cache stats: {cache_stats()}")
+            logger.info(f"Member cache stats: {member_cache_stats()}")
+            logger.info(f"Guild settings cache stats: {guild_settings_stats()}")
+            logger.info(f"Compute pool stats: {compute_stats()}")
+            remove_kc_listener(self.leaderboard.update)
+            remove_kc_listener(self.snapshots.record)
+            remove_kc_listener(self.kc_history.record)
+            await self.snapshots.close()
+            await self.kc_history.close()
+            await self.metrics.stop()
+            await self.loop_lag.stop()
+            await close_session()
+            close_compute_pool()
+
+
+# Prefix unused; all commands are slash. One process serves every guild, sharded as Discord recommends
+bot = ClanBot(command_prefix="!", shard_count=SHARD_COUNT, **gateway_options(LEAN_INTENTS))
+
+
+async def load_cogs(extensions, background: bool = False):
     # Load cogs explicitly so startup errors are clear
-    for ext in (
-        "cogs.applications",
-        "cogs.points",
-        "cogs.admin",
-    ):
+    for ext in extensions:
         try:
-            await bot.load_extension(ext)
+            with PROFILE.phase(f"load {ext}", background):
+                await bot.load_extension(ext)
             logger.info(f"Loaded extension: {ext}")
         except Exception as e:
             logger.exception(f"Failed to load {ext}: {e}")
@@ -38,27 +213,46 @@ async def load_cogs():
 
 @bot.event
 async def on_ready():
+    PROFILE.mark("gateway ready")
     logger.info(f"Logged in as {bot.user} (ID: {bot.user.id})")
 
-    # Guild-scoped sync for fast iteration, else global sync
+    # Every cog must be loaded before the tree is compared with what Discord has
+    await bot.wait_until_warm()
+
+    # Guild-scoped sync for fast iteration, else global sync; skipped when the tree is unchanged
+    if GUILD_ID and any(g.id != GUILD_ID for g in bot.guilds):
+        logger.warning(
+            f"GUILD_ID is set, so slash commands are only synced to guild {GUILD_ID}; "
+            f"unset it for the bot's other {len(bot.guilds) - 1} guild(s) to get commands"
+        )
     try:
-        if GUILD_ID:
-            synced = await bot.tree.sync(guild=discord.Object(id=GUILD_ID))
-            logger.info(f"Slash commands synced to guild {GUILD_ID} ({len(synced)} commands)")
-        else:
-            synced = await bot.tree.sync()
-            logger.info(f"Slash commands globally synced ({len(synced)} commands)")
+        with PROFILE.phase("command sync"):
+            await sync_if_changed(bot.tree, discord.Object(id=GUILD_ID) if GUILD_ID else None)
     except Exception as e:
         logger.exception(f"Slash sync failed: {e}")
 
+    bot.report_startup()
+
 
 async def main():
     async with bot:
-        await load_cogs()
         await bot.start(DISCORD_TOKEN)
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="OSRS clan Discord bot")
+    parser.add_argument(
+        "--profile-startup",
+        nargs="?",
+        const=STARTUP_PROFILE_PATH,
+        metavar="PATH",
+        help=f"Write the startup profile as JSON (default path: {STARTUP_PROFILE_PATH})",
+    )
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
+    PROFILE.output_path = parse_args().profile_startup
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -1,23 +1,350 @@
+import asyncio
+import io
+import json
+import math
+from typing import Dict, List, Optional
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from config import PERF_PROFILE_MAX_SECONDS
+from utils.checks import is_staff
+from utils.command_sync import sync_if_changed
+from utils.compute import compute_stats
+from utils.guild_settings import (
+    GuildSettings,
+    GuildSettingsError,
+    describe_thresholds,
+    get_guild_settings,
+    guild_settings_stats,
+    parse_thresholds,
+    set_guild_points,
+    update_guild_settings,
+)
+from utils.hiscores import breaker_state, cache_stats, limiter_stats
+from utils.members import member_cache_stats
+from utils.metrics import REGISTRY, Histogram
+from utils.perf import Profile, ProfilerBusy, StackSampler, rss_bytes
+from utils.points_table import reload_points_table, PointsTableError
+
+# Hiscores responses that are answers, not failures (404 = player not found)
+HISCORES_OK = {"200", "404"}
+
+# One on-demand profile at a time, process-wide
+_sampler = StackSampler()
+
+
+def _can_configure(interaction: discord.Interaction) -> bool:
+    # Manage Server only: the staff role itself is one of the settings
+    member = interaction.user
+    return isinstance(member, discord.Member) and member.guild_permissions.manage_guild
+
+
+def settings_embed(guild: discord.Guild, settings: GuildSettings) -> discord.Embed:
+    def channel(cid: Optional[int]) -> str:
+        return f"<#{cid}>" if cid else "—"
+
+    def role(rid: Optional[int]) -> str:
+        return f"<@&{rid}>" if rid else "—"
+
+    embed = discord.Embed(title=f"Settings — {guild.name}", color=discord.Color.dark_teal())
+    embed.add_field(name="Staff channel", value=channel(settings.staff_channel_id), inline=True)
+    embed.add_field(name="Staff role", value=role(settings.staff_role_id), inline=True)
+    embed.add_field(name="\u200b", value="\u200b", inline=True)
+    embed.add_field(name="Member role", value=role(settings.member_role_id), inline=True)
+    embed.add_field(name="Visitor role", value=role(settings.visitor_role_id), inline=True)
+    embed.add_field(name="\u200b", value="\u200b", inline=True)
+    embed.add_field(name="Rank thresholds", value=describe_thresholds(settings.rank_thresholds)[:1024], inline=False)
+    table = settings.points_table
+    source = "this server's table" if settings.points is not None else "shared boss_points.json"
+    embed.add_field(name="Points table", value=f"{source} ({len(table)} bosses)", inline=False)
+    return embed
+
+
+def _pcts(summary: Dict[str, float]) -> str:
+    return f"{summary['p50'] * 1e3:.0f}/{summary['p95'] * 1e3:.0f}/{summary['p99'] * 1e3:.0f} ms"
+
+
+def _hit_ratio(stats: Dict[str, int]) -> str:
+    # Coalesced lookups joined an in-flight fetch, so they count as hits
+    hits = stats["hits"] + stats["coalesced"]
+    total = hits + stats["misses"]
+    return f"{hits / total:.0%} of {total:,}" if total else "no lookups"
+
+
+def _command_lines(limit: int = 12) -> List[str]:
+    ok: Dict[str, Histogram] = {}
+    errors: Dict[str, int] = {}
+    for labels, hist in REGISTRY.series("clanbot_command_seconds").items():
+        label = dict(labels)
+        name = label.get("command", "?")
+        if label.get("outcome") == "ok":
+            ok[name] = hist
+        else:
+            errors[name] = errors.get(name, 0) + hist.count
+    names = sorted(set(ok) | set(errors), key=lambda n: -(ok[n].count if n in ok else 0))
+    lines = []
+    for name in names[:limit]:
+        timing = f"n={ok[name].count:<5} {_pcts(ok[name].summary())}" if name in ok else "n=0"
+        failed = f"  {errors[name]} err" if errors.get(name) else ""
+        lines.append(f"/{name:<18} {timing}{failed}")
+    return lines
+
+
+def _gateway_line(bot: commands.Bot) -> str:
+    latencies = [(shard, lat) for shard, lat in getattr(bot, "latencies", [(None, bot.latency)]) if math.isfinite(lat)]
+    if not latencies:
+        return "not connected"
+    avg = sum(lat for _, lat in latencies) / len(latencies)
+    line = f"{avg * 1e3:.0f} ms heartbeat"
+    if len(latencies) > 1:
+        worst_shard, worst = max(latencies, key=lambda sl: sl[1])
+        line += f" avg over {len(latencies)} shards (worst: shard {worst_shard}, {worst * 1e3:.0f} ms)"
+    return line
+
+
+def perf_embed(bot: commands.Bot, profile: Optional[Profile] = None) -> discord.Embed:
+    embed = discord.Embed(title="Performance", color=discord.Color.dark_teal())
+
+    lag = bot.loop_lag  # type: ignore[attr-defined]
+    s = lag.summary()
+    window = int(s["count"] * lag.interval)
+    embed.add_field(
+        name=f"Event-loop lag (last {window // 60}m{window % 60:02d}s)",
+        value=f"p50/p95/p99 {_pcts(s)}, max {s['max'] * 1e3:.0f} ms" if s["count"] else "no samples yet",
+        inline=False,
+    )
+
+    lines = _command_lines()
+    embed.add_field(
+        name="Commands (p50/p95/p99)",
+        value=("```\n" + "\n".join(lines) + "\n```")[:1024] if lines else "none yet",
+        inline=False,
+    )
+
+    requests = {dict(labels).get("outcome", "?"): n for labels, n in REGISTRY.counter_series("clanbot_hiscores_requests_total").items()}
+    total = sum(requests.values())
+    errors = sum(n for outcome, n in requests.items() if outcome not in HISCORES_OK)
+    fetch = REGISTRY.histogram("clanbot_stage_seconds", stage="hiscores_fetch")
+    waiting = sum(limiter_stats()["waiting"].values())  # type: ignore[union-attr]
+    hiscores = [
+        f"latency {_pcts(fetch.summary())}" if fetch else "latency: no fetches yet",
+        f"errors {errors / total:.1%} of {int(total):,} requests" if total else "no requests yet",
+        f"breaker {breaker_state()}, {waiting} queued for rate limit",
+    ]
+    embed.add_field(name="Hiscores", value="\n".join(hiscores), inline=False)
+
+    embed.add_field(
+        name="Cache hit ratio",
+        value=(
+            f"hiscores {_hit_ratio(cache_stats())}\n"
+            f"members {_hit_ratio(member_cache_stats())}\n"
+            f"guild settings {_hit_ratio(guild_settings_stats())}"
+        ),
+        inline=True,
+    )
+    compute = compute_stats()
+    embed.add_field(
+        name="Process",
+        value=(
+            f"gateway {_gateway_line(bot)}\n"
+            f"{len(asyncio.all_tasks())} pending tasks\n"
+            f"RSS {rss_bytes() / 2**20:,.0f} MiB\n"
+            f"compute pool {compute['workers']} workers, {compute['batches']:,} batches"
+        ),
+        inline=True,
+    )
+
+    if profile is not None:
+        busy = profile.samples - profile.idle
+        top = profile.top(8)
+        value = "\n".join(f"{hits / max(1, busy):>4.0%} {frame}" for frame, hits in top) or "loop was idle"
+        embed.add_field(
+            name=f"Profile: {profile.seconds:.0f}s, loop busy {busy / max(1, profile.samples):.0%} (self time)",
+            value=("```\n" + value + "\n```")[:1024],
+            inline=False,
+        )
+    return embed
+
+
+def profile_report(profile: Profile) -> str:
+    busy = profile.samples - profile.idle
+    lines = [f"{profile.samples} samples over {profile.seconds:.1f}s, {busy} busy ({profile.idle} idle)", ""]
+    for title, inclusive in (("Self time", False), ("Including callees", True)):
+        lines.append(f"{title}:")
+        lines += [f"  {hits:6d}  {hits / max(1, busy):5.1%}  {frame}" for frame, hits in profile.top(25, inclusive)]
+        lines.append("")
+    lines += ["Collapsed stacks (flamegraph.pl / speedscope input):", profile.collapsed()]
+    return "\n".join(lines)
+
+
 class Admin(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
-    @app_commands.command(name="refresh_commands", description="Force refresh all slash commands for this guild")
-    async def refresh_commands(self, interaction: discord.Interaction):
+    @app_commands.command(name="refresh_commands", description="Sync slash commands for this guild if they changed")
+    @app_commands.describe(force="Sync even if the command tree is unchanged")
+    async def refresh_commands(self, interaction: discord.Interaction, force: bool = False):
         if interaction.guild is None:
             return await interaction.response.send_message(
                 "This command must be used in a server.",
                 ephemeral=True
             )
-        await self.bot.tree.sync(guild=discord.Object(id=interaction.guild.id))
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        result = await sync_if_changed(self.bot.tree, discord.Object(id=interaction.guild.id), force=force)
+        if result.synced:
+            msg = f"✅ Commands refreshed for guild: **{interaction.guild.name}** ({result.commands} commands, {result.seconds:.2f}s)"
+        else:
+            msg = f"✅ Commands already up to date for **{interaction.guild.name}**. Use `force` to sync anyway."
+        await interaction.followup.send(msg, ephemeral=True)
+
+    @app_commands.command(name="reload_points", description="Staff: reload boss_points.json without restarting")
+    async def reload_points(self, interaction: discord.Interaction):
+        if not await is_staff(interaction):
+            return await interaction.response.send_message("This command is staff-only.", ephemeral=True)
+        settings = await get_guild_settings(interaction.guild_id)
+        try:
+            table = settings.points.reload() if settings.points is not None else reload_points_table()
+        except (OSError, PointsTableError) as e:
+            return await interaction.response.send_message(
+                f"❌ Reload failed, previous table still active:\n{e}"[:2000],
+                ephemeral=True
+            )
+        msg = f"✅ Boss points reloaded ({len(table)} bosses)."
+        if table.warnings:
+            msg += "\n" + "\n".join(f"⚠️ {w}" for w in table.warnings)
+        await interaction.response.send_message(msg[:2000], ephemeral=True)
+
+    @app_commands.command(name="settings", description="Show this server's clan bot settings")
+    @app_commands.guild_only()
+    async def settings(self, interaction: discord.Interaction):
+        if not await is_staff(interaction):
+            return await interaction.response.send_message("This command is staff-only.", ephemeral=True)
+        settings = await get_guild_settings(interaction.guild_id)
+        await interaction.response.send_message(embed=settings_embed(interaction.guild, settings), ephemeral=True)
+
+    @app_commands.command(name="settings_set", description="Manage Server: change this server's channels, roles or ranks")
+    @app_commands.describe(
+        staff_channel="Channel that receives applications",
+        staff_role="Role allowed to use staff commands",
+        member_role="Role given to accepted members",
+        visitor_role="Role given to accepted visitors",
+        rank_thresholds="e.g. 0:Bronze, 1000:Iron, 2500:Steel",
+        reset="Comma-separated settings to revert to the defaults (e.g. staff_role, rank_thresholds)",
+    )
+    @app_commands.guild_only()
+    async def settings_set(
+        self,
+        interaction: discord.Interaction,
+        staff_channel: Optional[discord.TextChannel] = None,
+        staff_role: Optional[discord.Role] = None,
+        member_role: Optional[discord.Role] = None,
+        visitor_role: Optional[discord.Role] = None,
+        rank_thresholds: Optional[str] = None,
+        reset: Optional[str] = None,
+    ):
+        if not _can_configure(interaction):
+            return await interaction.response.send_message("You need Manage Server to change settings.", ephemeral=True)
+        changes = {}
+        for part in (reset or "").split(","):
+            if part.strip():
+                key = part.strip().lower()
+                changes[key if key == "rank_thresholds" else f"{key.removesuffix('_id')}_id"] = None
+        for key, value in (
+            ("staff_channel_id", staff_channel),
+            ("staff_role_id", staff_role),
+            ("member_role_id", member_role),
+            ("visitor_role_id", visitor_role),
+        ):
+            if value is not None:
+                changes[key] = value.id
+        try:
+            if rank_thresholds:
+                changes["rank_thresholds"] = parse_thresholds(rank_thresholds)
+            if not changes:
+                return await interaction.response.send_message("Nothing to change.", ephemeral=True)
+            settings = await update_guild_settings(interaction.guild_id, **changes)
+        except GuildSettingsError as e:
+            return await interaction.response.send_message(f"❌ {e}"[:2000], ephemeral=True)
+        await interaction.response.send_message(
+            "✅ Settings saved.", embed=settings_embed(interaction.guild, settings), ephemeral=True
+        )
+
+    @app_commands.command(name="settings_points", description="Manage Server: use a custom boss points table for this server")
+    @app_commands.describe(
+        table="boss_points.json for this server (boss name → points)",
+        reset="Go back to the shared points table",
+    )
+    @app_commands.guild_only()
+    async def settings_points(
+        self,
+        interaction: discord.Interaction,
+        table: Optional[discord.Attachment] = None,
+        reset: bool = False,
+    ):
+        if not _can_configure(interaction):
+            return await interaction.response.send_message("You need Manage Server to change settings.", ephemeral=True)
+        if table is None and not reset:
+            return await interaction.response.send_message("Attach a `table` or set `reset`.", ephemeral=True)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            raw = None if reset else json.loads((await table.read()).decode("utf-8-sig"))
+            settings = await set_guild_points(interaction.guild_id, raw)
+        except (ValueError, PointsTableError) as e:
+            return await interaction.followup.send(f"❌ Points table rejected:\n{e}"[:2000], ephemeral=True)
+        points = settings.points_table
+        msg = "✅ Using the shared points table." if reset else f"✅ Points table saved ({len(points)} bosses)."
+        if points.warnings and not reset:
+            msg += f"\n⚠️ {len(points.warnings)} bosses have no entry and score 0."
+        await interaction.followup.send(msg[:2000], ephemeral=True)
+
+    @app_commands.command(name="member_add", description="Staff: add RSNs to the clan roster ranked by /leaderboard")
+    @app_commands.describe(names="One or more RSNs, comma-separated (mains and alts)")
+    async def member_add(self, interaction: discord.Interaction, names: str):
+        if not await is_staff(interaction):
+            return await interaction.response.send_message("This command is staff-only.", ephemeral=True)
+        players = [n.strip() for n in names.split(",") if n.strip()]
+        if not players:
+            return await interaction.response.send_message("Give at least one RSN.", ephemeral=True)
+        added = await self.bot.add_clan_members(players, interaction.guild_id)  # type: ignore[attr-defined]
         await interaction.response.send_message(
-            f"✅ Commands refreshed for guild: **{interaction.guild.name}**",
-            ephemeral=True
+            f"✅ On the clan roster: {', '.join(added)}"[:2000], ephemeral=True
         )
 
+    @app_commands.command(name="member_remove", description="Staff: remove RSNs from the clan roster and leaderboard")
+    @app_commands.describe(names="One or more RSNs, comma-separated")
+    async def member_remove(self, interaction: discord.Interaction, names: str):
+        if not await is_staff(interaction):
+            return await interaction.response.send_message("This command is staff-only.", ephemeral=True)
+        players = [n.strip() for n in names.split(",") if n.strip()]
+        removed = await self.bot.remove_clan_members(players)  # type: ignore[attr-defined]
+        if not removed:
+            return await interaction.response.send_message("None of those RSNs were on the roster.", ephemeral=True)
+        await interaction.response.send_message(f"✅ Removed from the clan roster: {', '.join(removed)}"[:2000], ephemeral=True)
+
+    @app_commands.command(name="perf", description="Staff: event-loop lag, latencies, cache and process stats")
+    @app_commands.describe(
+        profile_seconds=f"Also sample the event loop for this many seconds (1-{PERF_PROFILE_MAX_SECONDS}) and attach a profile",
+    )
+    async def perf(
+        self,
+        interaction: discord.Interaction,
+        profile_seconds: Optional[app_commands.Range[int, 1, PERF_PROFILE_MAX_SECONDS]] = None,
+    ):
+        if not await is_staff(interaction):
+            return await interaction.response.send_message("This command is staff-only.", ephemeral=True)
+        if not profile_seconds:
+            return await interaction.response.send_message(embed=perf_embed(self.bot), ephemeral=True)
+        try:
+            # Claimed before the first await, so a concurrent /perf can't slip in after our check
+            with _sampler.claim():
+                await interaction.response.defer(ephemeral=True, thinking=True)
+                profile = await _sampler.profile_loop(profile_seconds)
+        except ProfilerBusy:
+            return await interaction.response.send_message("A profile is already running; try again shortly.", ephemeral=True)
+        report = discord.File(io.BytesIO(profile_report(profile).encode("utf-8")), filename="perf_profile.txt")
+        await interaction.followup.send(embed=perf_embed(self.bot, profile), file=report, ephemeral=True)
+
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(Admin(bot))
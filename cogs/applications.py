@@ -1,5 +1,7 @@
 from __future__ import annotations
-from typing import Optional, List, Tuple
+import logging
+import time
+from typing import Optional, List, Sequence, Tuple
 from datetime import datetime, timezone
 
 import discord
@@ -7,14 +9,22 @@ from discord import app_commands
 from discord.ext import commands
 
 from config import (
-    STAFF_CHANNEL_ID,
-    MEMBER_ROLE_ID,
-    VISITOR_ROLE_ID,
+    APP_QUEUE_PATH,
+    APP_QUEUE_SIZE,
+    APP_QUEUE_WORKERS,
+    ALT_LOOKUP_TIMEOUT,
+    ALT_MAX_LOOKUPS,
 )
-from utils.constants import ACCOUNT_TYPE_OPTIONS, normalize_account_type
-from utils.constants import get_boss_points
-from utils.hiscores import fetch_csv_rows, extract_boss_kc, compute_points
-from utils.ranks import get_rank_name
+from utils.constants import ACCOUNT_TYPE_OPTIONS, AUTO_ACCOUNT_TYPE, normalize_account_type
+from utils.guild_settings import get_guild_settings
+from utils.metrics import span, observe_command
+from utils.app_queue import ApplicationJob, ApplicationQueue
+from utils.members import get_or_fetch_member
+from utils.responses import pack_lines
+from utils.roster import lookup_main_and_alts, combine_scores, format_account_line
+from utils.ratelimit import BACKGROUND, INTERACTIVE, priority
+
+logger = logging.getLogger("clan_bot.applications")
 
 
 APPLICATION_TYPE_OPTIONS = [
@@ -118,18 +128,22 @@ class ApplicationPrefaceView(discord.ui.View):
 
 
 class ApplicationDecisionView(discord.ui.View):
-    def __init__(self, applicant_id: int, applicant_name: str):
+    def __init__(self, applicant_id: int, applicant_name: str, alt_names: Sequence[str] = ()):
         super().__init__(timeout=None)
         self.applicant_id = applicant_id
         self.applicant_name = applicant_name
+        self.alt_names = list(alt_names)
 
-    async def _finalize(self, interaction: discord.Interaction, decision: str, color: discord.Color):
+    async def _finalize(self, interaction: discord.Interaction, decision: str, color: discord.Color, clan_member: bool = False):
         msg = interaction.message
         if not msg or not msg.embeds:
             return await interaction.response.send_message("No embed found to update.", ephemeral=True)
 
-        embed = msg.embeds[0]
-        embed.color = color
+        # The review embed comes first; any breakdown embeds after it are recoloured too
+        embeds = msg.embeds
+        for e in embeds:
+            e.color = color
+        embed = embeds[0]
         footer_text = (embed.footer.text or "").strip()
         decided_by = f"Decision: {decision} by {interaction.user} ({interaction.user.id})"
         embed.set_footer(text=f"{footer_text} • {decided_by}" if footer_text else decided_by)
@@ -137,19 +151,32 @@ class ApplicationDecisionView(discord.ui.View):
         for child in self.children:
             child.disabled = True
 
-        await interaction.response.edit_message(embed=embed, view=self)
+        with span("decision_edit", flow="decision"):
+            await interaction.response.edit_message(embeds=embeds, view=self)
+
+        if clan_member:
+            # The clan roster behind /leaderboard and the Sheets export: main and alts
+            try:
+                names = await interaction.client.add_clan_members(  # type: ignore[attr-defined]
+                    [self.applicant_name, *self.alt_names], interaction.guild_id
+                )
+                logger.info(f"Added to clan roster: {', '.join(names)}")
+            except Exception as e:
+                logger.error(f"Failed to add {self.applicant_name} to the clan roster: {e!r}")
 
         if interaction.guild:
             try:
-                member = interaction.guild.get_member(self.applicant_id)
+                member = await get_or_fetch_member(interaction.guild, self.applicant_id)
                 if member:
+                    settings = await get_guild_settings(interaction.guild.id)
                     role = None
-                    if "Member" in decision and MEMBER_ROLE_ID:
-                        role = interaction.guild.get_role(MEMBER_ROLE_ID)
-                    elif "Visitor" in decision and VISITOR_ROLE_ID:
-                        role = interaction.guild.get_role(VISITOR_ROLE_ID)
+                    if "Member" in decision and settings.member_role_id:
+                        role = interaction.guild.get_role(settings.member_role_id)
+                    elif "Visitor" in decision and settings.visitor_role_id:
+                        role = interaction.guild.get_role(settings.visitor_role_id)
                     if role:
-                        await member.add_roles(role, reason="Accepted via clan application")
+                        with span("role_edit", flow="decision"):
+                            await member.add_roles(role, reason="Accepted via clan application")
             except discord.Forbidden:
                 pass
             except Exception:
@@ -168,13 +195,14 @@ class ApplicationDecisionView(discord.ui.View):
                     description=f"Your application for {self.applicant_name} has been reviewed.\nResult: {decision}",
                     color=color
                 )
-                await user.send(embed=dm)
+                with span("dm_send", flow="decision"):
+                    await user.send(embed=dm)
             except Exception:
                 pass
 
     @discord.ui.button(label="Accept as Clan Member", style=discord.ButtonStyle.green)
     async def accept_member(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await self._finalize(interaction, "Accepted as Clan Member ✅", discord.Color.green())
+        await self._finalize(interaction, "Accepted as Clan Member ✅", discord.Color.green(), clan_member=True)
 
     @discord.ui.button(label="Accept as Visitor", style=discord.ButtonStyle.blurple)
     async def accept_visitor(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -184,6 +212,158 @@ class ApplicationDecisionView(discord.ui.View):
     async def decline(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self._finalize(interaction, "Declined ❌", discord.Color.red())
 
+async def _notify_applicant(client: discord.Client, job: ApplicationJob, interaction: Optional[discord.Interaction], message: str):
+    if interaction is not None:
+        with span("followup_send", flow="apply"):
+            await interaction.followup.send(message, ephemeral=True)
+        return
+    # Replayed after a restart: the interaction is gone, so tell the applicant by DM
+    user = client.get_user(job.user_id)
+    if user is None:
+        user = await client.fetch_user(job.user_id)
+    with span("dm_send", flow="apply"):
+        await user.send(message)
+
+
+async def process_application(client: discord.Client, job: ApplicationJob, interaction: Optional[discord.Interaction] = None):
+    """Hiscores enrichment, staff post and nickname update for one queued submission."""
+    started = time.perf_counter()
+    try:
+        rsn = job.rsn
+        acct = job.account_type
+        app_type_label = "Visitor" if job.application_type == "visitor" else "Clan Member"
+        guild = interaction.guild if interaction is not None else (client.get_guild(job.guild_id) if job.guild_id else None)
+        settings = await get_guild_settings(job.guild_id)
+
+        # hiscores for the main and every alt, concurrently; alts are time-boxed
+        lookups = await lookup_main_and_alts(rsn, acct, parse_alts(job.alts), ALT_LOOKUP_TIMEOUT, ALT_MAX_LOOKUPS)
+        main = lookups[0]
+        detected, kc_map = main.account_type, main.kc_map
+        # Still submit the application if the hiscores are down; staff can check by hand
+        lookup_failed = main.unavailable
+        if lookup_failed:
+            logger.warning(f"Hiscores unavailable for application of {rsn}")
+        if acct == AUTO_ACCOUNT_TYPE:
+            acct_label = f"{detected.replace('_', ' ').title()} (auto-detected)" if detected else "Unknown (auto-detect)"
+        else:
+            acct_label = acct.replace("_", " ").title()
+        with span("points_compute", flow="apply"):
+            combined = combine_scores(lookups, settings.boss_points, settings.rank_thresholds)
+            total_points, breakdown = combined.main.points, combined.main.breakdown
+            rank_name = settings.rank_name(total_points)
+
+        # Build staff review embed
+        with span("embed_build", flow="apply"):
+            embed = discord.Embed(title="New Clan Application", color=discord.Color.green())
+            embed.add_field(name="OSRS Name", value=rsn or "—", inline=True)
+            embed.add_field(name="Account Type", value=acct_label, inline=True)
+            embed.add_field(name="Application Type", value=app_type_label, inline=True)
+            embed.add_field(name="Recommended Rank", value=rank_name, inline=True)
+            embed.add_field(name="Fire Cape", value=job.firecape or "—", inline=True)
+            embed.add_field(name="Infernal Cape", value=job.infernal_cape or "—", inline=True)
+
+            if combined.alts:
+                alt_lines = "\n".join(format_account_line(a) for a in combined.alts)
+                embed.add_field(name="Alts", value=alt_lines[:1024], inline=False)
+
+            if kc_map is not None:
+                embed.add_field(name="Total Points", value=f"{total_points:.2f}", inline=True)
+            elif lookup_failed:
+                embed.add_field(name="Hiscores Lookup", value="Hiscores unavailable at submission time — please check manually.", inline=False)
+            else:
+                embed.add_field(name="Hiscores Lookup", value="User not found on selected hiscores.", inline=False)
+
+            if any(a.found for a in combined.alts):
+                embed.add_field(name="Combined Points (main + alts)", value=f"{combined.total:.2f}", inline=True)
+                embed.add_field(name="Combined Rank", value=combined.rank, inline=True)
+
+            embed.set_footer(text=f"From {job.user_tag} ({job.user_id})")
+            # Full per-boss breakdown rides along in the same message when it fits
+            pages = pack_lines(
+                [f"- {b}: {kc} KC → {pts:.2f} pts" for b, kc, pts in breakdown],
+                f"Points Breakdown — {rsn}",
+                discord.Color.green(),
+                lead=[embed],
+                reserve=256,  # the decision footer is appended when staff accept/decline
+            ) if breakdown else [[embed]]
+
+        # Send to staff channel
+        staff_channel_id = settings.staff_channel_id
+        staff_channel = client.get_channel(staff_channel_id) if staff_channel_id else None
+        logger.debug(f"guild={job.guild_id}, staff_channel_id={staff_channel_id}, staff_channel={staff_channel}")
+        channel_guild = getattr(staff_channel, "guild", None)
+        if staff_channel and job.guild_id is not None and (channel_guild is None or channel_guild.id != job.guild_id):
+            # Never post one clan's application (and its decision buttons) into another guild
+            logger.warning(
+                f"Staff channel {staff_channel_id} is not in guild {job.guild_id}; "
+                f"its staff need to run /settings_set to pick their own staff channel"
+            )
+            staff_channel = None
+        elif not staff_channel and job.guild_id is not None:
+            logger.info(f"No staff channel configured for guild {job.guild_id}; staff can set one with /settings_set")
+        decision_view = ApplicationDecisionView(applicant_id=job.user_id, applicant_name=rsn, alt_names=parse_alts(job.alts))
+
+        if staff_channel:
+            try:
+                with span("staff_channel_send", flow="apply"):
+                    await staff_channel.send(
+                        content=f"<@{job.user_id}>",
+                        embeds=pages[0],
+                        view=decision_view,
+                        allowed_mentions=discord.AllowedMentions(users=True, roles=True)
+                    )
+                    for page in pages[1:]:
+                        await staff_channel.send(embeds=page)
+                ack = "✅ Application submitted! Staff and you have been notified."
+                logger.debug("Posted to staff channel successfully")
+            except Exception as e:
+                logger.error(f"Failed to send to staff channel: {e!r}")
+                ack = "❌ Application saved, but staff notification failed."
+        else:
+            try:
+                user = interaction.user if interaction is not None else await client.fetch_user(job.user_id)
+                with span("dm_send", flow="apply"):
+                    for page in pages:
+                        await user.send(embeds=page)
+                ack = "✅ Application submitted! (Staff channel not set; sent you a DM copy.)"
+                logger.debug("Sent application to user via DM")
+            except Exception as e:
+                logger.error(f"Failed to DM user: {e!r}")
+                ack = "✅ Application submitted! (Staff channel not set and DM failed.)"
+
+        # Nickname update
+        if guild:
+            try:
+                member = await get_or_fetch_member(guild, job.user_id)
+                if member:
+                    nick = build_nickname(rsn, job.alts)
+                    with span("nickname_edit", flow="apply"):
+                        await member.edit(nick=nick, reason="Set by application submission (main + alts)")
+                    logger.debug(f"Updated nickname to {nick}")
+            except discord.Forbidden:
+                logger.warning("Missing permission to change nickname")
+            except Exception as e:
+                logger.error(f"Nickname update failed: {e!r}")
+
+        try:
+            await _notify_applicant(client, job, interaction, ack)
+            logger.debug("Followup sent to applicant")
+        except Exception as e:
+            logger.error(f"Failed to send followup: {e!r}")
+        observe_command("apply_process", time.perf_counter() - started)
+
+    except Exception as outer_e:
+        logger.exception(f"Exception processing application for {job.rsn}: {outer_e!r}")
+        observe_command("apply_process", time.perf_counter() - started, outcome="error")
+        try:
+            await _notify_applicant(
+                client, job, interaction,
+                "❌ Something went wrong submitting your application. Please try again later."
+            )
+        except:
+            pass
+
+
 class ApplicationModal(discord.ui.Modal, title="Clan Application"):
     def __init__(self, account_type: str, application_type: str):
         super().__init__()
@@ -222,94 +402,42 @@ class ApplicationModal(discord.ui.Modal, title="Clan Application"):
         self.add_item(self.alts)
 
     async def on_submit(self, interaction: discord.Interaction):
+        started = time.perf_counter()
         try:
-            print(f"[DEBUG] Final modal submit from {interaction.user} ({interaction.user.id})")
-            await interaction.response.defer(ephemeral=True, thinking=True)
-            print("[DEBUG] Interaction deferred")
-
-            rsn = str(self.osrs_name.value).strip()
-            acct = self.account_type
-            app_type_label = "Visitor" if self.application_type == "visitor" else "Clan Member"
-
-            # hiscores + points calc
-            print("[DEBUG] Fetching hiscores data…")
-            rows = await fetch_csv_rows(rsn, acct)
-            kc_map = extract_boss_kc(rows) if rows else {}
-            boss_points = get_boss_points()
-            total_points, breakdown = compute_points(kc_map, boss_points)
-            rank_name = get_rank_name(total_points)
-
-            # Build staff review embed
-            embed = discord.Embed(title="New Clan Application", color=discord.Color.green())
-            embed.add_field(name="OSRS Name", value=rsn or "—", inline=True)
-            embed.add_field(name="Account Type", value=acct.replace("_", " ").title(), inline=True)
-            embed.add_field(name="Application Type", value=app_type_label, inline=True)
-            embed.add_field(name="Recommended Rank", value=rank_name, inline=True)
-            embed.add_field(name="Fire Cape", value=self.firecape.value or "—", inline=True)
-            embed.add_field(name="Infernal Cape", value=self.infernal_cape.value or "—", inline=True)
-
-            if self.alts.value:
-                alts_preview = ", ".join(parse_alts(self.alts.value))[:1024]
-                embed.add_field(name="Alts", value=alts_preview or "—", inline=False)
-
-            if rows:
-                embed.add_field(name="Total Points", value=f"{total_points:.2f}", inline=False)
-                if breakdown:
-                    top = "\n".join(f"- {b}: {kc} KC → {pts:.2f} pts" for b, kc, pts in breakdown[:8])
-                    embed.add_field(name="Top Contributors", value=top[:1024], inline=False)
-            else:
-                embed.add_field(name="Hiscores Lookup", value="User not found on selected hiscores.", inline=False)
-
-            embed.set_footer(text=f"From {interaction.user} ({interaction.user.id})")
-
-            # Send to staff channel
-            staff_channel = interaction.client.get_channel(STAFF_CHANNEL_ID) if STAFF_CHANNEL_ID else None
-            print(f"[DEBUG] STAFF_CHANNEL_ID={STAFF_CHANNEL_ID}, staff_channel={staff_channel}")
-            decision_view = ApplicationDecisionView(applicant_id=interaction.user.id, applicant_name=rsn)
-
-            if staff_channel:
-                try:
-                    await staff_channel.send(
-                        content=f"<@{interaction.user.id}>",
-                        embed=embed,
-                        view=decision_view,
-                        allowed_mentions=discord.AllowedMentions(users=True, roles=True)
-                    )
-                    ack = "✅ Application submitted! Staff and you have been notified."
-                    print("[DEBUG] Posted to staff channel successfully")
-                except Exception as e:
-                    print("[ERROR] Failed to send to staff channel:", repr(e))
-                    ack = "❌ Application saved, but staff notification failed."
+            logger.debug(f"Final modal submit from {interaction.user} ({interaction.user.id})")
+            with span("interaction_defer", flow="apply"):
+                await interaction.response.defer(ephemeral=True, thinking=True)
+
+            job = ApplicationJob(
+                user_id=interaction.user.id,
+                user_tag=str(interaction.user),
+                guild_id=interaction.guild.id if interaction.guild else None,
+                rsn=str(self.osrs_name.value).strip(),
+                account_type=self.account_type,
+                application_type=self.application_type,
+                firecape=self.firecape.value or "",
+                infernal_cape=self.infernal_cape.value or "",
+                alts=self.alts.value or "",
+            )
+            queue = getattr(interaction.client, "app_queue", None)
+            if queue is None:
+                # No worker pool (e.g. the cog isn't loaded by ClanBot); process inline
+                await process_application(interaction.client, job, interaction)
             else:
-                try:
-                    await interaction.user.send(embed=embed)
-                    ack = "✅ Application submitted! (Staff channel not set; sent you a DM copy.)"
-                    print("[DEBUG] Sent application to user via DM")
-                except Exception as e:
-                    print("[ERROR] Failed to DM user:", repr(e))
-                    ack = "✅ Application submitted! (Staff channel not set and DM failed.)"
-
-            # Nickname update
-            if interaction.guild:
-                try:
-                    member = interaction.guild.get_member(interaction.user.id)
-                    if member:
-                        nick = build_nickname(rsn, self.alts.value or "")
-                        await member.edit(nick=nick, reason="Set by application submission (main + alts)")
-                        print(f"[DEBUG] Updated nickname to {nick}")
-                except discord.Forbidden:
-                    print("[WARN] Missing permission to change nickname")
-                except Exception as e:
-                    print("[ERROR] Nickname update failed:", repr(e))
-
-            try:
-                await interaction.followup.send(ack, ephemeral=True)
-                print("[DEBUG] Followup sent to applicant")
-            except Exception as e:
-                print("[ERROR] Failed to send followup:", repr(e))
+                job_id = await queue.add(job, interaction)
+                if queue.full:
+                    with span("followup_send", flow="apply"):
+                        await interaction.followup.send(
+                            f"⏳ Lots of applications right now — you're **#{queue.position(job_id)}** in the queue. "
+                            "You'll get a confirmation here once it has been submitted to staff.",
+                            ephemeral=True
+                        )
+                await queue.enqueue(job_id)
+            observe_command("apply_submit", time.perf_counter() - started)
 
         except Exception as outer_e:
-            print("[FATAL] Exception in on_submit:", repr(outer_e))
+            logger.exception(f"Exception in on_submit: {outer_e!r}")
+            observe_command("apply_submit", time.perf_counter() - started, outcome="error")
             try:
                 await interaction.followup.send(
                     "❌ Something went wrong submitting your application. Please try again later.",
@@ -319,10 +447,24 @@ class ApplicationModal(discord.ui.Modal, title="Clan Application"):
                 pass
 
 
-
 class Applications(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.queue = ApplicationQueue(APP_QUEUE_PATH, APP_QUEUE_SIZE, APP_QUEUE_WORKERS)
+
+    async def cog_load(self):
+        # Workers enrich and post submissions; jobs left over from the last run are replayed
+        await self.queue.start(self._handle_job)
+        self.bot.app_queue = self.queue  # type: ignore[attr-defined]
+
+    async def _handle_job(self, job_id: int, job: ApplicationJob, interaction: Optional[discord.Interaction]):
+        # Someone is waiting on a live submission; jobs replayed after a restart are background work
+        with priority(INTERACTIVE if interaction is not None else BACKGROUND):
+            await process_application(self.bot, job, interaction)
+
+    async def cog_unload(self):
+        self.bot.app_queue = None  # type: ignore[attr-defined]
+        await self.queue.close()
 
     @app_commands.command(name="apply", description="Submit a clan application with automatic points lookup")
     async def apply(self, interaction: discord.Interaction):
@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+import discord
+import numpy as np
+from discord import app_commands
+from discord.ext import commands
+
+from utils.constants import API_BOSS_ORDER, normalize_account_type
+from utils.guild_settings import get_guild_settings
+from utils.kc_history import KCHistoryUnavailable
+from utils.responses import pack_lines, send_pages
+
+_BOSS_INDEX = {b: i for i, b in enumerate(API_BOSS_ORDER)}
+_HISTORY_DOWN = "KC history is unavailable right now (it failed to open at startup). Please tell staff."
+
+
+def parse_period(days: int, start: Optional[str], end: Optional[str]) -> Tuple[float, float]:
+    # Explicit YYYY-MM-DD dates (UTC, end inclusive) win over the trailing `days` window
+    def parse(value: str) -> float:
+        return datetime.strptime(value.strip(), "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+    end_ts = parse(end) + 86400 - 1 if end else datetime.now(timezone.utc).timestamp()
+    start_ts = parse(start) if start else end_ts - max(1, days) * 86400
+    if start_ts >= end_ts:
+        raise ValueError("start must be before end")
+    return start_ts, end_ts
+
+
+def period_label(start_ts: float, end_ts: float) -> str:
+    fmt = lambda ts: datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+    return f"{fmt(start_ts)} → {fmt(end_ts)}"
+
+
+class Gains(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @property
+    def history(self):
+        return self.bot.kc_history  # type: ignore[attr-defined]
+
+    async def boss_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        needle = current.lower()
+        return [app_commands.Choice(name=b, value=b) for b in API_BOSS_ORDER if needle in b.lower()][:25]
+
+    @app_commands.command(name="gains", description="KC gained by a player over a period (from recorded lookups).")
+    @app_commands.describe(
+        username="OSRS name",
+        account_type="normal, ironman, hcim, uim, gim, ugim",
+        days="Trailing window in days (ignored if start is given)",
+        start="Start date YYYY-MM-DD (UTC)",
+        end="End date YYYY-MM-DD (UTC, inclusive)",
+    )
+    async def gains(
+        self,
+        interaction: discord.Interaction,
+        username: str,
+        account_type: str = "normal",
+        days: int = 7,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ):
+        acct = normalize_account_type(account_type or "normal")
+        if not acct:
+            return await interaction.response.send_message("Unknown account type.", ephemeral=True)
+        try:
+            start_ts, end_ts = parse_period(days, start, end)
+        except ValueError as e:
+            return await interaction.response.send_message(f"Invalid period: {e}", ephemeral=True)
+
+        try:
+            gained = await self.history.player_gains(username, acct, start_ts, end_ts)
+        except KCHistoryUnavailable:
+            return await interaction.response.send_message(_HISTORY_DOWN, ephemeral=True)
+        if gained is None:
+            return await interaction.response.send_message(
+                f"No recorded history for '{username}' ({acct}) in that period. Run `/points` for them to start tracking.",
+                ephemeral=True
+            )
+        table = (await get_guild_settings(interaction.guild_id)).points_table
+        rows = sorted(gained.items(), key=lambda kv: kv[1], reverse=True)
+        points = sum(kc * table.points.get(boss, 0.0) for boss, kc in rows)
+        pages = pack_lines(
+            [f"- {boss}: +{kc:,} KC" for boss, kc in rows] or ["No KC gained."],
+            f"{username} — gains {period_label(start_ts, end_ts)}",
+            discord.Color.teal(),
+            fields=[("Total KC", f"+{sum(gained.values()):,}", True), ("Points", f"+{points:,.2f}", True)],
+        )
+        await send_pages(interaction, pages)
+
+    @app_commands.command(name="top_gains", description="Most KC (or points) gained across tracked players.")
+    @app_commands.describe(
+        boss="Rank by KC gained on this boss (default: clan points gained)",
+        count="How many players to show (max 50)",
+        days="Trailing window in days (ignored if start is given)",
+        start="Start date YYYY-MM-DD (UTC)",
+        end="End date YYYY-MM-DD (UTC, inclusive)",
+    )
+    @app_commands.autocomplete(boss=boss_autocomplete)
+    async def top_gains(
+        self,
+        interaction: discord.Interaction,
+        boss: Optional[str] = None,
+        count: int = 10,
+        days: int = 7,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ):
+        if boss is not None and boss not in _BOSS_INDEX:
+            return await interaction.response.send_message(f"Unknown boss '{boss}'.", ephemeral=True)
+        try:
+            start_ts, end_ts = parse_period(days, start, end)
+        except ValueError as e:
+            return await interaction.response.send_message(f"Invalid period: {e}", ephemeral=True)
+
+        try:
+            result = await self.history.gains(start_ts, end_ts)
+        except KCHistoryUnavailable:
+            return await interaction.response.send_message(_HISTORY_DOWN, ephemeral=True)
+        if boss is not None:
+            metric = result.gained[:, _BOSS_INDEX[boss]].astype(np.float64)
+            unit, fmt = "KC", "{:,.0f}"
+        else:
+            table = (await get_guild_settings(interaction.guild_id)).points_table
+            metric = result.gained @ np.array(table.weights, dtype=np.float64)
+            unit, fmt = "pts", "{:,.2f}"
+        order = [i for i in np.argsort(-metric, kind="stable")[: max(1, min(count, 50))].tolist() if metric[i] > 0]
+        if not order:
+            return await interaction.response.send_message("No gains recorded in that period.", ephemeral=True)
+
+        lines = [
+            f"`#{pos:<3}` {result.names[i]} ({result.players[i][1].replace('_', ' ')}) — +{fmt.format(metric[i])} {unit}"
+            for pos, i in enumerate(order, start=1)
+        ]
+        title = f"Top gains — {boss or 'clan points'} ({period_label(start_ts, end_ts)})"
+        await send_pages(interaction, pack_lines(lines, title, discord.Color.teal()))
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Gains(bot))
@@ -0,0 +1,97 @@
+from typing import List, Optional, Tuple
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.constants import normalize_account_type
+from utils.leaderboard import LeaderboardEntry
+from utils.ranks import RANK_THRESHOLDS, get_rank_name
+from utils.responses import pack_lines, send_pages
+
+MAX_ROWS = 200
+RANK_CHOICES = [app_commands.Choice(name=name, value=name) for _, name in RANK_THRESHOLDS]
+
+
+def row_lines(rows: List[Tuple[int, LeaderboardEntry]]) -> List[str]:
+    return [f"`#{pos:<4}` {e.name} ({e.key[1].replace('_', ' ')}) — {e.points:,.2f} pts" for pos, e in rows]
+
+
+def format_rows(rows: List[Tuple[int, LeaderboardEntry]]) -> str:
+    return "\n".join(row_lines(rows))
+
+
+class Leaderboard(commands.Cog):
+    leaderboard = app_commands.Group(name="leaderboard", description="Clan points leaderboard (from stored snapshots)")
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @property
+    def index(self):
+        return self.bot.leaderboard  # type: ignore[attr-defined]
+
+    @leaderboard.command(name="top", description="Top players by clan points.")
+    @app_commands.describe(
+        count=f"How many players to show (max {MAX_ROWS})",
+        page="Page number",
+        paginate="Show long lists as one message with page buttons",
+    )
+    async def top(self, interaction: discord.Interaction, count: int = 10, page: int = 1, paginate: bool = False):
+        count = max(1, min(count, MAX_ROWS))
+        offset = (max(1, page) - 1) * count
+        rows = self.index.top(count, offset)
+        if not rows:
+            if not self.index.loaded:
+                return await interaction.response.send_message(
+                    "The leaderboard is still loading; try again in a moment.", ephemeral=True
+                )
+            return await interaction.response.send_message(
+                "No clan members on the leaderboard yet. Members are added when an application is accepted "
+                "or with `/member_add`.", ephemeral=True
+            )
+        pages = pack_lines(row_lines(rows), f"Clan Leaderboard — {len(self.index)} players", discord.Color.gold())
+        await send_pages(interaction, pages, paginate=paginate)
+
+    @leaderboard.command(name="me", description="Your position on the leaderboard.")
+    @app_commands.describe(
+        username="OSRS name (defaults to the main name in your nickname)",
+        account_type="normal, ironman, hcim, uim, gim, ugim (defaults to your best entry)",
+    )
+    async def me(self, interaction: discord.Interaction, username: Optional[str] = None, account_type: Optional[str] = None):
+        # Nicknames are set to "main | alt | ..." by the application flow
+        name = username or interaction.user.display_name.split(" | ")[0]
+        acct = normalize_account_type(account_type) if account_type else None
+        found = self.index.position(name, acct)
+        if found is None:
+            return await interaction.response.send_message(
+                f"'{name}' isn't on the leaderboard. Only clan members are ranked; once they are one, "
+                "`/points` puts them on the board.", ephemeral=True
+            )
+        pos, entry = found
+        neighbours = self.index.top(5, max(0, pos - 3))
+        embed = discord.Embed(
+            title=f"{entry.name} — #{pos} of {len(self.index)}",
+            description=format_rows(neighbours)[:4096],
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="Points", value=f"{entry.points:,.2f}", inline=True)
+        embed.add_field(name="Rank", value=get_rank_name(entry.points), inline=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @leaderboard.command(name="bracket", description="Players within a rank bracket.")
+    @app_commands.describe(
+        rank="Rank bracket",
+        count=f"How many players to show (max {MAX_ROWS})",
+        paginate="Show long lists as one message with page buttons",
+    )
+    @app_commands.choices(rank=RANK_CHOICES)
+    async def bracket(self, interaction: discord.Interaction, rank: app_commands.Choice[str], count: int = 25, paginate: bool = False):
+        total, rows = self.index.bracket(rank.value, max(1, min(count, MAX_ROWS)))
+        if not rows:
+            return await interaction.response.send_message(f"No players in the {rank.value} bracket.", ephemeral=True)
+        pages = pack_lines(row_lines(rows), f"{rank.value} bracket — {total} players", discord.Color.gold())
+        await send_pages(interaction, pages, paginate=paginate)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Leaderboard(bot))
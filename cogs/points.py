@@ -1,79 +1,114 @@
-from typing import List
+import io
+from collections import Counter
+from typing import Optional
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-from utils.constants import normalize_account_type, API_BOSS_ORDER, get_boss_points
-from utils.hiscores import fetch_csv_rows, extract_boss_kc, compute_points
+from config import BULK_CONCURRENCY, BULK_MAX_PLAYERS, ALT_LOOKUP_TIMEOUT, ALT_MAX_LOOKUPS
+from utils.checks import is_staff
+from utils.metrics import span
+from utils.constants import normalize_account_type, API_BOSS_ORDER, AUTO_ACCOUNT_TYPE
+from utils.guild_settings import get_guild_settings
+from utils.hiscores import fetch_csv_rows, resolve_account_type, HiscoresUnavailable
+from utils.responses import pack_lines, send_pages
+from utils.roster import (
+    parse_roster_text,
+    parse_roster_csv,
+    score_roster,
+    results_to_csv,
+    lookup_main_and_alts,
+    combine_scores,
+    format_account_line,
+)
+
+HISCORES_DOWN_MESSAGE = "⚠️ The OSRS hiscores aren't responding right now (game update?). Please try again in a few minutes."
 
 class Points(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
     @app_commands.command(name="points", description="Lookup KC → clan points via hiscores.")
-    @app_commands.describe(username="Exact OSRS name", account_type="normal, ironman, hcim, uim, gim, ugim")
-    async def points(self, interaction: discord.Interaction, username: str, account_type: str = "normal"):
+    @app_commands.describe(
+        username="Exact OSRS name",
+        account_type="normal, ironman, hcim, uim, gim, ugim, auto",
+        paginate="Show long breakdowns as one message with page buttons",
+        alts="Alts to add to the total (comma separated; account types are auto-detected)",
+    )
+    async def points(
+        self,
+        interaction: discord.Interaction,
+        username: str,
+        account_type: str = "normal",
+        paginate: bool = False,
+        alts: Optional[str] = None,
+    ):
         acct = normalize_account_type(account_type or "normal")
         if not acct:
             return await interaction.response.send_message(
-                "Unknown account type. Try: normal, ironman, hcim, uim, gim, ugim", ephemeral=True
+                "Unknown account type. Try: normal, ironman, hcim, uim, gim, ugim, auto", ephemeral=True
             )
 
-        await interaction.response.defer(ephemeral=True, thinking=True)
-        rows = await fetch_csv_rows(username, acct)
-        if not rows:
+        with span("interaction_defer", flow="points"):
+            await interaction.response.defer(ephemeral=True, thinking=True)
+        requested = acct
+        alt_names = [name for name, _ in parse_roster_text(alts)] if alts else []
+        lookups = await lookup_main_and_alts(username, requested, alt_names, ALT_LOOKUP_TIMEOUT, ALT_MAX_LOOKUPS)
+        main = lookups[0]
+        acct = main.account_type
+        if main.unavailable:
+            return await interaction.followup.send(HISCORES_DOWN_MESSAGE, ephemeral=True)
+        if main.kc_map is None:
+            where = "any hiscores table" if requested == AUTO_ACCOUNT_TYPE else requested
             return await interaction.followup.send(
-                f"Couldn't find hiscores for '{username}' on {acct}.", ephemeral=True
+                f"Couldn't find hiscores for '{username}' on {where}.", ephemeral=True
             )
 
-        kc_map = extract_boss_kc(rows)
-        boss_points = get_boss_points()
-        total, breakdown = compute_points(kc_map, boss_points)
-        if total == 0:
+        settings = await get_guild_settings(interaction.guild_id)
+        with span("points_compute", flow="points"):
+            combined = combine_scores(lookups, settings.boss_points, settings.rank_thresholds)
+            total, breakdown = combined.main.points, combined.main.breakdown
+        if total == 0 and not combined.alts:
             return await interaction.followup.send(
                 "No eligible boss killcounts detected for points.", ephemeral=True
             )
 
-        lines = [f"- {b}: {kc} KC → {pts:.2f} pts" for b, kc, pts in breakdown]
-
-        chunks: List[List[str]] = []
-        current: List[str] = []
-        current_len = 0
-        for line in lines:
-            add_len = len(line) + 1
-            if current_len + add_len > 3500:  # margin
-                chunks.append(current)
-                current = [line]
-                current_len = add_len
-            else:
-                current.append(line)
-                current_len += add_len
-        if current:
-            chunks.append(current)
-
-        embeds: List[discord.Embed] = []
-        for idx, chunk in enumerate(chunks, start=1):
+        with span("embed_build", flow="points"):
             title = f"{username} — {acct} hiscores"
-            if len(chunks) > 1:
-                title += f" (part {idx}/{len(chunks)})"
-            emb = discord.Embed(
-                title=title,
-                description="\n".join(chunk),
-                color=discord.Color.blurple()
+            if requested != acct:
+                title += " (auto-detected)"
+            fields = [("Total Points", f"{total:.2f}", False)]
+            if combined.alts:
+                alt_lines = "\n".join(format_account_line(a) for a in combined.alts)
+                fields += [
+                    ("Alts", alt_lines[:1024], False),
+                    ("Combined Points", f"{combined.total:.2f}", True),
+                    ("Combined Rank", combined.rank, True),
+                ]
+            pages = pack_lines(
+                [f"- {b}: {kc} KC → {pts:.2f} pts" for b, kc, pts in breakdown],
+                title,
+                discord.Color.blurple(),
+                fields=fields,
             )
-            if idx == 1:
-                emb.add_field(name="Total Points", value=f"{total:.2f}", inline=False)
-            embeds.append(emb)
 
-        for emb in embeds:
-            await interaction.followup.send(embed=emb, ephemeral=True)
+        with span("followup_send", flow="points"):
+            await send_pages(interaction, pages, paginate=paginate)
 
     @app_commands.command(name="kc_debug", description="Developer: show raw tail rows to align boss order.")
-    @app_commands.describe(username="OSRS username", account_type="Hiscores type (e.g., normal, ironman, ugim)")
-    async def kc_debug(self, interaction: discord.Interaction, username: str, account_type: str = "normal"):
+    @app_commands.describe(
+        username="OSRS username",
+        account_type="Hiscores type (e.g., normal, ironman, ugim, auto)",
+        paginate="Show the output as one message with page buttons",
+    )
+    async def kc_debug(self, interaction: discord.Interaction, username: str, account_type: str = "normal", paginate: bool = False):
         await interaction.response.defer(ephemeral=True, thinking=True)
         acct = normalize_account_type(account_type) or "normal"
-        rows = await fetch_csv_rows(username, acct)
+        try:
+            acct = await resolve_account_type(username, acct)
+            rows = await fetch_csv_rows(username, acct) if acct else []
+        except HiscoresUnavailable:
+            return await interaction.followup.send(HISCORES_DOWN_MESSAGE, ephemeral=True)
         if not rows:
             return await interaction.followup.send("No rows returned (user not found?).", ephemeral=True)
 
@@ -86,15 +121,71 @@ class Points(commands.Cog):
             name = API_BOSS_ORDER[i] if i < len(API_BOSS_ORDER) else "<UNMAPPED>"
             lines.append(f"{i:02d} | {name:<28} | rank={rank:<6} score/kc={score:<8} xp={xp:<8}")
 
-        text = "Tail mapping (index_lite):\n" + "\n".join(lines)
+        pages = pack_lines(lines, f"Tail mapping (index_lite) — {username}", discord.Color.dark_grey(), code_block=True)
+        with span("followup_send", flow="kc_debug"):
+            await send_pages(interaction, pages, paginate=paginate)
+
+    @app_commands.command(name="points_bulk", description="Staff: points + recommended rank for a list of RSNs or a CSV.")
+    @app_commands.describe(
+        names="RSNs separated by commas, newlines, | or ;",
+        roster_csv="CSV attachment of name,account_type",
+        account_type="Default account type for entries without one",
+    )
+    async def points_bulk(
+        self,
+        interaction: discord.Interaction,
+        names: Optional[str] = None,
+        roster_csv: Optional[discord.Attachment] = None,
+        account_type: str = "normal",
+    ):
+        if not await is_staff(interaction):
+            return await interaction.response.send_message("This command is staff-only.", ephemeral=True)
+        acct = normalize_account_type(account_type or "normal")
+        if not acct:
+            return await interaction.response.send_message(
+                "Unknown account type. Try: normal, ironman, hcim, uim, gim, ugim, auto", ephemeral=True
+            )
+        if not names and roster_csv is None:
+            return await interaction.response.send_message(
+                "Provide `names` or attach a `roster_csv`.", ephemeral=True
+            )
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        entries = parse_roster_text(names, acct) if names else []
+        if roster_csv is not None:
+            try:
+                raw = await roster_csv.read()
+                entries += parse_roster_csv(raw.decode("utf-8-sig", errors="replace"), acct)
+            except Exception as e:
+                return await interaction.followup.send(f"Couldn't read the attached CSV: {e}", ephemeral=True)
+        if not entries:
+            return await interaction.followup.send("No player names found in the input.", ephemeral=True)
+        if len(entries) > BULK_MAX_PLAYERS:
+            return await interaction.followup.send(
+                f"Too many players ({len(entries)}); the limit is {BULK_MAX_PLAYERS}.", ephemeral=True
+            )
+
+        settings = await get_guild_settings(interaction.guild_id)
+        with span("bulk_score", flow="points_bulk"):
+            results = await score_roster(entries, BULK_CONCURRENCY, settings.points_table, settings.rank_thresholds)
+        found = [r for r in results if r.found]
+        found.sort(key=lambda r: r.points, reverse=True)
+        rank_counts = Counter(r.rank for r in found)
+
+        embed = discord.Embed(title="Bulk points report", color=discord.Color.blurple())
+        embed.add_field(name="Players", value=str(len(results)), inline=True)
+        embed.add_field(name="Found", value=str(len(found)), inline=True)
+        embed.add_field(name="Not found / errors", value=str(len(results) - len(found)), inline=True)
+        if rank_counts:
+            dist = "\n".join(f"- {name}: {rank_counts[name]}" for _, name in settings.rank_thresholds if rank_counts[name])
+            embed.add_field(name="Recommended ranks", value=dist[:1024], inline=False)
+        if found:
+            top = "\n".join(f"- {r.name}: {r.points:.2f} pts ({r.rank})" for r in found[:10])
+            embed.add_field(name="Top 10", value=top[:1024], inline=False)
 
-        chunks: List[str] = []
-        while text:
-            chunks.append(text[:1900])
-            text = text[1900:]
-        for idx, chunk in enumerate(chunks, start=1):
-            suffix = f" (part {idx}/{len(chunks)})" if len(chunks) > 1 else ""
-            await interaction.followup.send(f"```text\n{chunk}\n```{suffix}", ephemeral=True)
+        report = discord.File(io.BytesIO(results_to_csv(results).encode("utf-8")), filename="points_bulk.csv")
+        with span("followup_send", flow="points_bulk"):
+            await interaction.followup.send(embed=embed, file=report, ephemeral=True)
 
 
 async def setup(bot: commands.Bot):
@@ -0,0 +1,73 @@
+import logging
+from typing import Optional
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+
+from config import (
+    SHEETS_SPREADSHEET_KEY,
+    SHEETS_WORKSHEET,
+    SHEETS_CREDENTIALS_PATH,
+    SHEETS_SYNC_INTERVAL,
+    SHEETS_MIN_INTERVAL,
+)
+from utils.checks import is_staff
+from utils.sheets_sync import GspreadSheetsClient, RosterSheetSync, SheetsClient, roster_rows
+
+logger = logging.getLogger("clan_bot.sheets")
+
+
+class Sheets(commands.Cog):
+    def __init__(self, bot: commands.Bot, client: Optional[SheetsClient] = None):
+        self.bot = bot
+        if client is None and SHEETS_SPREADSHEET_KEY:
+            client = GspreadSheetsClient(SHEETS_CREDENTIALS_PATH, SHEETS_SPREADSHEET_KEY, SHEETS_WORKSHEET)
+        self.sync = RosterSheetSync(client, min_interval=SHEETS_MIN_INTERVAL) if client else None
+
+    async def cog_load(self):
+        if self.sync is not None and SHEETS_SYNC_INTERVAL > 0:
+            self.periodic_sync.change_interval(seconds=SHEETS_SYNC_INTERVAL)
+            self.periodic_sync.start()
+
+    async def cog_unload(self):
+        self.periodic_sync.cancel()
+
+    def _rows(self):
+        board = self.bot.leaderboard  # type: ignore[attr-defined]
+        entries = board.top(len(board))
+        return roster_rows((e.name, e.key[1], e.points) for _, e in entries)
+
+    @tasks.loop(seconds=900)
+    async def periodic_sync(self):
+        try:
+            await self.sync.sync(self._rows())
+        except Exception as e:
+            logger.exception(f"Sheets sync failed: {e}")
+
+    @periodic_sync.before_loop
+    async def _wait_ready(self):
+        await self.bot.wait_until_ready()
+
+    @app_commands.command(name="sheet_sync", description="Staff: push the roster (points and ranks) to the Google Sheet now")
+    @app_commands.describe(full_refresh="Re-read the sheet first (use after editing it by hand)")
+    async def sheet_sync(self, interaction: discord.Interaction, full_refresh: bool = False):
+        if not await is_staff(interaction):
+            return await interaction.response.send_message("This command is staff-only.", ephemeral=True)
+        if self.sync is None:
+            return await interaction.response.send_message(
+                "Sheets sync is not configured (set SHEETS_SPREADSHEET_KEY).", ephemeral=True
+            )
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        rows = self._rows()
+        try:
+            changed = await self.sync.sync(rows, full_refresh=full_refresh)
+        except Exception as e:
+            logger.exception(f"Sheets sync failed: {e}")
+            return await interaction.followup.send(f"❌ Sheets sync failed: {e}"[:2000], ephemeral=True)
+        await interaction.followup.send(
+            f"✅ Roster synced ({len(rows)} players, {changed} cells changed).", ephemeral=True
+        )
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Sheets(bot))
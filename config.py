@@ -9,6 +9,9 @@ if not DISCORD_TOKEN:
     raise RuntimeError("DISCORD_TOKEN is not set in .env")
 
 # IDs (make optional but recommended)
+# GUILD_ID is the home clan's guild: the channel/role IDs below apply to it only, and slash
+# commands are synced to it alone (instant, for development). Leave it unset when the bot serves
+# several guilds, so commands sync globally; each guild then configures itself with /settings_set.
 GUILD_ID = int(os.getenv("GUILD_ID", "0")) or None
 STAFF_CHANNEL_ID = int(os.getenv("STAFF_CHANNEL_ID", "0")) or None
 MEMBER_ROLE_ID = int(os.getenv("MEMBER_ROLE_ID", "0")) or None
@@ -19,6 +22,97 @@ STAFF_ROLE_ID = int(os.getenv("STAFF_ROLE_ID", "0")) or None
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 BOSS_POINTS_PATH = os.path.join(DATA_DIR, "boss_points.json")
+SNAPSHOT_DB_PATH = os.getenv("SNAPSHOT_DB_PATH", os.path.join(DATA_DIR, "snapshots.sqlite3"))
+KC_HISTORY_PATH = os.getenv("KC_HISTORY_PATH", os.path.join(DATA_DIR, "kc_history.i32"))
+COMMAND_SYNC_STATE_PATH = os.getenv("COMMAND_SYNC_STATE_PATH", os.path.join(DATA_DIR, "command_sync.json"))
+APP_QUEUE_PATH = os.getenv("APP_QUEUE_PATH", os.path.join(DATA_DIR, "app_queue.sqlite3"))
+GUILD_SETTINGS_DIR = os.getenv("GUILD_SETTINGS_DIR", os.path.join(DATA_DIR, "guilds"))
+STARTUP_PROFILE_PATH = os.getenv("STARTUP_PROFILE_PATH", os.path.join(DATA_DIR, "startup_profile.json"))
+
+# HTTP (shared hiscores session)
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "20"))
+
+# Hiscores
+HISCORES_BASE_URL = os.getenv("HISCORES_BASE_URL", "https://secure.runescape.com").rstrip("/")
+
+# Hiscores resilience: per-attempt timeout, jittered retries, hedging and circuit breaker
+HISCORES_ATTEMPT_TIMEOUT = float(os.getenv("HISCORES_ATTEMPT_TIMEOUT", "8"))
+# Cap on one lookup across all attempts, hedges, backoff and rate-limit waits; attempts are clamped to what's left
+HISCORES_TOTAL_BUDGET = float(os.getenv("HISCORES_TOTAL_BUDGET", "12"))
+HISCORES_RETRIES = int(os.getenv("HISCORES_RETRIES", "2"))
+HISCORES_BACKOFF_BASE = float(os.getenv("HISCORES_BACKOFF_BASE", "0.5"))
+HISCORES_BACKOFF_MAX = float(os.getenv("HISCORES_BACKOFF_MAX", "4"))
+HISCORES_HEDGE = os.getenv("HISCORES_HEDGE", "true").lower() in ("1", "true", "yes", "on")
+HISCORES_HEDGE_QUANTILE = float(os.getenv("HISCORES_HEDGE_QUANTILE", "95"))
+HISCORES_HEDGE_MIN_DELAY = float(os.getenv("HISCORES_HEDGE_MIN_DELAY", "0.3"))
+HISCORES_HEDGE_DEFAULT_DELAY = float(os.getenv("HISCORES_HEDGE_DEFAULT_DELAY", "1.5"))
+HISCORES_BREAKER_FAILURES = int(os.getenv("HISCORES_BREAKER_FAILURES", "5"))
+HISCORES_BREAKER_RESET = float(os.getenv("HISCORES_BREAKER_RESET", "30"))
+
+# Global hiscores rate limit (requests/s, 0 disables) and burst; interactive lookups are served before bulk scans
+HISCORES_RATE = float(os.getenv("HISCORES_RATE", "10"))
+HISCORES_BURST = int(os.getenv("HISCORES_BURST", "20"))
+
+# Hiscores cache
+HISCORES_CACHE_SIZE = int(os.getenv("HISCORES_CACHE_SIZE", "2048"))
+HISCORES_CACHE_TTL = float(os.getenv("HISCORES_CACHE_TTL", "300"))
+HISCORES_CACHE_STALE_TTL = float(os.getenv("HISCORES_CACHE_STALE_TTL", "3600"))
+
+# Bulk roster lookups
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "8"))
+BULK_MAX_PLAYERS = int(os.getenv("BULK_MAX_PLAYERS", "1000"))
+
+# Compute pool for bulk parsing/scoring (0 workers scores inline on the event loop, in batches)
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", str(min(4, os.cpu_count() or 1))))
+COMPUTE_BATCH_SIZE = int(os.getenv("COMPUTE_BATCH_SIZE", "256"))
+
+# Alt lookups for /apply and /points (each alt is time-boxed so a slow one can't hold up the rest)
+ALT_LOOKUP_TIMEOUT = float(os.getenv("ALT_LOOKUP_TIMEOUT", "6"))
+ALT_MAX_LOOKUPS = int(os.getenv("ALT_MAX_LOOKUPS", "10"))
+
+# KC snapshot store
+SNAPSHOT_FLUSH_INTERVAL = float(os.getenv("SNAPSHOT_FLUSH_INTERVAL", "5"))
+SNAPSHOT_BATCH_SIZE = int(os.getenv("SNAPSHOT_BATCH_SIZE", "500"))
+
+# Boss points table (data/boss_points.json is re-read when its mtime changes)
+POINTS_RELOAD_INTERVAL = float(os.getenv("POINTS_RELOAD_INTERVAL", "5"))
+
+# Metrics (port 0 disables the /metrics endpoint, interval 0 disables log dumps)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_DUMP_INTERVAL = float(os.getenv("METRICS_DUMP_INTERVAL", "0"))
+
+# /perf: event-loop lag is sampled every PERF_LAG_INTERVAL seconds, keeping the last PERF_LAG_HISTORY samples
+PERF_LAG_INTERVAL = float(os.getenv("PERF_LAG_INTERVAL", "0.5"))
+PERF_LAG_HISTORY = int(os.getenv("PERF_LAG_HISTORY", "1200"))  # 10 minutes at 0.5s
+PERF_PROFILE_MAX_SECONDS = int(os.getenv("PERF_PROFILE_MAX_SECONDS", "30"))
+
+# Application queue (submissions are acked immediately and processed by a worker pool)
+APP_QUEUE_SIZE = int(os.getenv("APP_QUEUE_SIZE", "50"))
+APP_QUEUE_WORKERS = int(os.getenv("APP_QUEUE_WORKERS", "4"))
+
+# Gateway: lean mode drops presence/member/message-content intents and fetches members on demand
+LEAN_INTENTS = os.getenv("LEAN_INTENTS", "true").lower() in ("1", "true", "yes", "on")
+MEMBER_CACHE_SIZE = int(os.getenv("MEMBER_CACHE_SIZE", "512"))
+MEMBER_CACHE_TTL = float(os.getenv("MEMBER_CACHE_TTL", "600"))
+
+# Per-guild settings (the IDs above are the defaults for guilds that don't override them)
+GUILD_SETTINGS_CACHE_SIZE = int(os.getenv("GUILD_SETTINGS_CACHE_SIZE", "256"))
+GUILD_SETTINGS_TTL = float(os.getenv("GUILD_SETTINGS_TTL", "600"))
+
+# Sharding (unset lets discord.py pick the shard count Discord recommends)
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+
+# Google Sheets roster sync (disabled unless a spreadsheet key and service-account JSON are set)
+SHEETS_SPREADSHEET_KEY = os.getenv("SHEETS_SPREADSHEET_KEY", "").strip() or None
+SHEETS_WORKSHEET = os.getenv("SHEETS_WORKSHEET", "Roster")
+SHEETS_CREDENTIALS_PATH = os.getenv("SHEETS_CREDENTIALS_PATH", os.path.join(DATA_DIR, "service_account.json"))
+SHEETS_SYNC_INTERVAL = float(os.getenv("SHEETS_SYNC_INTERVAL", "900"))
+SHEETS_MIN_INTERVAL = float(os.getenv("SHEETS_MIN_INTERVAL", "10"))
 
 # Misc
 DEBUG = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes", "on")
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# config refuses to import without a token; tests never talk to Discord
+os.environ.setdefault("DISCORD_TOKEN", "test-token")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
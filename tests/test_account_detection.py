@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+
+import utils.hiscores as hiscores
+from utils.constants import AUTO_DETECT_ORDER
+
+
+def fake_tables(monkeypatch, on_tables, failing=()):
+    async def fetch_index_lite(player, acct):
+        await asyncio.sleep(0.01 if acct in failing else 0)
+        if acct in failing:
+            raise hiscores.HiscoresUnavailable(f"{acct} down")
+        return b"body" if acct in on_tables else b""
+
+    monkeypatch.setattr(hiscores, "fetch_index_lite", fetch_index_lite)
+
+
+def test_detects_most_specific_table(monkeypatch):
+    fake_tables(monkeypatch, {"hardcore_ironman", "ironman", "normal"})
+    assert asyncio.run(hiscores.detect_account_type("Someone")) == "hardcore_ironman"
+
+
+def test_failed_more_specific_table_is_not_skipped(monkeypatch):
+    fake_tables(monkeypatch, {"hardcore_ironman", "ironman", "normal"}, failing={"hardcore_ironman"})
+    with pytest.raises(hiscores.HiscoresUnavailable):
+        asyncio.run(hiscores.detect_account_type("Someone"))
+
+
+def test_failed_less_specific_table_does_not_matter(monkeypatch):
+    fake_tables(monkeypatch, {AUTO_DETECT_ORDER[0]}, failing={"normal"})
+    assert asyncio.run(hiscores.detect_account_type("Someone")) == AUTO_DETECT_ORDER[0]
+
+
+def test_not_found_anywhere(monkeypatch):
+    fake_tables(monkeypatch, set())
+    assert asyncio.run(hiscores.detect_account_type("Someone")) is None
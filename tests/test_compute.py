@@ -0,0 +1,26 @@
+import asyncio
+import os
+import signal
+
+from utils.compute import ComputePool
+
+
+def test_dead_worker_restarts_pool_once_and_resubmits():
+    async def run():
+        pool = ComputePool(workers=2, batch_size=4)
+        pool.start()
+        try:
+            await pool.score_bodies([b""] * 2)  # spawn the workers
+            broken = pool._executor
+            scan = asyncio.ensure_future(pool.score_bodies([b""] * 40))  # 10 batches in flight
+            await asyncio.sleep(0)
+            os.kill(next(iter(broken._processes)), signal.SIGKILL)
+            result = await scan
+            return result, pool.stats(), broken, pool._executor
+        finally:
+            pool.close()
+
+    result, stats, broken, current = asyncio.run(run())
+    assert len(result.totals) == 40
+    assert stats["restarts"] == 1
+    assert current is not broken
@@ -0,0 +1,47 @@
+import asyncio
+import json
+import os
+
+from utils.guild_settings import GuildSettingsStore, default_settings
+
+
+def write_settings(root, guild_id, data):
+    os.makedirs(os.path.join(root, str(guild_id)))
+    with open(os.path.join(root, str(guild_id), "settings.json"), "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def test_bad_hand_edited_ids_fall_back_to_defaults(tmp_path):
+    defaults = default_settings()._replace(staff_role_id=111, member_role_id=222)
+    write_settings(tmp_path, 42, {"staff_role_id": "abc", "member_role_id": "333", "visitor_role_id": [1]})
+    store = GuildSettingsStore(str(tmp_path), defaults, maxsize=8, ttl=60)
+
+    settings = asyncio.run(store.get(42))
+
+    assert settings.staff_role_id == 111
+    assert settings.member_role_id == 333
+    assert settings.visitor_role_id == defaults.visitor_role_id
+
+
+def test_empty_id_clears_default(tmp_path):
+    write_settings(tmp_path, 7, {"staff_role_id": None})
+    store = GuildSettingsStore(str(tmp_path), default_settings()._replace(staff_role_id=111), maxsize=8, ttl=60)
+    assert asyncio.run(store.get(7)).staff_role_id is None
+
+
+def test_env_ids_only_apply_to_home_guild(tmp_path):
+    defaults = default_settings()._replace(staff_channel_id=10, staff_role_id=111)
+    store = GuildSettingsStore(str(tmp_path), defaults, maxsize=8, ttl=60, home_guild_id=1)
+
+    home = asyncio.run(store.get(1))
+    other = asyncio.run(store.get(2))
+
+    assert (home.staff_channel_id, home.staff_role_id) == (10, 111)
+    assert (other.staff_channel_id, other.staff_role_id) == (None, None)
+    assert other.rank_thresholds == defaults.rank_thresholds
+
+
+def test_env_ids_apply_everywhere_without_home_guild(tmp_path):
+    defaults = default_settings()._replace(staff_channel_id=10)
+    store = GuildSettingsStore(str(tmp_path), defaults, maxsize=8, ttl=60)
+    assert asyncio.run(store.get(2)).staff_channel_id == 10
@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+from utils.kc_history import KCHistory, KCHistoryUnavailable
+
+
+def test_queries_fail_fast_when_open_fails(tmp_path):
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")
+    history = KCHistory(str(blocker / "kc_history.bin"))
+
+    async def run():
+        waiting = asyncio.create_task(history.gains(0, 1))
+        await asyncio.sleep(0)
+        with pytest.raises(OSError):
+            await history.start()
+        with pytest.raises(KCHistoryUnavailable):
+            await asyncio.wait_for(waiting, 1)
+        with pytest.raises(KCHistoryUnavailable):
+            await asyncio.wait_for(history.player_gains("Zezima", "normal", 0, 1), 1)
+        history.record("Zezima", "normal", {"Zulrah": 5})
+        await history.close()
+
+    asyncio.run(run())
+    assert history.failed
@@ -0,0 +1,55 @@
+import asyncio
+
+from utils.cache import TTLCache
+from utils.ratelimit import BULK, INTERACTIVE, PriorityTokenBucket, priority
+
+
+def test_interactive_caller_raises_coalesced_bulk_fetch():
+    async def run():
+        limiter = PriorityTokenBucket(rate=50, burst=1)
+        await limiter.acquire(INTERACTIVE)  # drain the bucket so everything below queues
+        cache = TTLCache(maxsize=8, ttl=60)
+        granted = []
+
+        async def take(name):
+            await limiter.acquire()
+            granted.append(name)
+            return name
+
+        with priority(BULK):
+            scan = [asyncio.ensure_future(take(f"bulk-{i}")) for i in range(5)]
+            shared = asyncio.ensure_future(cache.get_or_fetch("player", lambda: take("shared")))
+        await asyncio.sleep(0.001)
+        assert limiter.waiting()["bulk"] == 6
+
+        # An interactive lookup joins the scan's in-flight fetch for the same player
+        assert await cache.get_or_fetch("player", lambda: take("duplicate")) == "shared"
+        await asyncio.gather(shared, *scan)
+        return granted, limiter.granted
+
+    granted, counts = asyncio.run(run())
+    assert granted[0] == "shared"
+    assert "duplicate" not in granted
+    assert counts[INTERACTIVE] == 2 and counts[BULK] == 5
+
+
+def test_priority_never_lowered_by_a_later_bulk_joiner():
+    async def run():
+        cache = TTLCache(maxsize=8, ttl=60)
+        seen = []
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            from utils.ratelimit import current_priority
+
+            seen.append(current_priority())
+            return 1
+
+        first = asyncio.ensure_future(cache.get_or_fetch("k", fetch))
+        await asyncio.sleep(0)
+        with priority(BULK):
+            await cache.get_or_fetch("k", fetch)
+        await first
+        return seen
+
+    assert asyncio.run(run()) == [INTERACTIVE]
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+import pytest
+
+import utils.hiscores as hiscores
+from utils.ratelimit import PriorityTokenBucket
+from utils.resilience import CircuitBreaker
+
+
+def half_open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    return breaker
+
+
+def test_release_trial_reopens_half_open_slot():
+    breaker = half_open_breaker()
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial at a time
+    breaker.release_trial()
+    assert breaker.allow()
+
+
+def test_cancelled_half_open_trial_does_not_wedge_breaker(monkeypatch):
+    breaker = half_open_breaker()
+    monkeypatch.setattr(hiscores, "_breaker", breaker)
+    monkeypatch.setattr(hiscores, "_limiter", PriorityTokenBucket(0, 1))
+    monkeypatch.setattr(hiscores, "HISCORES_HEDGE", False)
+
+    async def slow_get(session, url, timeout):
+        await asyncio.sleep(10)
+        return b""
+
+    monkeypatch.setattr(hiscores, "_get", slow_get)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(hiscores._get_resilient(None, "http://hiscores.invalid"), 0.05)
+
+    asyncio.run(run())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_cancelled_token_wait_releases_trial(monkeypatch):
+    breaker = half_open_breaker()
+    monkeypatch.setattr(hiscores, "_breaker", breaker)
+
+    async def run():
+        # An empty bucket refilling once a minute: the trial is cancelled while queued for a token
+        limiter = PriorityTokenBucket(1 / 60, 1)
+        await limiter.acquire()
+        monkeypatch.setattr(hiscores, "_limiter", limiter)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(hiscores._get_resilient(None, "http://hiscores.invalid"), 0.05)
+
+    asyncio.run(run())
+    assert breaker.allow()
+
+
+def test_total_budget_caps_retries_and_clamps_attempts(monkeypatch):
+    monkeypatch.setattr(hiscores, "_breaker", CircuitBreaker(failure_threshold=100))
+    monkeypatch.setattr(hiscores, "_limiter", PriorityTokenBucket(0, 1))
+    monkeypatch.setattr(hiscores, "HISCORES_HEDGE", False)
+    monkeypatch.setattr(hiscores, "HISCORES_RETRIES", 5)
+    monkeypatch.setattr(hiscores, "HISCORES_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(hiscores, "HISCORES_TOTAL_BUDGET", 0.5)
+    timeouts = []
+
+    async def timing_out_get(session, url, timeout):
+        timeouts.append(timeout)
+        await asyncio.sleep(min(timeout, 0.2))
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(hiscores, "_get", timing_out_get)
+
+    async def run():
+        with pytest.raises(hiscores.HiscoresUnavailable):
+            await hiscores._get_resilient(None, "http://hiscores.invalid")
+
+    started = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - started < 0.6
+    assert all(t <= 0.5 for t in timeouts)
+    assert len(timeouts) < 6
+
+
+def test_hedge_token_wait_is_bounded_by_budget(monkeypatch):
+    monkeypatch.setattr(hiscores, "_breaker", CircuitBreaker(failure_threshold=100))
+    monkeypatch.setattr(hiscores, "HISCORES_HEDGE", True)
+    monkeypatch.setattr(hiscores, "_hedge_delay", lambda: 0.05)
+    monkeypatch.setattr(hiscores, "HISCORES_RETRIES", 0)
+    monkeypatch.setattr(hiscores, "HISCORES_TOTAL_BUDGET", 0.3)
+
+    async def timing_out_get(session, url, timeout):
+        await asyncio.sleep(timeout)
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(hiscores, "_get", timing_out_get)
+
+    async def run():
+        # One token, refilling once a minute: the hedge copy can only get one by waiting past the budget
+        monkeypatch.setattr(hiscores, "_limiter", PriorityTokenBucket(1 / 60, 1))
+        with pytest.raises(hiscores.HiscoresUnavailable):
+            await asyncio.wait_for(hiscores._get_resilient(None, "http://hiscores.invalid"), 5)
+
+    started = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - started < 1
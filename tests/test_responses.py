@@ -0,0 +1,49 @@
+import random
+
+import discord
+
+from utils.responses import EMBED_DESCRIPTION_LIMIT, EMBED_TOTAL_LIMIT, EMBEDS_PER_MESSAGE, pack_lines
+
+
+def _lead(rng, reserve):
+    # Callers only pass leads that fit in a message alongside the reserve
+    count = rng.choice([0, 0, 1, 2, 3, 10])
+    budget = rng.randint(0, EMBED_TOTAL_LIMIT - reserve)
+    return [discord.Embed(title="Lead", description="x" * min(EMBED_DESCRIPTION_LIMIT, max(1, budget // max(count, 1) - 4))) for _ in range(count)]
+
+
+def assert_within_limits(pages, lead, reserve):
+    assert pages[0][: len(lead)] == list(lead)
+    for i, page in enumerate(pages):
+        assert 0 < len(page) <= EMBEDS_PER_MESSAGE
+        assert sum(len(e) for e in page) + (reserve if i == 0 else 0) <= EMBED_TOTAL_LIMIT
+        assert all(len(e.description or "") <= EMBED_DESCRIPTION_LIMIT for e in page)
+
+
+def test_lead_only_first_message_keeps_its_size():
+    # The case that used to produce a 6559-char first page
+    lead = [discord.Embed(title="Application", description="x" * 3000)]
+    lines = ["y" * 3000] * 2  # neither fits beside the lead
+    pages = pack_lines(lines, "Points Breakdown", discord.Color.green(), lead=lead, reserve=256)
+    assert_within_limits(pages, lead, 256)
+    assert sum(e.description.count("y") for page in pages for e in page) == 6000
+
+
+def test_random_pages_stay_within_discord_limits():
+    rng = random.Random(18)
+    for _ in range(300):
+        reserve = rng.choice([0, 256, 1000])
+        lead = _lead(rng, reserve)
+        lines = ["z" * rng.randint(1, rng.choice([80, 900, 5000])) for _ in range(rng.randint(0, 120))]
+        fields = [("Total", "1" * rng.randint(1, 200), True)] if rng.random() < 0.5 else []
+        pages = pack_lines(
+            lines,
+            "Title" * rng.randint(1, 20),
+            discord.Color.teal(),
+            lead=lead,
+            fields=fields,
+            footer="f" * rng.randint(0, 100) or None,
+            code_block=rng.random() < 0.3,
+            reserve=reserve,
+        )
+        assert_within_limits(pages, lead, reserve)
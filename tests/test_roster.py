@@ -0,0 +1,19 @@
+import asyncio
+
+import utils.roster as roster
+from utils.hiscores import HiscoresUnavailable
+
+
+def test_outage_is_flagged_separately_from_not_found(monkeypatch):
+    async def resolve(name, account_type):
+        if name == "Down":
+            raise HiscoresUnavailable("503")
+        return None if name == "Nobody" else account_type
+
+    monkeypatch.setattr(roster, "resolve_account_type", resolve)
+
+    down = asyncio.run(roster._lookup_account("Down", "auto"))
+    missing = asyncio.run(roster._lookup_account("Nobody", "auto"))
+
+    assert down.unavailable and down.kc_map is None
+    assert not missing.unavailable and missing.kc_map is None
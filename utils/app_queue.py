@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger("clan_bot.app_queue")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class ApplicationJob(NamedTuple):
+    user_id: int
+    user_tag: str
+    guild_id: Optional[int]
+    rsn: str
+    account_type: str
+    application_type: str
+    firecape: str
+    infernal_cape: str
+    alts: str
+
+
+# handler(job_id, job, live interaction or None after a restart)
+JobHandler = Callable[[int, ApplicationJob, Optional[Any]], Awaitable[None]]
+
+
+class ApplicationQueue:
+    """Persistent, bounded work queue for application submissions.
+
+    Jobs are written to SQLite before they are queued and deleted only once a
+    worker has handled them, so anything pending at shutdown (or a crash) is
+    replayed on the next start. The in-memory queue is bounded; ``submit`` waits
+    for room when it is full, which is the caller's cue to tell the applicant
+    their queue position.
+    """
+
+    def __init__(self, path: str, maxsize: int = 50, workers: int = 4):
+        self.path = path
+        self.maxsize = maxsize
+        self.workers = workers
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue(maxsize=maxsize)
+        self._jobs: Dict[int, ApplicationJob] = {}  # persisted and not yet finished, in submit order
+        self._live: Dict[int, Any] = {}
+        self._handler: Optional[JobHandler] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="app_queue")
+        self._conn: Optional[sqlite3.Connection] = None
+        self.processed = 0
+        self.failed = 0
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    @property
+    def full(self) -> bool:
+        return self._queue.full()
+
+    def position(self, job_id: int) -> int:
+        # 1-based place among unfinished jobs (including ones being worked on)
+        for i, pending_id in enumerate(self._jobs, start=1):
+            if pending_id == job_id:
+                return i
+        return 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._jobs),
+            "queued": self._queue.qsize(),
+            "maxsize": self.maxsize,
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+    async def start(self, handler: JobHandler) -> None:
+        self._handler = handler
+        await self._run(self._open)
+        for job_id, job in await self._run(self._read_pending):
+            self._jobs[job_id] = job
+        for n in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(n)))
+        if self._jobs:
+            logger.info(f"Resuming {len(self._jobs)} queued applications")
+            self._tasks.append(asyncio.create_task(self._requeue(list(self._jobs))))
+
+    async def close(self) -> None:
+        # Unfinished jobs stay in the DB and are replayed on the next start
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        await self._run(self._close_conn)
+        self._executor.shutdown(wait=True)
+
+    async def add(self, job: ApplicationJob, interaction: Optional[Any] = None) -> int:
+        """Persist ``job`` and return its id; call ``enqueue`` to hand it to the workers."""
+        job_id = await self._run(self._insert, job)
+        self._jobs[job_id] = job
+        if interaction is not None:
+            self._live[job_id] = interaction
+        return job_id
+
+    async def enqueue(self, job_id: int) -> None:
+        await self._queue.put(job_id)
+
+    async def submit(self, job: ApplicationJob, interaction: Optional[Any] = None) -> int:
+        job_id = await self.add(job, interaction)
+        await self.enqueue(job_id)
+        return job_id
+
+    async def join(self) -> None:
+        # Wait until every job handed to ``enqueue`` has been processed
+        await self._queue.join()
+
+    async def _requeue(self, job_ids: List[int]) -> None:
+        for job_id in job_ids:
+            await self._queue.put(job_id)
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                try:
+                    if job is not None:
+                        await self._handler(job_id, job, self._live.get(job_id))  # type: ignore[misc]
+                        self.processed += 1
+                except Exception as e:
+                    # Handlers report their own failures to the applicant; don't replay a poison job forever
+                    self.failed += 1
+                    logger.exception(f"Application job {job_id} failed: {e!r}")
+                # Cancelled mid-job (shutdown) skips this, so the job is replayed on the next start
+                await self._finish(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _finish(self, job_id: int) -> None:
+        self._live.pop(job_id, None)
+        self._jobs.pop(job_id, None)
+        try:
+            await self._run(self._delete, job_id)
+        except Exception as e:
+            logger.exception(f"Failed to remove finished application job {job_id}: {e}")
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # --- DB thread only below ---
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def _close_conn(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _insert(self, job: ApplicationJob) -> int:
+        with self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (payload, created_at) VALUES (?, ?)",
+                (json.dumps(job._asdict()), time.time()),
+            )
+        return cur.lastrowid
+
+    def _delete(self, job_id: int) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def _read_pending(self) -> List[Tuple[int, ApplicationJob]]:
+        rows = self._conn.execute("SELECT id, payload FROM jobs ORDER BY id").fetchall()
+        return [(job_id, ApplicationJob(**json.loads(payload))) for job_id, payload in rows]
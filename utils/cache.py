@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from utils.ratelimit import SharedPriority, current_priority, shared_priority
+
+logger = logging.getLogger("clan_bot.cache")
+
+
+class TTLCache:
+    """Bounded LRU cache with a TTL, single-flight fetches and stale-while-revalidate.
+
+    Fresh entries are returned directly. Expired entries younger than ``stale_ttl``
+    are returned immediately while one background refresh runs. Concurrent misses
+    for the same key share a single in-flight fetch, which is cancelled if every
+    caller waiting on it is cancelled. A fetch runs at its most urgent waiter's
+    request priority (utils.ratelimit), not just the priority of whoever started it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._priorities: Dict[Hashable, SharedPriority] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale": self.stale,
+            "inflight": len(self._inflight),
+        }
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        # Any stored value regardless of age; does not touch counters or LRU order
+        entry = self._data.get(key)
+        return entry[1] if entry else None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            stored_at, value = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            if age < self.stale_ttl:
+                self._data.move_to_end(key)
+                self.stale += 1
+                if key not in self._inflight:
+                    self._start(key, fetch)
+                return value
+            # Too old to serve directly, but kept (until LRU eviction) for peek() fallbacks
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            self._priorities[key].raise_to(current_priority())
+        else:
+            self.misses += 1
+            task = self._start(key, fetch)
+        # Shield so one cancelled caller doesn't cancel the fetch for everyone else;
+        # the fetch itself is only cancelled once its last waiter has gone away
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key) == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            remaining = self._waiters.get(key, 1) - 1
+            if remaining:
+                self._waiters[key] = remaining
+            else:
+                self._waiters.pop(key, None)
+
+    def _start(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> "asyncio.Task[Any]":
+        with shared_priority() as shared:
+            task = asyncio.ensure_future(self._run(key, fetch))  # copies the context, shared priority included
+        self._inflight[key] = task
+        self._priorities[key] = shared
+        # A done callback rather than a finally in _run: a task cancelled before its first step never runs _run
+        task.add_done_callback(lambda t: self._forget(key, t))
+        task.add_done_callback(self._consume_error)
+        return task
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._priorities[key]
+
+    async def _run(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        value = await fetch()
+        self.set(key, value)
+        return value
+
+    @staticmethod
+    def _consume_error(task: "asyncio.Task[Any]") -> None:
+        # Background refreshes have no awaiter; retrieve the error so it isn't reported as unhandled
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Cache fetch failed: {task.exception()!r}")
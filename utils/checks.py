@@ -0,0 +1,13 @@
+import discord
+
+from utils.guild_settings import get_guild_settings
+
+
+async def is_staff(interaction: discord.Interaction) -> bool:
+    member = interaction.user
+    if not isinstance(member, discord.Member):
+        return False
+    if member.guild_permissions.manage_guild:
+        return True
+    staff_role_id = (await get_guild_settings(interaction.guild_id)).staff_role_id
+    return bool(staff_role_id) and any(r.id == staff_role_id for r in member.roles)
@@ -0,0 +1,86 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+import discord
+from discord import app_commands
+
+from config import COMMAND_SYNC_STATE_PATH
+
+logger = logging.getLogger("clan_bot.command_sync")
+
+_lock = asyncio.Lock()
+
+
+class SyncResult(NamedTuple):
+    synced: bool
+    commands: int
+    seconds: float
+    fingerprint: str
+
+
+def tree_fingerprint(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    # Hash of exactly the payload tree.sync() would upload (names, options, descriptions, permissions)
+    payload = sorted(
+        (cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)),
+        key=lambda d: (d.get("type", 1), d["name"]),
+    )
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _scope_key(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake]) -> str:
+    # Keyed by application too, so pointing the bot at another app always syncs
+    app_id = tree.client.application_id or 0
+    return f"{app_id}:{guild.id if guild else 'global'}"
+
+
+def _load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(path: str, state: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+async def sync_if_changed(
+    tree: app_commands.CommandTree,
+    guild: Optional[discord.abc.Snowflake] = None,
+    force: bool = False,
+    path: str = COMMAND_SYNC_STATE_PATH,
+) -> SyncResult:
+    """Sync ``tree`` for ``guild`` (or globally) only if its fingerprint changed since the last sync.
+
+    The fingerprint is stored on disk only after a successful sync, so a failed
+    sync is retried next time.
+    """
+    started = time.perf_counter()
+    fingerprint = tree_fingerprint(tree, guild)
+    key = _scope_key(tree, guild)
+    scope = f"guild {guild.id}" if guild else "global"
+    async with _lock:
+        state = _load_state(path)
+        if not force and state.get(key, {}).get("fingerprint") == fingerprint:
+            elapsed = time.perf_counter() - started
+            logger.info(f"Slash commands unchanged ({scope}, {fingerprint[:12]}); sync skipped in {elapsed * 1e3:.1f} ms")
+            return SyncResult(False, len(tree.get_commands(guild=guild)), elapsed, fingerprint)
+
+        synced = await tree.sync(guild=guild)
+        elapsed = time.perf_counter() - started
+        state[key] = {"fingerprint": fingerprint, "synced_at": time.time(), "commands": len(synced)}
+        _save_state(path, state)
+    logger.info(f"Slash commands synced ({scope}, {len(synced)} commands, {fingerprint[:12]}) in {elapsed:.2f}s")
+    return SyncResult(True, len(synced), elapsed, fingerprint)
@@ -0,0 +1,205 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import COMPUTE_WORKERS, COMPUTE_BATCH_SIZE
+from utils.constants import API_BOSS_ORDER
+from utils.hiscores import parse_boss_tail
+from utils.points_engine import CompiledWeights, compile_table, rank_indices, score_totals
+from utils.points_table import PointsTable, get_points_table
+from utils.ranks import RANK_THRESHOLDS
+
+logger = logging.getLogger("clan_bot.compute")
+
+Thresholds = Sequence[Tuple[float, str]]
+
+
+class TableSpec(NamedTuple):
+    # Everything a worker needs to score against one points table; shipped once per worker
+    key: str
+    weights: np.ndarray
+    in_table: np.ndarray
+    thresholds: Tuple[Tuple[float, str], ...]
+
+
+class ScoredBatch(NamedTuple):
+    totals: np.ndarray  # float64 (players,)
+    ranks: np.ndarray  # int16 index into the thresholds (highest-first)
+    kcs: np.ndarray  # int32 (players, bosses), aligned with API_BOSS_ORDER
+
+
+def table_spec(table: PointsTable, thresholds: Thresholds = RANK_THRESHOLDS) -> TableSpec:
+    compiled = compile_table(table)
+    thresholds = tuple((float(t), n) for t, n in thresholds)
+    digest = hashlib.sha1(compiled.weights.tobytes() + compiled.in_table.tobytes() + repr(thresholds).encode())
+    return TableSpec(digest.hexdigest(), compiled.weights, compiled.in_table, thresholds)
+
+
+def empty_batch() -> ScoredBatch:
+    return ScoredBatch(
+        np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int16), np.zeros((0, len(API_BOSS_ORDER)), dtype=np.int32)
+    )
+
+
+# --- worker process side ---
+
+_MAX_TABLES = 16
+_tables: "OrderedDict[str, TableSpec]" = OrderedDict()
+
+
+def _install(spec: TableSpec) -> None:
+    _tables[spec.key] = spec
+    _tables.move_to_end(spec.key)
+    while len(_tables) > _MAX_TABLES:
+        _tables.popitem(last=False)
+
+
+def _init_worker(spec: TableSpec) -> None:
+    _install(spec)
+
+
+def _score_batch(key: str, bodies: List[bytes], spec: Optional[TableSpec] = None) -> Optional[ScoredBatch]:
+    """Parse index_lite bodies and score them; None asks the caller to resend with the table."""
+    if spec is not None:
+        _install(spec)
+    table = _tables.get(key)
+    if table is None:
+        return None
+    matrix = np.zeros((len(bodies), len(API_BOSS_ORDER)), dtype=np.int32)
+    for row, body in zip(matrix, bodies):
+        row[:] = np.frombuffer(parse_boss_tail(body), dtype=np.intc)
+    _, _, totals = score_totals(matrix, CompiledWeights(table.weights, table.in_table))
+    return ScoredBatch(totals, rank_indices(totals, table.thresholds), matrix)
+
+
+# --- event loop side ---
+
+
+class ComputePool:
+    """Process pool that parses and scores batches of raw hiscores bodies off the event loop.
+
+    The default points table goes to each worker once, through the pool
+    initializer. Tasks carry only the table's key; a worker that hasn't seen a
+    table yet (hot reload, a guild's own table) answers None and gets the table
+    resent with that one batch. With ``workers <= 0`` batches are scored inline,
+    yielding to the loop between batches.
+    """
+
+    def __init__(self, workers: int, batch_size: int):
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.batches = 0
+        self.resent = 0
+        self.restarts = 0
+
+    def start(self) -> None:
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            # spawn, not fork: the parent runs an event loop and several helper threads
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(table_spec(get_points_table()),),
+        )
+        logger.info(f"Compute pool started ({self.workers} workers, batches of {self.batch_size})")
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run_batch(self, spec: TableSpec, bodies: List[bytes]) -> ScoredBatch:
+        self.batches += 1
+        executor = self._executor
+        if executor is None:
+            await asyncio.sleep(0)
+            return _score_batch(spec.key, bodies, spec)  # type: ignore[return-value]
+        try:
+            return await self._submit(executor, spec, bodies)
+        except BrokenProcessPool:
+            # A worker died, failing every batch in flight: restart once and resubmit to the new pool.
+            # If that breaks too, this batch is likely what kills workers, so the error propagates.
+            self._restart(executor)
+        executor = self._executor
+        if executor is None:  # closed meanwhile
+            return _score_batch(spec.key, bodies, spec)  # type: ignore[return-value]
+        return await self._submit(executor, spec, bodies)
+
+    async def _submit(self, executor: ProcessPoolExecutor, spec: TableSpec, bodies: List[bytes]) -> ScoredBatch:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(executor, _score_batch, spec.key, bodies)
+        if result is None:
+            self.resent += 1
+            result = await loop.run_in_executor(executor, _score_batch, spec.key, bodies, spec)
+        return result
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        # Every in-flight batch sees the same broken pool; only the first one to get here replaces it
+        if self._executor is not broken:
+            return
+        logger.error("Compute pool broken (a worker died); restarting it")
+        broken.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.restarts += 1
+        self.start()
+
+    async def score_bodies(
+        self,
+        bodies: Sequence[bytes],
+        table: Optional[PointsTable] = None,
+        thresholds: Thresholds = RANK_THRESHOLDS,
+    ) -> ScoredBatch:
+        if not bodies:
+            return empty_batch()
+        spec = table_spec(table or get_points_table(), thresholds)
+        batches = [list(bodies[i : i + self.batch_size]) for i in range(0, len(bodies), self.batch_size)]
+        if self._executor is None:
+            results = [await self._run_batch(spec, batch) for batch in batches]
+        else:
+            results = await asyncio.gather(*(self._run_batch(spec, batch) for batch in batches))
+        return ScoredBatch(
+            np.concatenate([r.totals for r in results]),
+            np.concatenate([r.ranks for r in results]),
+            np.concatenate([r.kcs for r in results]),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers if self._executor is not None else 0,
+            "batches": self.batches,
+            "resent": self.resent,
+            "restarts": self.restarts,
+        }
+
+
+# Shared pool owned by the bot (see bot.ClanBot.setup_hook / close); inline until started
+_pool = ComputePool(COMPUTE_WORKERS, COMPUTE_BATCH_SIZE)
+
+
+def start_compute_pool() -> None:
+    _pool.start()
+
+
+def close_compute_pool() -> None:
+    _pool.close()
+
+
+def compute_stats() -> Dict[str, int]:
+    return _pool.stats()
+
+
+async def score_bodies(
+    bodies: Sequence[bytes],
+    table: Optional[PointsTable] = None,
+    thresholds: Thresholds = RANK_THRESHOLDS,
+) -> ScoredBatch:
+    return await _pool.score_bodies(bodies, table, thresholds)
@@ -1,7 +1,4 @@
-from typing import Dict, List, Tuple, Optional
-import json
-from functools import lru_cache
-from config import BOSS_POINTS_PATH
+from typing import List, Tuple, Optional
 
 # Hiscore module mapping
 HISCORE_MODULE = {
@@ -21,6 +18,20 @@ ACCOUNT_TYPE_OPTIONS: List[Tuple[str, str, str]] = [
     ("ultimate", "Ultimate Ironman", "UIM hiscores"),
     ("group_ironman", "Group Ironman", "GIM hiscores"),
     ("unranked_group_ironman", "Unranked Group Ironman", "UGIM hiscores"),
+    ("auto", "Not sure (auto-detect)", "Check every hiscores table"),
+]
+
+# Pseudo account type: detect the table from hiscores (see utils.hiscores.detect_account_type)
+AUTO_ACCOUNT_TYPE = "auto"
+
+# Most specific table first; auto-detection picks the first one the player appears on
+AUTO_DETECT_ORDER: List[str] = [
+    "ultimate",
+    "hardcore_ironman",
+    "unranked_group_ironman",
+    "group_ironman",
+    "ironman",
+    "normal",
 ]
 
 # Input aliases → canonical key
@@ -44,6 +55,9 @@ ACCOUNT_TYPE_ALIASES = {
     "unranked group": "unranked_group_ironman",
     "ugim": "unranked_group_ironman",
     "ugi": "unranked_group_ironman",
+    "auto": "auto",
+    "detect": "auto",
+    "unsure": "auto",
 }
 
 def normalize_account_type(s: Optional[str]) -> Optional[str]:
@@ -66,8 +80,3 @@ API_BOSS_ORDER: List[str] = [
     "Tombs of Amascut","Tombs of Amascut (Expert Mode)","TzKal-Zuk","TzTok-Jad","Vardorvis",
     "Venenatis","Vet'ion","Vorkath","Wintertodt","Yama","Zalcano","Zulrah"
 ]
-
-@lru_cache(maxsize=1)
-def get_boss_points() -> Dict[str, float]:
-    with open(BOSS_POINTS_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from config import (
+    GUILD_ID,
+    GUILD_SETTINGS_DIR,
+    GUILD_SETTINGS_CACHE_SIZE,
+    GUILD_SETTINGS_TTL,
+    STAFF_CHANNEL_ID,
+    MEMBER_ROLE_ID,
+    VISITOR_ROLE_ID,
+    STAFF_ROLE_ID,
+)
+from utils.cache import TTLCache
+from utils.points_table import PointsTable, PointsTableError, PointsTableWatcher, get_points_table, validate_points
+from utils.ranks import RANK_THRESHOLDS, get_rank_name
+
+logger = logging.getLogger("clan_bot.guild_settings")
+
+SETTINGS_FILE = "settings.json"
+POINTS_FILE = "boss_points.json"
+ID_FIELDS = ("staff_channel_id", "member_role_id", "visitor_role_id", "staff_role_id")
+
+Thresholds = Tuple[Tuple[int, str], ...]
+
+
+class GuildSettingsError(ValueError):
+    pass
+
+
+class GuildSettings(NamedTuple):
+    guild_id: Optional[int]
+    staff_channel_id: Optional[int]
+    member_role_id: Optional[int]
+    visitor_role_id: Optional[int]
+    staff_role_id: Optional[int]
+    rank_thresholds: Thresholds  # highest-first, lowest is 0
+    points: Optional[PointsTableWatcher] = None  # None: the shared data/boss_points.json
+
+    @property
+    def points_table(self) -> PointsTable:
+        return self.points.current() if self.points is not None else get_points_table()
+
+    @property
+    def boss_points(self):
+        return self.points_table.points
+
+    def rank_name(self, points: float) -> str:
+        return get_rank_name(points, self.rank_thresholds)
+
+
+def default_settings() -> GuildSettings:
+    # The .env values: the home guild's (GUILD_ID) defaults, or every guild's when GUILD_ID is unset
+    return GuildSettings(None, STAFF_CHANNEL_ID, MEMBER_ROLE_ID, VISITOR_ROLE_ID, STAFF_ROLE_ID, tuple(RANK_THRESHOLDS))
+
+
+def validate_thresholds(raw: Any) -> Thresholds:
+    if not isinstance(raw, (list, tuple)) or not raw:
+        raise GuildSettingsError("rank_thresholds must be a non-empty list of [points, name] pairs")
+    pairs = []
+    for item in raw:
+        if not isinstance(item, (list, tuple)) or len(item) != 2:
+            raise GuildSettingsError(f"Invalid rank threshold {item!r}; expected [points, name]")
+        points, name = item
+        if isinstance(points, bool) or not isinstance(points, int) or points < 0:
+            raise GuildSettingsError(f"Invalid points for rank {name!r}: {points!r}")
+        if not isinstance(name, str) or not name.strip():
+            raise GuildSettingsError(f"Invalid rank name: {name!r}")
+        pairs.append((points, name.strip()))
+    pairs.sort(key=lambda p: p[0], reverse=True)
+    if pairs[-1][0] != 0:
+        raise GuildSettingsError("The lowest rank threshold must be 0")
+    names = [n.lower() for _, n in pairs]
+    if len(set(names)) != len(names) or len({p for p, _ in pairs}) != len(pairs):
+        raise GuildSettingsError("Rank names and thresholds must be unique")
+    return tuple(pairs)
+
+
+def _parse_id(value: Any) -> Optional[int]:
+    # Snowflake from settings.json: an int or digit string; empty/0/null clears it
+    if not value:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise GuildSettingsError(f"expected a Discord ID, got {value!r}")
+    try:
+        parsed = int(value)
+    except ValueError:
+        raise GuildSettingsError(f"expected a Discord ID, got {value!r}") from None
+    if parsed <= 0:
+        raise GuildSettingsError(f"expected a Discord ID, got {value!r}")
+    return parsed
+
+
+def parse_thresholds(text: str) -> Thresholds:
+    # "0:Bronze, 1000:Iron, 2500:Steel" (any order)
+    pairs = []
+    for part in text.replace(";", ",").split(","):
+        if not part.strip():
+            continue
+        points, sep, name = part.partition(":")
+        if not sep:
+            raise GuildSettingsError(f"Expected points:name, got {part.strip()!r}")
+        try:
+            pairs.append((int(points.strip().replace("_", "")), name))
+        except ValueError:
+            raise GuildSettingsError(f"Invalid points in {part.strip()!r}") from None
+    return validate_thresholds(pairs)
+
+
+class GuildSettingsStore:
+    """Per-guild settings, loaded on first use and kept in a bounded in-memory cache.
+
+    Each guild may have ``<root>/<guild_id>/settings.json`` (channel and role IDs,
+    rank thresholds) and ``<root>/<guild_id>/boss_points.json`` (its own points
+    table, hot-reloaded like the shared one). Anything the home guild doesn't set
+    falls back to the .env defaults, so a single-clan deployment needs no files.
+    With ``home_guild_id`` set, every other guild starts with no channel or role
+    IDs: the .env ones belong to the home clan, and inheriting them would post a
+    sister clan's applications to the home clan's staff channel.
+    Entries expire after ``ttl`` so hand edits are picked up without a restart.
+    """
+
+    def __init__(self, root: str, defaults: GuildSettings, maxsize: int, ttl: float, home_guild_id: Optional[int] = None):
+        self.root = root
+        self.defaults = defaults
+        self.home_guild_id = home_guild_id
+        self._cache = TTLCache(maxsize, ttl)
+
+    def base_settings(self, guild_id: int) -> GuildSettings:
+        # What a guild gets before its own settings.json is applied
+        base = self.defaults._replace(guild_id=guild_id)
+        if self.home_guild_id is not None and guild_id != self.home_guild_id:
+            base = base._replace(**{field: None for field in ID_FIELDS})
+        return base
+
+    def guild_dir(self, guild_id: int) -> str:
+        return os.path.join(self.root, str(guild_id))
+
+    def stats(self) -> Dict[str, int]:
+        return self._cache.stats()
+
+    async def get(self, guild_id: Optional[int]) -> GuildSettings:
+        if not guild_id:
+            return self.defaults
+        return await self._cache.get_or_fetch(guild_id, lambda: asyncio.to_thread(self._load, guild_id))
+
+    async def update(self, guild_id: int, **changes: Any) -> GuildSettings:
+        """Persist changed IDs / rank thresholds for ``guild_id``; a value of None clears it."""
+        unknown = set(changes) - set(ID_FIELDS) - {"rank_thresholds"}
+        if unknown:
+            raise GuildSettingsError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        if changes.get("rank_thresholds") is not None:
+            changes["rank_thresholds"] = validate_thresholds(changes["rank_thresholds"])
+        settings = await asyncio.to_thread(self._write_settings, guild_id, changes)
+        self._cache.set(guild_id, settings)
+        return settings
+
+    async def set_points(self, guild_id: int, raw: Any) -> GuildSettings:
+        """Validate and store a guild-specific boss points table; None reverts to the shared one."""
+        if raw is not None:
+            validate_points(raw)
+        settings = await asyncio.to_thread(self._write_points, guild_id, raw)
+        self._cache.set(guild_id, settings)
+        return settings
+
+    # --- worker threads only below ---
+
+    def _read_settings(self, guild_id: int) -> Dict[str, Any]:
+        path = os.path.join(self.guild_dir(guild_id), SETTINGS_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        if not isinstance(data, dict):
+            raise GuildSettingsError(f"{path} must be a JSON object")
+        return data
+
+    def _load(self, guild_id: int) -> GuildSettings:
+        try:
+            data = self._read_settings(guild_id)
+        except (OSError, ValueError) as e:
+            logger.error(f"Bad settings for guild {guild_id}, using defaults: {e}")
+            data = {}
+        return self._build(guild_id, data)
+
+    def _build(self, guild_id: int, data: Dict[str, Any]) -> GuildSettings:
+        settings = self.base_settings(guild_id)
+        for field in ID_FIELDS:
+            if field in data:
+                try:
+                    settings = settings._replace(**{field: _parse_id(data[field])})
+                except GuildSettingsError as e:
+                    logger.error(f"Bad {field} for guild {guild_id}, using the default: {e}")
+        if data.get("rank_thresholds"):
+            try:
+                settings = settings._replace(rank_thresholds=validate_thresholds(data["rank_thresholds"]))
+            except GuildSettingsError as e:
+                logger.error(f"Bad rank thresholds for guild {guild_id}, using defaults: {e}")
+
+        points_path = os.path.join(self.guild_dir(guild_id), POINTS_FILE)
+        if os.path.exists(points_path):
+            watcher = PointsTableWatcher(points_path)
+            try:
+                watcher.reload()
+                settings = settings._replace(points=watcher)
+            except (OSError, PointsTableError) as e:
+                logger.error(f"Bad points table for guild {guild_id}, using the shared table: {e}")
+        return settings
+
+    def _write_json(self, path: str, data: Any) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+    def _write_settings(self, guild_id: int, changes: Dict[str, Any]) -> GuildSettings:
+        data = self._read_settings(guild_id)
+        for key, value in changes.items():
+            if value is None:
+                data.pop(key, None)
+            else:
+                data[key] = [list(p) for p in value] if key == "rank_thresholds" else int(value)
+        self._write_json(os.path.join(self.guild_dir(guild_id), SETTINGS_FILE), data)
+        return self._build(guild_id, data)
+
+    def _write_points(self, guild_id: int, raw: Any) -> GuildSettings:
+        path = os.path.join(self.guild_dir(guild_id), POINTS_FILE)
+        if raw is None:
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            self._write_json(path, raw)
+        return self._build(guild_id, self._read_settings(guild_id))
+
+
+# The .env channel/role IDs are GUILD_ID's; with GUILD_ID unset they apply to every guild (single-clan setups)
+_store = GuildSettingsStore(
+    GUILD_SETTINGS_DIR, default_settings(), GUILD_SETTINGS_CACHE_SIZE, GUILD_SETTINGS_TTL, home_guild_id=GUILD_ID
+)
+
+
+async def get_guild_settings(guild_id: Optional[int]) -> GuildSettings:
+    return await _store.get(guild_id)
+
+
+async def update_guild_settings(guild_id: int, **changes: Any) -> GuildSettings:
+    return await _store.update(guild_id, **changes)
+
+
+async def set_guild_points(guild_id: int, raw: Any) -> GuildSettings:
+    return await _store.set_points(guild_id, raw)
+
+
+def guild_settings_stats() -> Dict[str, int]:
+    return _store.stats()
+
+
+def describe_thresholds(thresholds: Sequence[Tuple[int, str]]) -> str:
+    return ", ".join(f"{name} {points:,}+" for points, name in thresholds)
@@ -1,27 +1,264 @@
+import asyncio
 import csv
 import io
-from typing import Dict, List, Tuple
+import logging
+import time
+from array import array
+from typing import Callable, Dict, List, Tuple, Optional
 import aiohttp
 
-from utils.constants import HISCORE_MODULE, API_BOSS_ORDER
+from config import (
+    HTTP_POOL_LIMIT,
+    HTTP_POOL_LIMIT_PER_HOST,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_TIMEOUT,
+    HISCORES_BASE_URL,
+    HISCORES_ATTEMPT_TIMEOUT,
+    HISCORES_TOTAL_BUDGET,
+    HISCORES_RETRIES,
+    HISCORES_BACKOFF_BASE,
+    HISCORES_BACKOFF_MAX,
+    HISCORES_HEDGE,
+    HISCORES_HEDGE_QUANTILE,
+    HISCORES_HEDGE_MIN_DELAY,
+    HISCORES_HEDGE_DEFAULT_DELAY,
+    HISCORES_BREAKER_FAILURES,
+    HISCORES_BREAKER_RESET,
+    HISCORES_RATE,
+    HISCORES_BURST,
+    HISCORES_CACHE_SIZE,
+    HISCORES_CACHE_TTL,
+    HISCORES_CACHE_STALE_TTL,
+)
+from utils.cache import TTLCache
+from utils.constants import HISCORE_MODULE, API_BOSS_ORDER, AUTO_ACCOUNT_TYPE, AUTO_DETECT_ORDER
+from utils.metrics import REGISTRY, span
+from utils.ratelimit import PRIORITY_NAMES, PriorityTokenBucket, current_priority
+from utils.resilience import CircuitBreaker, LatencyWindow, backoff_delay, hedged
+
+logger = logging.getLogger("clan_bot.hiscores")
+
+# Shared session owned by the bot (see bot.ClanBot.setup_hook / close)
+_session: Optional[aiohttp.ClientSession] = None
+
+def open_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        )
+    return _session
+
+async def close_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+# Raw index_lite bodies keyed by (normalized name, account type); b"" means not found
+_cache = TTLCache(HISCORES_CACHE_SIZE, HISCORES_CACHE_TTL, HISCORES_CACHE_STALE_TTL)
+
+def cache_stats() -> Dict[str, int]:
+    return _cache.stats()
+
+def normalize_player_name(player: str) -> str:
+    # Jagex treats spaces, underscores and hyphens in names as equivalent
+    name = player.strip().lower().replace("_", " ").replace("-", " ")
+    return " ".join(name.split())
 
 def build_base_url(account_type: str) -> str:
     suffix = HISCORE_MODULE.get(account_type)
-    return f"https://secure.runescape.com/m=hiscore_oldschool_{suffix}" if suffix else \
-           "https://secure.runescape.com/m=hiscore_oldschool"
+    return f"{HISCORES_BASE_URL}/m=hiscore_oldschool_{suffix}" if suffix else \
+           f"{HISCORES_BASE_URL}/m=hiscore_oldschool"
 
-async def fetch_csv_rows(player: str, account_type: str) -> List[List[int]]:
+class HiscoresUnavailable(Exception):
+    """Hiscores couldn't be reached (5xx/timeouts after retries, or circuit open) and nothing was cached."""
+
+# Fail fast while Jagex is down; hedge slow requests after the recent p95 latency
+_breaker = CircuitBreaker(HISCORES_BREAKER_FAILURES, HISCORES_BREAKER_RESET)
+_latency = LatencyWindow()
+
+# Every outbound request (retries and hedges included) takes a token; priority comes from utils.ratelimit.priority()
+_limiter = PriorityTokenBucket(HISCORES_RATE, HISCORES_BURST)
+
+def breaker_state() -> str:
+    return _breaker.state
+
+def limiter_stats() -> Dict[str, object]:
+    return _limiter.stats()
+
+async def _acquire_token() -> None:
+    # No explicit level: a coalesced caller raising the shared priority moves this request up the queue
+    waited = await _limiter.acquire()
+    level = current_priority()
+    REGISTRY.observe("clanbot_hiscores_queue_wait_seconds", waited, priority=PRIORITY_NAMES.get(level, level))
+
+def _is_retryable(e: BaseException) -> bool:
+    if isinstance(e, aiohttp.ClientResponseError):
+        return e.status >= 500 or e.status == 429
+    return isinstance(e, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+def _hedge_delay() -> Optional[float]:
+    if not HISCORES_HEDGE:
+        return None
+    q = _latency.quantile(HISCORES_HEDGE_QUANTILE)
+    return max(HISCORES_HEDGE_MIN_DELAY, q if q is not None else HISCORES_HEDGE_DEFAULT_DELAY)
+
+async def _get(session: aiohttp.ClientSession, url: str, timeout: float = HISCORES_ATTEMPT_TIMEOUT) -> bytes:
+    started = time.perf_counter()
+    try:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+            REGISTRY.inc("clanbot_hiscores_requests_total", outcome=str(resp.status))
+            if resp.status == 404:
+                body = b""
+            else:
+                resp.raise_for_status()
+                body = await resp.read()
+    except aiohttp.ClientResponseError:
+        raise
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        REGISTRY.inc("clanbot_hiscores_requests_total", outcome=type(e).__name__)
+        raise
+    _latency.add(time.perf_counter() - started)
+    return body
+
+async def _get_resilient(session: aiohttp.ClientSession, url: str) -> bytes:
+    deadline = time.monotonic() + HISCORES_TOTAL_BUDGET
+    last_error: Optional[BaseException] = None
+    for attempt in range(HISCORES_RETRIES + 1):
+        if not _breaker.allow():
+            REGISTRY.inc("clanbot_hiscores_requests_total", outcome="circuit_open")
+            raise HiscoresUnavailable("Hiscores circuit breaker is open") from last_error
+        try:
+            # The first copy's token is taken up front so queue wait never triggers a hedge
+            await asyncio.wait_for(_acquire_token(), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            _breaker.release_trial()
+            raise HiscoresUnavailable("Hiscores lookup budget spent waiting for the rate limit") from last_error
+        except asyncio.CancelledError:
+            _breaker.release_trial()
+            raise
+        copies = 0
+
+        async def call() -> bytes:
+            nonlocal copies
+            copies += 1
+            if copies > 1:
+                # The hedge waits for its own token, but never past the lookup's budget
+                await asyncio.wait_for(_acquire_token(), max(0.0, deadline - time.monotonic()))
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            return await _get(session, url, min(HISCORES_ATTEMPT_TIMEOUT, remaining))
+
+        try:
+            body = await hedged(
+                call,
+                _hedge_delay(),
+                on_hedge=lambda: REGISTRY.inc("clanbot_hiscores_hedges_total"),
+            )
+        except asyncio.CancelledError:
+            # Caller gave up (alt timeout, cache waiter gone, detection decided): no verdict on the site
+            _breaker.release_trial()
+            raise
+        except Exception as e:
+            if not _is_retryable(e):
+                _breaker.record_success()  # a 4xx means the site is up
+                raise
+            _breaker.record_failure()
+            last_error = e
+            if attempt < HISCORES_RETRIES:
+                delay = backoff_delay(attempt, HISCORES_BACKOFF_BASE, HISCORES_BACKOFF_MAX)
+                if deadline - time.monotonic() <= delay:
+                    break  # no time left for another attempt
+                REGISTRY.inc("clanbot_hiscores_retries_total")
+                await asyncio.sleep(delay)
+            continue
+        _breaker.record_success()
+        return body
+    raise HiscoresUnavailable(
+        f"Hiscores request failed after {attempt + 1} attempt(s) within {HISCORES_TOTAL_BUDGET:g}s: {last_error!r}"
+    ) from last_error
+
+async def _fetch_body(player: str, account_type: str) -> bytes:
     base = build_base_url(account_type)
     url = f"{base}/index_lite.ws?player={player}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, timeout=20) as resp:
-            if resp.status == 404:
-                return []
-            resp.raise_for_status()
-            text = await resp.text()
+    with span("hiscores_fetch"):
+        if _session is not None and not _session.closed:
+            return await _get_resilient(_session, url)
+        # No bot-owned session (scripts, REPL): fall back to a one-off session
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT)) as session:
+            return await _get_resilient(session, url)
+
+async def fetch_index_lite(player: str, account_type: str) -> bytes:
+    # Raw response body, b"" when the player isn't on the selected hiscores
+    key = (normalize_player_name(player), account_type)
+    with span("hiscores_lookup"):
+        try:
+            return await _cache.get_or_fetch(key, lambda: _fetch_body(player, account_type))
+        except HiscoresUnavailable:
+            # Site down: any previously fetched body, however old, beats failing the command
+            cached = _cache.peek(key)
+            if cached is None:
+                raise
+            REGISTRY.inc("clanbot_hiscores_served_stale_total")
+            return cached
 
+async def detect_account_type(player: str) -> Optional[str]:
+    # Fan out to every hiscores table at once; answer as soon as the most specific
+    # table the player is on is known, cancelling lookups that can no longer matter.
+    # A more specific table that failed leaves the answer unknown: guessing a less
+    # specific one would mislabel e.g. a hardcore ironman as a plain ironman.
+    with span("account_type_detect"):
+        tasks = {acct: asyncio.ensure_future(fetch_index_lite(player, acct)) for acct in AUTO_DETECT_ORDER}
+        found: Dict[str, bool] = {}
+        errors: Dict[str, BaseException] = {}
+        try:
+            pending = set(tasks.values())
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for acct, task in tasks.items():
+                    if task in done:
+                        error = task.exception()
+                        if error is not None:
+                            errors[acct] = error
+                        else:
+                            found[acct] = bool(task.result())
+                for acct in AUTO_DETECT_ORDER:
+                    if acct in errors:
+                        raise HiscoresUnavailable(
+                            f"Account type detection failed: the {acct} table is unavailable ({errors[acct]!r})"
+                        ) from errors[acct]
+                    if acct not in found:
+                        break  # a more specific table is still pending
+                    if found[acct]:
+                        return acct
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+        return None
+
+async def resolve_account_type(player: str, account_type: str) -> Optional[str]:
+    # Concrete hiscores table for a (possibly "auto") account type; None if the player wasn't found
+    if account_type != AUTO_ACCOUNT_TYPE:
+        return account_type
+    return await detect_account_type(player)
+
+def parse_csv_rows(body: bytes) -> List[List[int]]:
+    # Full mode: every skill/activity/boss row (used by /kc_debug)
     rows: List[List[int]] = []
-    for row in csv.reader(io.StringIO(text)):
+    for row in csv.reader(io.StringIO(body.decode("utf-8", errors="replace"))):
         try:
             parsed = [int(x) if x != "-1" else -1 for x in row]
         except Exception:
@@ -29,6 +266,35 @@ async def fetch_csv_rows(player: str, account_type: str) -> List[List[int]]:
         rows.append(parsed)
     return rows
 
+def parse_boss_tail(body: bytes) -> array:
+    # Tail-only mode: KC (second column) of the last len(API_BOSS_ORDER) lines,
+    # aligned with API_BOSS_ORDER; unranked/unparseable entries are 0
+    tail_len = len(API_BOSS_ORDER)
+    kcs = array("i", [0]) * tail_len
+    lines = body.rstrip().rsplit(b"\n", tail_len)
+    if len(lines) > tail_len:
+        lines = lines[1:]
+    for i, line in enumerate(lines):
+        parts = line.split(b",", 2)
+        if len(parts) > 1:
+            try:
+                kc = int(parts[1])
+            except ValueError:
+                continue
+            if kc > 0:
+                kcs[i] = kc
+    return kcs
+
+def kc_map_from_tail(kcs: array) -> Dict[str, int]:
+    return dict(zip(API_BOSS_ORDER, kcs))
+
+async def fetch_csv_rows(player: str, account_type: str) -> List[List[int]]:
+    body = await fetch_index_lite(player, account_type)
+    if not body:
+        return []
+    with span("hiscores_parse", mode="full"):
+        return parse_csv_rows(body)
+
 def extract_boss_kc(rows: List[List[int]]) -> Dict[str, int]:
     if not rows:
         return {}
@@ -41,6 +307,35 @@ def extract_boss_kc(rows: List[List[int]]) -> Dict[str, int]:
         kc_map[name] = kc
     return kc_map
 
+# Called with (player, account_type, kc_map) for every successful boss KC lookup
+KcListener = Callable[[str, str, Dict[str, int]], None]
+_kc_listeners: List[KcListener] = []
+
+def add_kc_listener(listener: KcListener) -> None:
+    if listener not in _kc_listeners:
+        _kc_listeners.append(listener)
+
+def remove_kc_listener(listener: KcListener) -> None:
+    if listener in _kc_listeners:
+        _kc_listeners.remove(listener)
+
+def notify_kc_listeners(player: str, account_type: str, kc_map: Dict[str, int]) -> None:
+    for listener in list(_kc_listeners):
+        try:
+            listener(player, account_type, kc_map)
+        except Exception as e:
+            logger.exception(f"KC listener failed: {e}")
+
+async def fetch_boss_kc(player: str, account_type: str) -> Optional[Dict[str, int]]:
+    # None when the player isn't on the selected hiscores
+    body = await fetch_index_lite(player, account_type)
+    if not body:
+        return None
+    with span("hiscores_parse", mode="tail"):
+        kc_map = kc_map_from_tail(parse_boss_tail(body))
+    notify_kc_listeners(player, account_type, kc_map)
+    return kc_map
+
 def compute_points(kc_map: Dict[str, int], boss_points: Dict[str, float]) -> Tuple[float, List[Tuple[str, int, float]]]:
     total = 0.0
     breakdown: List[Tuple[str, int, float]] = []
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utils.constants import API_BOSS_ORDER
+from utils.hiscores import normalize_player_name
+
+logger = logging.getLogger("clan_bot.kc_history")
+
+# Row layout (all little-endian int32): player id, minutes since EPOCH, then one KC column per boss
+PLAYER_COL, TIME_COL, FIRST_BOSS_COL = 0, 1, 2
+EPOCH = 1577836800  # 2020-01-01 UTC; int32 minutes from here last well past 4000 AD
+_DTYPE = np.dtype("<i4")
+
+MemberKey = Tuple[str, str]
+
+
+class Gains(NamedTuple):
+    players: List[MemberKey]
+    names: List[str]
+    gained: np.ndarray  # int64 (players, bosses), aligned with API_BOSS_ORDER
+
+
+class KCHistoryUnavailable(RuntimeError):
+    """The history file could not be opened at startup; queries fail instead of waiting."""
+
+
+def to_minutes(ts: float) -> int:
+    return int((ts - EPOCH) // 60)
+
+
+class KCHistory:
+    """Append-only, memory-mapped KC time series: one int32 column per boss.
+
+    ``<path>`` holds fixed-width rows appended in time order, so a time range is a
+    contiguous slice found by binary search on the time column. ``<path>.idx.json``
+    is the small index: the boss column order and the player id table. Queries
+    work on numpy views of the mapped file rather than per-row Python objects.
+    A row is only appended when a player's KCs changed since their last row.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0, batch_size: int = 500):
+        self.path = path
+        self.index_path = f"{path}.idx.json"
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.bosses = list(API_BOSS_ORDER)
+        self.width = FIRST_BOSS_COL + len(self.bosses)
+        self._players: List[MemberKey] = []
+        self._names: List[str] = []
+        self._ids: Dict[MemberKey, int] = {}
+        self._last: Dict[int, np.ndarray] = {}
+        self._rows = 0
+        self._map: Optional[np.memmap] = None
+        self._pending: List[Tuple[str, str, float, Dict[str, int]]] = []
+        self._wakeup = asyncio.Event()
+        self._opened = asyncio.Event()  # set once start() finishes, mapped or not; queries wait on it
+        self._failed: Optional[BaseException] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kc_history")
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def failed(self) -> bool:
+        return self._failed is not None
+
+    async def start(self) -> None:
+        try:
+            await self._run(self._open)
+        except Exception as e:
+            # Release waiting queries with an error; buffered rows have nowhere to go
+            self._failed = e
+            self._pending.clear()
+            raise
+        finally:
+            self._opened.set()
+        self._task = asyncio.create_task(self._writer())
+
+    async def close(self) -> None:
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+        if self._opened.is_set() and not self.failed:
+            await self.flush()
+        self._executor.shutdown(wait=True)
+
+    def record(self, player: str, account_type: str, kc_map: Dict[str, int]) -> None:
+        # KC listener: buffer only; rows are appended on the history thread
+        if not kc_map or self._closing or self.failed:
+            return
+        self._pending.append((player, account_type, time.time(), kc_map))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        return await self._run(self._append, batch)
+
+    async def gains(self, start: float, end: float) -> Gains:
+        await self._wait_opened()
+        return await self._run(self._gains, start, end)
+
+    async def player_gains(self, player: str, account_type: str, start: float, end: float) -> Optional[Dict[str, int]]:
+        await self._wait_opened()
+        return await self._run(self._player_gains, (normalize_player_name(player), account_type), start, end)
+
+    async def _wait_opened(self) -> None:
+        await self._opened.wait()
+        if self._failed is not None:
+            raise KCHistoryUnavailable(f"KC history failed to open: {self._failed}") from self._failed
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _writer(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"KC history flush failed: {e}")
+
+    # --- history thread only below ---
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        for key, acct, name in index.get("players", []):
+            self._ids[(key, acct)] = len(self._players)
+            self._players.append((key, acct))
+            self._names.append(name)
+        stored_bosses = index.get("bosses", self.bosses)
+        if stored_bosses != self.bosses and os.path.exists(self.path):
+            self._migrate(stored_bosses)
+        if not os.path.exists(self.path):
+            open(self.path, "wb").close()
+
+        row_bytes = self.width * _DTYPE.itemsize
+        size = os.path.getsize(self.path)
+        if size % row_bytes:
+            # A torn final row from a crash mid-append
+            logger.warning(f"Truncating {size % row_bytes} trailing bytes from {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(size - size % row_bytes)
+        self._rows = size // row_bytes
+        self._write_index()
+
+        view = self._view()
+        if view is not None:
+            # Last row per player, to skip appending unchanged KCs
+            players = np.asarray(view[:, PLAYER_COL])
+            _, rev_idx = np.unique(players[::-1], return_index=True)
+            for i in (self._rows - 1 - rev_idx).tolist():
+                self._last[int(view[i, PLAYER_COL])] = np.array(view[i, FIRST_BOSS_COL:])
+        logger.info(f"KC history opened: {self._rows} rows, {len(self._players)} players")
+
+    def _migrate(self, stored_bosses: List[str]) -> None:
+        # Boss list changed (new boss added upstream): rewrite rows with the new column order
+        old_width = FIRST_BOSS_COL + len(stored_bosses)
+        old = np.memmap(self.path, dtype=_DTYPE, mode="r")
+        old = old[: (old.size // old_width) * old_width].reshape(-1, old_width)
+        new = np.zeros((old.shape[0], self.width), dtype=_DTYPE)
+        new[:, :FIRST_BOSS_COL] = old[:, :FIRST_BOSS_COL]
+        position = {b: i for i, b in enumerate(stored_bosses)}
+        for j, boss in enumerate(self.bosses):
+            i = position.get(boss)
+            if i is not None:
+                new[:, FIRST_BOSS_COL + j] = old[:, FIRST_BOSS_COL + i]
+        del old
+        tmp = f"{self.path}.migrate"
+        new.tofile(tmp)
+        os.replace(tmp, self.path)
+        logger.info(f"KC history migrated to {len(self.bosses)} boss columns ({new.shape[0]} rows)")
+
+    def _write_index(self) -> None:
+        tmp = f"{self.index_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "bosses": self.bosses,
+                "players": [[k, a, n] for (k, a), n in zip(self._players, self._names)],
+            }, f)
+        os.replace(tmp, self.index_path)
+
+    def _view(self) -> Optional[np.ndarray]:
+        if self._rows == 0:
+            return None
+        if self._map is None or self._map.shape[0] != self._rows:
+            self._map = np.memmap(self.path, dtype=_DTYPE, mode="r", shape=(self._rows, self.width))
+        return self._map
+
+    def _append(self, batch: List[Tuple[str, str, float, Dict[str, int]]]) -> int:
+        rows: List[np.ndarray] = []
+        new_players = False
+        for player, acct, taken_at, kc_map in batch:
+            key = (normalize_player_name(player), acct)
+            pid = self._ids.get(key)
+            if pid is None:
+                pid = self._ids[key] = len(self._players)
+                self._players.append(key)
+                self._names.append(player.strip() or key[0])
+                new_players = True
+            kcs = np.fromiter((max(kc_map.get(b, 0), 0) for b in self.bosses), dtype=_DTYPE, count=len(self.bosses))
+            last = self._last.get(pid)
+            if last is not None and np.array_equal(last, kcs):
+                continue
+            self._last[pid] = kcs
+            row = np.empty(self.width, dtype=_DTYPE)
+            row[PLAYER_COL] = pid
+            row[TIME_COL] = to_minutes(taken_at)
+            row[FIRST_BOSS_COL:] = kcs
+            rows.append(row)
+        if new_players:
+            self._write_index()
+        if not rows:
+            return 0
+        block = np.vstack(rows)
+        # Keep the time column sorted even if the clock steps backwards
+        if self._rows:
+            floor = int(self._view()[self._rows - 1, TIME_COL])
+            np.maximum(block[:, TIME_COL], floor, out=block[:, TIME_COL])
+        with open(self.path, "ab") as f:
+            block.tofile(f)
+        self._rows += len(rows)
+        return len(rows)
+
+    @staticmethod
+    def _last_per_player(players: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # (player ids, index of each one's last row) within a slice
+        ids, rev_idx = np.unique(players[::-1], return_index=True)
+        return ids, players.shape[0] - 1 - rev_idx
+
+    def _gains(self, start: float, end: float) -> Gains:
+        empty = Gains([], [], np.zeros((0, len(self.bosses)), dtype=np.int64))
+        view = self._view()
+        if view is None:
+            return empty
+        times = view[:, TIME_COL]
+        i_start = int(np.searchsorted(times, to_minutes(start), side="right"))
+        i_end = int(np.searchsorted(times, to_minutes(end), side="right"))
+        if i_end == 0:
+            return empty
+
+        players = np.asarray(view[:i_end, PLAYER_COL])
+        end_ids, end_rows = self._last_per_player(players)
+        # Baseline: last row at or before start, else the player's first row inside the range
+        base_rows = np.full(end_ids.shape[0], -1, dtype=np.int64)
+        if i_start:
+            ids, rows = self._last_per_player(players[:i_start])
+            base_rows[np.searchsorted(end_ids, ids)] = rows
+        missing = base_rows < 0
+        if missing.any():
+            ids, first = np.unique(players[i_start:], return_index=True)
+            pos = np.searchsorted(ids, end_ids[missing])
+            base_rows[missing] = first[pos] + i_start
+
+        gained = view[end_rows, FIRST_BOSS_COL:].astype(np.int64) - view[base_rows, FIRST_BOSS_COL:]
+        np.maximum(gained, 0, out=gained)  # hiscores resets / rollbacks never count as negative gains
+        return Gains(
+            [self._players[i] for i in end_ids.tolist()],
+            [self._names[i] for i in end_ids.tolist()],
+            gained,
+        )
+
+    def _player_gains(self, key: MemberKey, start: float, end: float) -> Optional[Dict[str, int]]:
+        pid = self._ids.get(key)
+        view = self._view()
+        if pid is None or view is None:
+            return None
+        times = view[:, TIME_COL]
+        i_start = int(np.searchsorted(times, to_minutes(start), side="right"))
+        i_end = int(np.searchsorted(times, to_minutes(end), side="right"))
+        mine = np.flatnonzero(view[:i_end, PLAYER_COL] == pid)
+        if mine.size == 0:
+            return None
+        before = mine[mine < i_start]
+        base = before[-1] if before.size else mine[0]
+        gained = np.maximum(view[mine[-1], FIRST_BOSS_COL:].astype(np.int64) - view[base, FIRST_BOSS_COL:], 0)
+        return {boss: int(g) for boss, g in zip(self.bosses, gained.tolist()) if g > 0}
@@ -0,0 +1,273 @@
+import random
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from utils.constants import API_BOSS_ORDER
+from utils.hiscores import normalize_player_name
+from utils.points_table import PointsTable, get_points_table
+from utils.ranks import RANK_THRESHOLDS
+
+# (normalized player, account type)
+MemberKey = Tuple[str, str]
+_KEY_MAX = (chr(0x10FFFF),)
+
+
+class LeaderboardEntry(NamedTuple):
+    key: MemberKey
+    name: str
+    points: float
+
+
+class _Node:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value, levels: int):
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * levels
+        self.width: List[int] = [1] * levels
+
+
+class IndexableSkipList:
+    """Sorted sequence with O(log n) insert, remove, index lookup and rank lookup."""
+
+    MAX_LEVELS = 24
+
+    def __init__(self):
+        self._head = _Node(None, self.MAX_LEVELS)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVELS and random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, value) -> None:
+        chain: List[_Node] = [None] * self.MAX_LEVELS  # type: ignore
+        steps = [0] * self.MAX_LEVELS
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].value < value:
+                steps[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_level()
+        new = _Node(value, levels)
+        steps_at = 0
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps_at
+            prev.width[level] = steps_at + 1
+            steps_at += steps[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, value) -> None:
+        chain: List[_Node] = [None] * self.MAX_LEVELS  # type: ignore
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target is None or target.value != value:
+            raise KeyError(value)
+        for level in range(self.MAX_LEVELS):
+            prev = chain[level]
+            if prev.next[level] is target:
+                prev.width[level] += target.width[level] - 1
+                prev.next[level] = target.next[level]
+            else:
+                prev.width[level] -= 1
+        self._size -= 1
+
+    def index_of(self, value) -> int:
+        # Number of elements strictly less than value (bisect_left)
+        index = 0
+        node = self._head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].value < value:
+                index += node.width[level]
+                node = node.next[level]
+        return index
+
+    def __getitem__(self, i: int):
+        if not 0 <= i < self._size:
+            raise IndexError(i)
+        node = self._head
+        i += 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def slice(self, start: int, stop: int) -> List:
+        start = max(0, start)
+        stop = min(stop, self._size)
+        if start >= stop:
+            return []
+        out = [self[start]]
+        node = self._head
+        i = start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        while len(out) < stop - start:
+            node = node.next[0]
+            out.append(node.value)
+        return out
+
+
+class Leaderboard:
+    """Points-ordered index of tracked players, kept up to date from KC lookups.
+
+    Ordering is by points (descending) then member key, so positions are stable.
+    Per-member KCs are kept so the whole index can be rescored if the points
+    table is reloaded. With ``members`` (normalized RSNs, see
+    SnapshotStore.members) only those players are indexed, so applicants and
+    outsiders looked up by /points don't appear; None indexes everyone.
+    """
+
+    def __init__(self, members: Optional[Iterable[str]] = None):
+        self._members: Optional[Set[str]] = None if members is None else {normalize_player_name(m) for m in members}
+        self._order = IndexableSkipList()
+        self._entries: Dict[MemberKey, LeaderboardEntry] = {}
+        self._kcs: Dict[MemberKey, array] = {}
+        self._by_name: Dict[str, Set[str]] = {}
+        self._table: Optional[PointsTable] = None
+        self.loaded = False  # set once stored snapshots have been loaded (see bot.ClanBot._warm_up)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _sort_key(entry: LeaderboardEntry):
+        return (-entry.points, entry.key)
+
+    def is_member(self, player: str) -> bool:
+        return self._members is None or normalize_player_name(player) in self._members
+
+    def set_members(self, members: Iterable[str]) -> None:
+        self._members = {normalize_player_name(m) for m in members}
+        for key in [k for k in self._entries if k[0] not in self._members]:
+            self._drop(key)
+
+    def add_members(self, members: Iterable[str]) -> None:
+        # Indexed from their next lookup or Leaderboard.load
+        if self._members is not None:
+            self._members.update(normalize_player_name(m) for m in members)
+
+    def remove_members(self, members: Iterable[str]) -> None:
+        names = {normalize_player_name(m) for m in members}
+        if self._members is not None:
+            self._members -= names
+        for key in [k for k in self._entries if k[0] in names]:
+            self._drop(key)
+
+    def update(self, player: str, account_type: str, kc_map: Dict[str, int]) -> None:
+        if not self.is_member(player):
+            return
+        kcs = array("i", (kc_map.get(b, 0) for b in API_BOSS_ORDER))
+        self._set(player, account_type, kcs, self._current_table())
+
+    def load(self, rows: Iterable[Tuple[str, str, Dict[str, int]]], keep_existing: bool = False) -> int:
+        # keep_existing: skip members already indexed, e.g. from live lookups newer than the stored rows
+        table = self._current_table()
+        count = 0
+        for player, acct, kc_map in rows:
+            if not self.is_member(player) or keep_existing and (normalize_player_name(player), acct) in self._entries:
+                continue
+            self._set(player, acct, array("i", (kc_map.get(b, 0) for b in API_BOSS_ORDER)), table)
+            count += 1
+        return count
+
+    def _set(self, player: str, account_type: str, kcs: array, table: PointsTable) -> None:
+        key = (normalize_player_name(player), account_type)
+        points, _ = table.score_tail(kcs)
+        old = self._entries.get(key)
+        name = player.strip() or (old.name if old else key[0])
+        if old is not None:
+            if old.points == points and old.name == name:
+                self._kcs[key] = kcs
+                return
+            self._order.remove(self._sort_key(old))
+        entry = LeaderboardEntry(key, name, points)
+        self._entries[key] = entry
+        self._kcs[key] = kcs
+        self._by_name.setdefault(key[0], set()).add(account_type)
+        self._order.insert(self._sort_key(entry))
+
+    def _drop(self, key: MemberKey) -> None:
+        entry = self._entries.pop(key)
+        self._order.remove(self._sort_key(entry))
+        del self._kcs[key]
+        accts = self._by_name.get(key[0])
+        if accts is not None:
+            accts.discard(key[1])
+            if not accts:
+                del self._by_name[key[0]]
+
+    def _current_table(self) -> PointsTable:
+        table = get_points_table()
+        if self._table is not None and table is not self._table:
+            self._rescore(table)
+        self._table = table
+        return table
+
+    def _rescore(self, table: PointsTable) -> None:
+        self._order = IndexableSkipList()
+        for key, old in list(self._entries.items()):
+            entry = old._replace(points=table.score_tail(self._kcs[key])[0])
+            self._entries[key] = entry
+            self._order.insert(self._sort_key(entry))
+
+    def _entry_at(self, sort_key) -> LeaderboardEntry:
+        return self._entries[sort_key[1]]
+
+    def top(self, n: int, offset: int = 0) -> List[Tuple[int, LeaderboardEntry]]:
+        self._current_table()
+        keys = self._order.slice(offset, offset + n)
+        return [(offset + i + 1, self._entry_at(k)) for i, k in enumerate(keys)]
+
+    def position(self, player: str, account_type: Optional[str] = None) -> Optional[Tuple[int, LeaderboardEntry]]:
+        # 1-based position; without an account type, the player's best-placed entry
+        self._current_table()
+        name = normalize_player_name(player)
+        accts = [account_type] if account_type else self._by_name.get(name, ())
+        candidates = [self._entries[(name, a)] for a in accts if (name, a) in self._entries]
+        if not candidates:
+            return None
+        best = min(candidates, key=self._sort_key)
+        return self._order.index_of(self._sort_key(best)) + 1, best
+
+    def bracket(self, rank_name: str, limit: int = 25) -> Tuple[int, List[Tuple[int, LeaderboardEntry]]]:
+        # Members whose points fall in the RANK_THRESHOLDS band for rank_name: (count, first `limit`)
+        self._current_table()
+        bounds = bracket_bounds(rank_name)
+        if bounds is None:
+            return 0, []
+        low, high = bounds
+        # Sentinel sorts after every real member key with the same points
+        start = 0 if high is None else self._order.index_of((-high, _KEY_MAX))
+        stop = self._order.index_of((-low, _KEY_MAX))
+        keys = self._order.slice(start, min(stop, start + limit))
+        return stop - start, [(start + i + 1, self._entry_at(k)) for i, k in enumerate(keys)]
+
+
+def bracket_bounds(rank_name: str) -> Optional[Tuple[float, Optional[float]]]:
+    # [low, high) points band for a rank; high is None for the top rank
+    higher: Optional[float] = None
+    for threshold, name in RANK_THRESHOLDS:
+        if name.lower() == rank_name.strip().lower():
+            return float(threshold), higher
+        higher = float(threshold)
+    return None
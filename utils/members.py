@@ -0,0 +1,52 @@
+import logging
+from typing import Any, Dict, Optional
+
+import discord
+
+from config import MEMBER_CACHE_SIZE, MEMBER_CACHE_TTL
+from utils.cache import TTLCache
+
+logger = logging.getLogger("clan_bot.members")
+
+# (guild id, user id) -> Member, or None if they aren't in the guild
+_members = TTLCache(MEMBER_CACHE_SIZE, MEMBER_CACHE_TTL)
+
+
+def gateway_options(lean: bool) -> Dict[str, Any]:
+    """Client kwargs for the gateway: everything (legacy) or lean.
+
+    Lean mode drops the presence, member and message-content intents, caches no
+    members from the gateway and skips chunking at startup. Slash commands still
+    carry the invoking member; anyone else is fetched on demand via ``get_or_fetch_member``.
+    """
+    if not lean:
+        intents = discord.Intents.all()
+        intents.message_content = True
+        return {"intents": intents}
+    intents = discord.Intents.default()
+    intents.presences = False
+    intents.members = False
+    intents.message_content = False
+    return {
+        "intents": intents,
+        "member_cache_flags": discord.MemberCacheFlags.none(),
+        "chunk_guilds_at_startup": False,
+    }
+
+
+def member_cache_stats() -> Dict[str, int]:
+    return _members.stats()
+
+
+async def get_or_fetch_member(guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+
+    async def fetch() -> Optional[discord.Member]:
+        try:
+            return await guild.fetch_member(user_id)
+        except discord.NotFound:
+            return None
+
+    return await _members.get_or_fetch((guild.id, user_id), fetch)
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Deque, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+from utils.perf import summarize
+
+logger = logging.getLogger("clan_bot.metrics")
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> LabelSet:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram plus a ring of recent samples for percentiles."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, recent: int = 1024):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent: Deque[float] = deque(maxlen=recent)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def summary(self) -> Dict[str, float]:
+        return summarize(self.recent)
+
+
+class Registry:
+    def __init__(self):
+        self.histograms: Dict[str, Dict[LabelSet, Histogram]] = {}
+        self.counters: Dict[str, Dict[LabelSet, float]] = {}
+        self.help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        series = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = Histogram()
+        hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels) -> None:
+        series = self.counters.setdefault(name, {})
+        key = _labels(labels)
+        series[key] = series.get(key, 0.0) + amount
+
+    def histogram(self, name: str, **labels) -> Optional[Histogram]:
+        return self.histograms.get(name, {}).get(_labels(labels))
+
+    def series(self, name: str) -> Dict[LabelSet, Histogram]:
+        return self.histograms.get(name, {})
+
+    def counter_series(self, name: str) -> Dict[LabelSet, float]:
+        return self.counters.get(name, {})
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        for name, series in sorted(self.counters.items()):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_fmt_labels(labels)} {value:g}")
+        for name, series in sorted(self.histograms.items()):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+                lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', '+Inf'))} {hist.count}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {hist.sum:.6f}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump_lines(self) -> List[str]:
+        # Compact one-line-per-series summary for logs
+        out = []
+        for name, series in sorted(self.histograms.items()):
+            for labels, hist in sorted(series.items()):
+                s = hist.summary()
+                out.append(
+                    f"{name}{_fmt_labels(labels)} n={hist.count} "
+                    f"p50={s['p50']*1e3:.0f}ms p95={s['p95']*1e3:.0f}ms p99={s['p99']*1e3:.0f}ms"
+                )
+        return out
+
+
+REGISTRY = Registry()
+REGISTRY.describe("clanbot_stage_seconds", "Time spent in one stage of a command or application")
+REGISTRY.describe("clanbot_command_seconds", "Slash command latency from dispatch to completion")
+REGISTRY.describe("clanbot_hiscores_requests_total", "Hiscores HTTP requests by outcome")
+REGISTRY.describe("clanbot_hiscores_hedges_total", "Hedged second hiscores requests started")
+REGISTRY.describe("clanbot_hiscores_retries_total", "Hiscores request retries after 5xx/timeouts")
+REGISTRY.describe("clanbot_hiscores_queue_wait_seconds", "Time hiscores requests waited for a rate-limit token, by priority")
+REGISTRY.describe("clanbot_hiscores_served_stale_total", "Lookups answered from cache while hiscores was unavailable")
+
+
+@contextmanager
+def span(stage: str, **labels) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe("clanbot_stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+
+def observe_command(command: str, seconds: float, outcome: str = "ok") -> None:
+    REGISTRY.observe("clanbot_command_seconds", seconds, command=command, outcome=outcome)
+
+
+class MetricsExporter:
+    """Serves /metrics on localhost and/or periodically logs a metrics summary."""
+
+    def __init__(self, host: str, port: int, dump_interval: float):
+        self.host = host
+        self.port = port
+        self.dump_interval = dump_interval
+        self._runner: Optional["web.AppRunner"] = None
+        self._dump_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.port:
+            from aiohttp import web  # only when serving; keeps aiohttp.web off the startup path
+
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, self.host, self.port).start()
+            logger.info(f"Metrics endpoint on http://{self.host}:{self.port}/metrics")
+        if self.dump_interval > 0:
+            self._dump_task = asyncio.create_task(self._dump_loop())
+
+    async def stop(self) -> None:
+        if self._dump_task is not None:
+            self._dump_task.cancel()
+            self._dump_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: "web.Request") -> "web.Response":
+        from aiohttp import web
+
+        return web.Response(
+            text=REGISTRY.render_prometheus(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    async def _dump_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.dump_interval)
+            for line in REGISTRY.dump_lines():
+                logger.info(line)
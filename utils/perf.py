@@ -0,0 +1,180 @@
+import asyncio
+import math
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    # Nearest-rank percentile over an already sorted sequence; 0.0 when empty
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(values: Iterable[float], qs: Sequence[float] = (50, 95, 99)) -> Dict[str, float]:
+    ordered = sorted(values)
+    out = {f"p{q:g}": percentile(ordered, q) for q in qs}
+    out["max"] = ordered[-1] if ordered else 0.0
+    out["count"] = float(len(ordered))
+    return out
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag: how late a periodic sleep wakes up, in seconds."""
+
+    def __init__(self, interval: float = 0.05, history: int = 4096):
+        self.interval = interval
+        self.samples: Deque[float] = deque(maxlen=history)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        self.samples.clear()
+
+    def summary(self) -> Dict[str, float]:
+        return summarize(self.samples)
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+
+def rss_bytes() -> int:
+    # Current resident set size; falls back to the peak where /proc isn't available
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+Stack = Tuple[str, ...]  # outermost frame first
+
+
+class Profile(NamedTuple):
+    seconds: float
+    samples: int
+    idle: int  # samples where the loop was waiting in select()/epoll, i.e. had nothing to run
+    stacks: "Counter[Stack]"  # busy samples only
+
+    def top(self, n: int = 10, inclusive: bool = False) -> List[Tuple[str, int]]:
+        """Functions with the most busy samples, by self time or including callees."""
+        counts: Counter = Counter()
+        for stack, hits in self.stacks.items():
+            if inclusive:
+                for frame in set(stack):
+                    counts[frame] += hits
+            elif stack:
+                counts[stack[-1]] += hits
+        if inclusive:
+            # Frames under every busy sample (asyncio.run, run_forever, ...) say nothing
+            busy = self.samples - self.idle
+            counts = Counter({frame: hits for frame, hits in counts.items() if hits < busy})
+        return counts.most_common(n)
+
+    def collapsed(self) -> str:
+        # One "outer;...;inner count" line per stack: the input format of flamegraph tools
+        return "\n".join(f"{';'.join(stack)} {hits}" for stack, hits in self.stacks.most_common())
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(PROJECT_ROOT):
+        path = os.path.relpath(path, PROJECT_ROOT)
+    else:
+        path = "/".join(path.replace(os.sep, "/").split("/")[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    # The loop thread parked in the selector waiting for I/O or a timer
+    code = frame.f_code
+    return code.co_name in ("select", "poll", "_poll") and code.co_filename.endswith("selectors.py")
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+class StackSampler:
+    """Statistical profiler for the event-loop thread, run on demand.
+
+    A helper thread reads the loop thread's current Python stack every
+    ``interval`` seconds (``sys._current_frames``), so nothing is instrumented
+    and the loop pays only for the GIL hand-offs while a profile is running.
+    The sampler needs the GIL to look, so bursts shorter than the interpreter's
+    switch interval (5 ms) are under-counted; the long blocking stretches that
+    show up as loop lag are not.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    @contextmanager
+    def claim(self) -> Iterator[None]:
+        """Reserve the sampler for one profile; raises ProfilerBusy if another holds it.
+
+        Taken synchronously, so a command can claim it before its first await
+        (e.g. deferring the interaction) and two callers can't both get through.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def sample(self, thread_id: int, seconds: float) -> Profile:
+        stacks: Counter = Counter()
+        samples = idle = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            frame = sys._current_frames().get(thread_id)
+            if frame is not None:
+                samples += 1
+                if _is_idle(frame):
+                    idle += 1
+                else:
+                    stack: List[str] = []
+                    while frame is not None and len(stack) < self.max_depth:
+                        stack.append(_frame_label(frame.f_code))
+                        frame = frame.f_back
+                    stacks[tuple(reversed(stack))] += 1
+                del frame
+            time.sleep(self.interval)
+        return Profile(time.perf_counter() - started, samples, idle, stacks)
+
+    async def profile_loop(self, seconds: float) -> Profile:
+        """Sample the calling event loop's thread for the next ``seconds``."""
+        return await asyncio.to_thread(self.sample, threading.get_ident(), seconds)
@@ -0,0 +1,90 @@
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from utils.constants import API_BOSS_ORDER
+from utils.ranks import RANK_THRESHOLDS
+
+_BOSS_INDEX = {name: i for i, name in enumerate(API_BOSS_ORDER)}
+
+
+class CompiledWeights(NamedTuple):
+    weights: np.ndarray  # float64, aligned with API_BOSS_ORDER
+    in_table: np.ndarray  # bool, boss has an entry in boss_points.json
+
+
+class BatchScores(NamedTuple):
+    kc: np.ndarray  # int64 (players, bosses)
+    contributions: np.ndarray  # float64 (players, bosses)
+    totals: np.ndarray  # float64 (players,)
+    ranks: List[str]
+
+
+def compile_weights(boss_points: Dict[str, float]) -> CompiledWeights:
+    weights = np.zeros(len(API_BOSS_ORDER), dtype=np.float64)
+    in_table = np.zeros(len(API_BOSS_ORDER), dtype=bool)
+    for boss, pts in boss_points.items():
+        i = _BOSS_INDEX.get(boss)
+        if i is not None:
+            weights[i] = float(pts)
+            in_table[i] = True
+    return CompiledWeights(weights, in_table)
+
+
+def compile_table(table) -> CompiledWeights:
+    # utils.points_table.PointsTable already carries API_BOSS_ORDER-aligned weights
+    return CompiledWeights(np.array(table.weights, dtype=np.float64), np.array(table.in_table, dtype=bool))
+
+
+def kc_matrix(kc_maps: Sequence[Dict[str, int]]) -> np.ndarray:
+    matrix = np.zeros((len(kc_maps), len(API_BOSS_ORDER)), dtype=np.int64)
+    for row, kc_map in zip(matrix, kc_maps):
+        for boss, kc in kc_map.items():
+            i = _BOSS_INDEX.get(boss)
+            if i is not None and kc > 0:
+                row[i] = kc
+    return matrix
+
+
+def rank_indices(totals: np.ndarray, thresholds: Sequence[Tuple[float, str]] = RANK_THRESHOLDS) -> np.ndarray:
+    # Index into the highest-first thresholds; below the lowest floor counts as the lowest rank
+    floors = np.array([t for t, _ in reversed(thresholds)], dtype=np.float64)
+    idx = np.searchsorted(floors, totals, side="right") - 1
+    return (len(thresholds) - 1 - np.maximum(idx, 0)).astype(np.int16)
+
+
+def rank_names(totals: np.ndarray, thresholds: Sequence[Tuple[float, str]] = RANK_THRESHOLDS) -> List[str]:
+    return [thresholds[i][1] for i in rank_indices(totals, thresholds).tolist()]
+
+
+def score_totals(matrix: np.ndarray, compiled: CompiledWeights) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # (counted kc, per-boss contributions, totals)
+    kc = np.where((matrix > 0) & compiled.in_table, matrix, 0)
+    contributions = kc.astype(np.float64) * compiled.weights
+    # Accumulate boss by boss (in API_BOSS_ORDER) so totals are bit-identical to compute_points
+    totals = np.zeros(kc.shape[0], dtype=np.float64)
+    for j in range(kc.shape[1]):
+        totals += contributions[:, j]
+    return kc, contributions, totals
+
+
+def score_matrix(
+    matrix: np.ndarray,
+    compiled: CompiledWeights,
+    thresholds: Sequence[Tuple[float, str]] = RANK_THRESHOLDS,
+) -> BatchScores:
+    kc, contributions, totals = score_totals(matrix, compiled)
+    return BatchScores(kc, contributions, totals, rank_names(totals, thresholds))
+
+
+def score_kc_maps(kc_maps: Sequence[Dict[str, int]], boss_points: Dict[str, float]) -> BatchScores:
+    return score_matrix(kc_matrix(kc_maps), compile_weights(boss_points))
+
+
+def breakdown(scores: BatchScores, i: int) -> List[Tuple[str, int, float]]:
+    # Same shape and ordering as compute_points' breakdown for player i
+    row_kc = scores.kc[i]
+    row_pts = scores.contributions[i]
+    items = [(API_BOSS_ORDER[j], int(row_kc[j]), float(row_pts[j])) for j in np.flatnonzero(row_kc)]
+    items.sort(key=lambda x: x[2], reverse=True)
+    return items
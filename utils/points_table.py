@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from config import BOSS_POINTS_PATH, POINTS_RELOAD_INTERVAL
+from utils.constants import API_BOSS_ORDER
+
+logger = logging.getLogger("clan_bot.points_table")
+
+
+class PointsTableError(ValueError):
+    pass
+
+
+class PointsTable:
+    """Immutable, validated boss points table with weights aligned to API_BOSS_ORDER."""
+
+    def __init__(self, points: Dict[str, float], mtime: float = 0.0, warnings: Optional[List[str]] = None):
+        self.points: Mapping[str, float] = MappingProxyType(dict(points))
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        self.warnings = list(warnings or [])
+        self.weights: Tuple[float, ...] = tuple(float(points.get(b, 0.0)) for b in API_BOSS_ORDER)
+        self.in_table: Tuple[bool, ...] = tuple(b in points for b in API_BOSS_ORDER)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def score_tail(self, kcs) -> Tuple[float, List[Tuple[str, int, float]]]:
+        # compute_points over an API_BOSS_ORDER-aligned KC sequence, without string lookups
+        total = 0.0
+        breakdown: List[Tuple[str, int, float]] = []
+        for boss, kc, weight, present in zip(API_BOSS_ORDER, kcs, self.weights, self.in_table):
+            if kc > 0 and present:
+                pts = weight * kc
+                total += pts
+                breakdown.append((boss, kc, pts))
+        breakdown.sort(key=lambda x: x[2], reverse=True)
+        return total, breakdown
+
+
+def validate_points(raw) -> Tuple[Dict[str, float], List[str]]:
+    if not isinstance(raw, dict):
+        raise PointsTableError("boss points file must be a JSON object of boss name → points")
+    known = set(API_BOSS_ORDER)
+    unknown = sorted(k for k in raw if k not in known)
+    if unknown:
+        raise PointsTableError(f"Unknown boss names (not in API_BOSS_ORDER): {', '.join(unknown)}")
+    points: Dict[str, float] = {}
+    for boss, value in raw.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise PointsTableError(f"Invalid points value for {boss}: {value!r}")
+        points[boss] = value
+    warnings = [f"No points entry for {b} (scores 0)" for b in API_BOSS_ORDER if b not in points]
+    return points, warnings
+
+
+def load_points_table(path: str = BOSS_POINTS_PATH) -> PointsTable:
+    mtime = os.stat(path).st_mtime
+    with open(path, "r", encoding="utf-8") as f:
+        try:
+            raw = json.load(f)
+        except json.JSONDecodeError as e:
+            raise PointsTableError(f"Invalid JSON in {os.path.basename(path)}: {e}") from e
+    points, warnings = validate_points(raw)
+    return PointsTable(points, mtime, warnings)
+
+
+class PointsTableWatcher:
+    """Serves the current table and swaps in a recompiled one when the file's mtime changes."""
+
+    def __init__(self, path: str = BOSS_POINTS_PATH, check_interval: float = POINTS_RELOAD_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._table: Optional[PointsTable] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> PointsTable:
+        table = self._table
+        if table is None:
+            return self.reload()
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            try:
+                changed = os.stat(self.path).st_mtime != table.mtime
+            except OSError as e:
+                logger.warning(f"Can't stat {self.path}: {e}")
+                changed = False
+            if changed:
+                try:
+                    table = self.reload()
+                except (OSError, PointsTableError) as e:
+                    # Keep serving the last good table until the file is fixed
+                    logger.error(f"Boss points reload failed, keeping previous table: {e}")
+        return table
+
+    def reload(self) -> PointsTable:
+        with self._lock:
+            table = load_points_table(self.path)
+            self._table = table  # single reference swap; readers see old or new, never partial
+            self._last_check = time.monotonic()
+        logger.info(f"Loaded boss points table ({len(table)} bosses) from {self.path}")
+        for w in table.warnings:
+            logger.warning(w)
+        return table
+
+
+_watcher = PointsTableWatcher()
+
+
+def get_points_table() -> PointsTable:
+    return _watcher.current()
+
+
+def reload_points_table() -> PointsTable:
+    return _watcher.reload()
+
+
+def get_boss_points() -> Mapping[str, float]:
+    return _watcher.current().points
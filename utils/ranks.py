@@ -1,4 +1,4 @@
-from typing import List, Tuple
+from typing import List, Sequence, Tuple
 
 RANK_THRESHOLDS: List[Tuple[int, str]] = [
     (500_000, "Zenyte"),
@@ -13,8 +13,9 @@ RANK_THRESHOLDS: List[Tuple[int, str]] = [
     (0, "Bronze"),
 ]
 
-def get_rank_name(points: float) -> str:
-    for threshold, name in RANK_THRESHOLDS:
+def get_rank_name(points: float, thresholds: Sequence[Tuple[float, str]] = RANK_THRESHOLDS) -> str:
+    # thresholds are highest-first; anything below the lowest gets the lowest rank
+    for threshold, name in thresholds:
         if points >= threshold:
             return name
-    return "Bronze"
+    return thresholds[-1][1]
@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Priority classes, most urgent first
+INTERACTIVE, BACKGROUND, BULK = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background", BULK: "bulk"}
+
+# Inherited by tasks spawned under it (asyncio copies the context), so a bulk scan's
+# gathered lookups all run at bulk priority without threading a parameter through
+_priority: ContextVar[int] = ContextVar("hiscores_priority", default=INTERACTIVE)
+
+
+class SharedPriority:
+    """Priority of one single-flight request, shared with every caller waiting on it.
+
+    The request starts at its initiator's priority; a caller that joins it later
+    (see TTLCache.get_or_fetch) calls ``raise_to`` with its own, so an
+    interactive lookup that coalesces onto a bulk scan's fetch isn't served at
+    bulk priority. Only ever moves towards more urgent. A request already queued
+    in a PriorityTokenBucket moves up immediately.
+    """
+
+    def __init__(self, level: int):
+        self.level = level
+        self._listeners: List[Callable[[int], None]] = []
+
+    def raise_to(self, level: int) -> None:
+        if level < self.level:
+            self.level = level
+            for listener in list(self._listeners):
+                listener(level)
+
+
+_shared: ContextVar[Optional[SharedPriority]] = ContextVar("hiscores_shared_priority", default=None)
+
+
+def current_priority() -> int:
+    shared = _shared.get()
+    level = _priority.get()
+    return min(level, shared.level) if shared is not None else level
+
+
+@contextmanager
+def priority(level: int) -> Iterator[None]:
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def shared_priority() -> Iterator[SharedPriority]:
+    # Tasks created inside inherit the shared priority; later joiners raise it through the yielded object
+    shared = SharedPriority(current_priority())
+    token = _shared.set(shared)
+    try:
+        yield shared
+    finally:
+        _shared.reset(token)
+
+
+class PriorityTokenBucket:
+    """Token bucket (``rate`` tokens/s, up to ``burst`` banked) shared by all callers.
+
+    When tokens run out, waiters are served strictly by priority class, FIFO within
+    a class, so interactive lookups overtake a queued bulk scan. ``rate <= 0``
+    disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+        self.granted: Dict[int, int] = {}
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def waiting(self) -> Dict[str, int]:
+        counts = {name: 0 for name in PRIORITY_NAMES.values()}
+        levels: Dict[int, int] = {}  # a raised waiter has an entry per level it was queued at
+        for level, _, fut in self._waiters:
+            if not fut.done():
+                levels[id(fut)] = min(level, levels.get(id(fut), level))
+        for level in levels.values():
+            counts[PRIORITY_NAMES.get(level, str(level))] += 1
+        return counts
+
+    def stats(self) -> Dict[str, object]:
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "waiting": self.waiting(),
+            "granted": {PRIORITY_NAMES.get(k, str(k)): v for k, v in sorted(self.granted.items())},
+        }
+
+    async def acquire(self, level: Optional[int] = None) -> float:
+        """Wait for a token; returns the seconds spent queued.
+
+        Without ``level`` the caller's context decides, including any raise of a
+        shared priority (see SharedPriority) while queued.
+        """
+        shared = _shared.get() if level is None else None
+        level = current_priority() if level is None else level
+        if self.rate <= 0:
+            self._count(level)
+            return 0.0
+        self._refill()
+        if not self._waiters and self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self._count(level)
+            return 0.0
+
+        started = time.monotonic()
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._seq), fut))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.ensure_future(self._pump())
+
+        def requeue(new_level: int) -> None:
+            # A duplicate heap entry at the new level; whichever pops first wins, the other is skipped as done
+            if not fut.done():
+                heapq.heappush(self._waiters, (new_level, next(self._seq), fut))
+
+        if shared is not None:
+            shared._listeners.append(requeue)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self._tokens += 1.0  # granted just as we were cancelled; give it back
+            raise
+        finally:
+            if shared is not None:
+                shared._listeners.remove(requeue)
+        self._count(min(level, shared.level) if shared is not None else level)
+        return time.monotonic() - started
+
+    def _count(self, level: int) -> None:
+        self.granted[level] = self.granted.get(level, 0) + 1
+
+    async def _pump(self) -> None:
+        # Hands out tokens as they accrue to the most urgent live waiter
+        while self._waiters:
+            self._refill()
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)  # cancelled while queued
+            if not self._waiters:
+                break
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                heapq.heappop(self._waiters)[2].set_result(None)
+                continue
+            await asyncio.sleep((1.0 - self._tokens) / self.rate)
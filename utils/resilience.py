@@ -0,0 +1,109 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+from utils.perf import percentile
+
+T = TypeVar("T")
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and fails fast for
+    ``reset_timeout`` seconds, then lets a single trial call through (half-open)."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_inflight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_inflight = False
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_inflight:
+            self._trial_inflight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._state = self.CLOSED
+        self._trial_inflight = False
+
+    def release_trial(self) -> None:
+        # The half-open trial ended without an answer (cancelled); let the next caller try
+        if self._state == self.HALF_OPEN:
+            self._trial_inflight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_inflight = False
+
+
+class LatencyWindow:
+    """Recent successful request latencies, for picking a hedge delay."""
+
+    def __init__(self, size: int = 256, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=size)
+        self.min_samples = min_samples
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        return percentile(sorted(self.samples), q)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    # "Full jitter" exponential backoff: uniform in [0, min(cap, base * 2^attempt)]
+    return random.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+
+async def hedged(call: Callable[[], Awaitable[T]], delay: Optional[float], on_hedge: Optional[Callable[[], None]] = None) -> T:
+    """Run ``call``; if it hasn't finished after ``delay`` seconds, start a second copy
+    and return whichever succeeds first. The loser is cancelled."""
+    first = asyncio.ensure_future(call())
+    tasks = [first]
+    try:
+        if delay is None:
+            return await first
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done:
+            return first.result()
+        if on_hedge is not None:
+            on_hedge()
+        tasks.append(asyncio.ensure_future(call()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error  # type: ignore[misc]
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # mark retrieved so a losing failure isn't logged as unhandled
@@ -0,0 +1,198 @@
+from typing import Any, List, Optional, Sequence, Tuple
+
+import discord
+
+# Discord message limits
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_TOTAL_LIMIT = 6000  # summed over every embed in one message
+EMBEDS_PER_MESSAGE = 10
+
+# Room for " (part 123/123)" when an output spans several embeds
+_PART_SUFFIX_BUDGET = 16
+_CODE_OPEN, _CODE_CLOSE = "```text\n", "\n```"
+
+# (name, value, inline)
+Field = Tuple[str, str, bool]
+Page = List[discord.Embed]
+
+
+class _Packer:
+    """Greedy line -> embed -> message packing within the per-embed and per-message limits."""
+
+    def __init__(self, overhead: int, first_extra: int, wrap: int, lead_size: int, lead_count: int):
+        self.overhead = overhead
+        self.first_extra = first_extra  # fields, only on the first generated embed
+        self.wrap = wrap
+        self.messages: List[List[List[str]]] = [[]]
+        self.lead_count = lead_count  # lead embeds already in the first message, not in self.messages
+        self.used = lead_size
+        self.count = lead_count
+        self.closed = 0
+        self.current: List[str] = []
+        self.length = 0
+        if lead_count >= EMBEDS_PER_MESSAGE:
+            self._new_message()
+
+    def _embed_overhead(self) -> int:
+        return self.overhead + self.wrap + (self.first_extra if self.closed == 0 else 0)
+
+    def _cap(self) -> int:
+        return min(EMBED_DESCRIPTION_LIMIT - self.wrap, EMBED_TOTAL_LIMIT - self.used - self._embed_overhead())
+
+    def _close_embed(self) -> None:
+        self.used += self._embed_overhead() + self.length
+        self.messages[-1].append(self.current)
+        self.closed += 1
+        self.count += 1
+        self.current, self.length = [], 0
+        if self.count >= EMBEDS_PER_MESSAGE:
+            self._new_message()
+
+    def _new_message(self) -> None:
+        self.messages.append([])
+        self.used, self.count = 0, 0
+
+    def add(self, line: str) -> None:
+        while True:
+            need = len(line) + (1 if self.current else 0)
+            cap = self._cap()
+            if self.length + need <= cap:
+                self.current.append(line)
+                self.length += need
+                return
+            if self.current:
+                self._close_embed()
+            elif self.count:
+                # The message holds embeds (possibly only the lead); its size budget goes with it
+                self._new_message()
+            else:
+                line = line[: max(cap, 0)]  # a single line longer than an empty embed can hold
+
+    def finish(self) -> List[List[List[str]]]:
+        if self.current or self.closed == 0:
+            self._close_embed()
+        # The first message is sent even with no lines in it when it carries the lead
+        return [m for i, m in enumerate(self.messages) if m or (i == 0 and self.lead_count)]
+
+
+def pack_lines(
+    lines: Sequence[str],
+    title: str,
+    color: discord.Color,
+    *,
+    lead: Sequence[discord.Embed] = (),
+    fields: Sequence[Field] = (),
+    footer: Optional[str] = None,
+    code_block: bool = False,
+    reserve: int = 0,
+) -> List[Page]:
+    """Pack ``lines`` into as few messages as Discord's limits allow.
+
+    Lines fill embed descriptions (4096 chars) and embeds fill messages (10 embeds,
+    6000 chars in total). ``fields`` go on the first generated embed and ``footer``
+    on every one; ``lead`` embeds are sent ahead of the lines in the first message,
+    and ``reserve`` keeps that many characters of the first message free for later
+    edits. Returns one list of embeds per message.
+    """
+    title_budget = len(title) + _PART_SUFFIX_BUDGET
+    fields_size = sum(len(name) + len(value) for name, value, _ in fields)
+    packer = _Packer(
+        overhead=title_budget + len(footer or ""),
+        first_extra=fields_size,
+        wrap=len(_CODE_OPEN) + len(_CODE_CLOSE) if code_block else 0,
+        lead_size=sum(len(e) for e in lead) + reserve,
+        lead_count=len(lead),
+    )
+    for line in lines:
+        packer.add(line)
+    grouped = packer.finish()
+
+    total = sum(len(m) for m in grouped)
+    pages: List[Page] = []
+    part = 0
+    for i, message in enumerate(grouped):
+        page: Page = list(lead) if i == 0 else []
+        for chunk in message:
+            part += 1
+            text = "\n".join(chunk)
+            if code_block:
+                text = f"{_CODE_OPEN}{text}{_CODE_CLOSE}"
+            embed = discord.Embed(
+                title=f"{title} (part {part}/{total})" if total > 1 else title,
+                description=text or None,
+                color=color,
+            )
+            if part == 1:
+                for name, value, inline in fields:
+                    embed.add_field(name=name, value=value, inline=inline)
+            if footer:
+                embed.set_footer(text=footer)
+            page.append(embed)
+        pages.append(page)
+    return pages
+
+
+class PageView(discord.ui.View):
+    """One message with Previous/Next buttons instead of a burst of followups."""
+
+    def __init__(self, pages: Sequence[Page], owner_id: int, timeout: float = 600):
+        super().__init__(timeout=timeout)
+        self.pages = list(pages)
+        self.owner_id = owner_id
+        self.index = 0
+        self._refresh()
+
+    def _refresh(self) -> None:
+        self.previous.disabled = self.index == 0
+        self.next.disabled = self.index >= len(self.pages) - 1
+        self.counter.label = f"{self.index + 1}/{len(self.pages)}"
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Only the original requester can use this.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, index: int) -> None:
+        self.index = max(0, min(index, len(self.pages) - 1))
+        self._refresh()
+        await interaction.response.edit_message(embeds=self.pages[self.index], view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.index - 1)
+
+    @discord.ui.button(label="1/1", style=discord.ButtonStyle.secondary, disabled=True)
+    async def counter(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.index + 1)
+
+
+async def _send(interaction: discord.Interaction, **kwargs: Any) -> None:
+    if interaction.response.is_done():
+        await interaction.followup.send(**kwargs)
+    else:
+        await interaction.response.send_message(**kwargs)
+
+
+async def send_pages(
+    interaction: discord.Interaction,
+    pages: Sequence[Page],
+    *,
+    ephemeral: bool = True,
+    paginate: bool = False,
+) -> int:
+    """Send packed pages as one message each, or as a single paginated message.
+
+    Uses the initial response if it hasn't been sent yet, otherwise followups.
+    Returns the number of messages sent.
+    """
+    if paginate and len(pages) > 1:
+        await _send(interaction, embeds=pages[0], view=PageView(pages, interaction.user.id), ephemeral=ephemeral)
+        return 1
+    for page in pages:
+        await _send(interaction, embeds=page, ephemeral=ephemeral)
+    return len(pages)
@@ -0,0 +1,232 @@
+import asyncio
+import csv
+import io
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from config import COMPUTE_BATCH_SIZE
+from utils.compute import score_bodies
+from utils.constants import API_BOSS_ORDER, AUTO_ACCOUNT_TYPE, normalize_account_type
+from utils.hiscores import (
+    HiscoresUnavailable,
+    compute_points,
+    fetch_boss_kc,
+    fetch_index_lite,
+    normalize_player_name,
+    notify_kc_listeners,
+    resolve_account_type,
+)
+from utils.points_table import PointsTable
+from utils.ranks import RANK_THRESHOLDS, get_rank_name
+from utils.ratelimit import BULK, priority
+
+
+class AccountLookup(NamedTuple):
+    name: str
+    account_type: Optional[str]  # resolved table, None if not found
+    kc_map: Optional[Dict[str, int]]
+    error: Optional[str] = None  # for display only; branch on the flags
+    unavailable: bool = False  # hiscores down (not "player not found"): callers should say so, not guess
+
+
+class AccountScore(NamedTuple):
+    name: str
+    account_type: Optional[str]
+    found: bool
+    points: float
+    breakdown: List[Tuple[str, int, float]]
+    error: Optional[str] = None
+
+
+class CombinedScore(NamedTuple):
+    main: AccountScore
+    alts: List[AccountScore]
+    total: float
+    rank: str
+
+
+class RosterResult(NamedTuple):
+    name: str
+    account_type: str
+    found: bool
+    points: float
+    rank: str
+    error: Optional[str] = None
+
+
+def parse_roster_text(raw: str, default_account_type: str = "normal") -> List[Tuple[str, str]]:
+    # Free-form list: one name per comma / newline / | / ; separated entry
+    s = raw or ""
+    for sep in ("|", "\n", ";"):
+        s = s.replace(sep, ",")
+    return _dedupe([(x.strip(), default_account_type) for x in s.split(",") if x.strip()])
+
+
+def parse_roster_csv(text: str, default_account_type: str = "normal") -> List[Tuple[str, str]]:
+    # CSV of name[,account_type]; a leading header row is skipped
+    entries: List[Tuple[str, str]] = []
+    for row in csv.reader(io.StringIO(text)):
+        if not row or not row[0].strip():
+            continue
+        name = row[0].strip()
+        if not entries and name.lower() in ("name", "rsn", "username", "player"):
+            continue
+        acct = normalize_account_type(row[1]) if len(row) > 1 and row[1].strip() else None
+        entries.append((name, acct or default_account_type))
+    return _dedupe(entries)
+
+
+def _dedupe(entries: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    seen = set()
+    unique = []
+    for name, acct in entries:
+        key = (normalize_player_name(name), acct)
+        if key not in seen:
+            seen.add(key)
+            unique.append((name, acct))
+    return unique
+
+
+async def _lookup(name: str, account_type: str) -> Tuple[str, Optional[Dict[str, int]], Optional[str]]:
+    # (resolved account type, kc_map, error); HiscoresUnavailable propagates
+    try:
+        acct = await resolve_account_type(name, account_type)
+        if acct is None:
+            return account_type, None, "not found"
+        kc_map = await fetch_boss_kc(name, acct)
+    except HiscoresUnavailable:
+        raise
+    except Exception as e:
+        return account_type, None, repr(e)
+    return acct, kc_map, None if kc_map is not None else "not found"
+
+
+async def _lookup_body(name: str, account_type: str) -> Tuple[str, Optional[bytes], Optional[str]]:
+    # (resolved account type, raw index_lite body, error); parsing is left to the compute pool
+    try:
+        acct = await resolve_account_type(name, account_type)
+        if acct is None:
+            return account_type, None, "not found"
+        body = await fetch_index_lite(name, acct)
+    except HiscoresUnavailable:
+        return account_type, None, "hiscores unavailable"
+    except Exception as e:
+        return account_type, None, repr(e)
+    return acct, body or None, None if body else "not found"
+
+
+async def _lookup_account(name: str, account_type: str, timeout: Optional[float] = None) -> AccountLookup:
+    try:
+        acct, kc_map, err = await asyncio.wait_for(_lookup(name, account_type), timeout)
+    except asyncio.TimeoutError:
+        return AccountLookup(name, None, None, "timed out")
+    except HiscoresUnavailable:
+        return AccountLookup(name, None, None, "hiscores unavailable", unavailable=True)
+    return AccountLookup(name, acct if kc_map is not None else None, kc_map, err)
+
+
+async def lookup_main_and_alts(
+    main: str,
+    account_type: str,
+    alts: List[str],
+    alt_timeout: float,
+    max_alts: int,
+) -> List[AccountLookup]:
+    """Fetch the main and its alts concurrently through the shared (cached) fetch path.
+
+    Alt account types aren't known, so they are auto-detected. Each alt is
+    time-boxed to ``alt_timeout`` seconds; the main is not. Returns [main, *alts].
+    """
+    main_key = normalize_player_name(main)
+    seen = {main_key}
+    unique_alts = []
+    for alt in alts:
+        key = normalize_player_name(alt)
+        if key and key not in seen:
+            seen.add(key)
+            unique_alts.append(alt)
+    tasks = [_lookup_account(main, account_type)]
+    tasks += [_lookup_account(alt, AUTO_ACCOUNT_TYPE, alt_timeout) for alt in unique_alts[:max_alts]]
+    return list(await asyncio.gather(*tasks))
+
+
+def combine_scores(
+    lookups: List[AccountLookup],
+    boss_points: Dict[str, float],
+    thresholds: Sequence[Tuple[float, str]] = RANK_THRESHOLDS,
+) -> CombinedScore:
+    # Per-account points, summed; the combined rank comes from the summed total
+    scores = []
+    for lk in lookups:
+        points, breakdown = compute_points(lk.kc_map or {}, boss_points)
+        scores.append(AccountScore(lk.name, lk.account_type, lk.kc_map is not None, points, breakdown, lk.error))
+    total = sum(s.points for s in scores)
+    return CombinedScore(scores[0], scores[1:], total, get_rank_name(total, thresholds))
+
+
+def format_account_line(score: AccountScore) -> str:
+    if not score.found:
+        return f"- {score.name}: {score.error or 'not found'}"
+    acct = (score.account_type or "").replace("_", " ")
+    return f"- {score.name} ({acct}): {score.points:.2f} pts"
+
+
+async def score_roster(
+    entries: List[Tuple[str, str]],
+    concurrency: int,
+    table: Optional[PointsTable] = None,
+    thresholds: Sequence[Tuple[float, str]] = RANK_THRESHOLDS,
+) -> List[RosterResult]:
+    """Look up and score a roster; found players are scored in batches on the compute pool.
+
+    Each batch is handed to the pool as soon as it fills, so parsing and scoring
+    overlap the remaining lookups instead of running as one pass at the end.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
+    results = [RosterResult(name, acct, False, 0.0, "—", "not found") for name, acct in entries]
+    pending: List[Tuple[int, str, bytes]] = []
+    scoring: List[asyncio.Task] = []
+
+    async def score(batch: List[Tuple[int, str, bytes]]) -> None:
+        scored = await score_bodies([body for _, _, body in batch], table, thresholds)
+        for row, (i, acct, _) in enumerate(batch):
+            rank = thresholds[int(scored.ranks[row])][1]
+            results[i] = RosterResult(entries[i][0], acct, True, float(scored.totals[row]), rank)
+            # Snapshots, history and the leaderboard still see every lookup (~70 µs each); yield between chunks
+            notify_kc_listeners(entries[i][0], acct, dict(zip(API_BOSS_ORDER, scored.kcs[row].tolist())))
+            if row % 16 == 15:
+                await asyncio.sleep(0)
+
+    def flush() -> None:
+        if pending:
+            scoring.append(asyncio.ensure_future(score(pending[:])))
+            pending.clear()
+
+    async def run(i: int, name: str, acct: str) -> None:
+        async with sem:
+            resolved, body, err = await _lookup_body(name, acct)
+        if body is None:
+            results[i] = RosterResult(name, resolved, False, 0.0, "—", err)
+            return
+        pending.append((i, resolved, body))
+        if len(pending) >= COMPUTE_BATCH_SIZE:
+            flush()
+
+    # Bulk priority: a big scan yields the rate limit to interactive lookups
+    with priority(BULK):
+        try:
+            await asyncio.gather(*(run(i, n, a) for i, (n, a) in enumerate(entries)))
+            flush()
+            await asyncio.gather(*scoring)
+        finally:
+            for task in scoring:
+                task.cancel()
+    return results
+
+
+def results_to_csv(results: List[RosterResult]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["name", "account_type", "found", "points", "rank", "error"])
+    for r in results:
+        writer.writerow([r.name, r.account_type, "yes" if r.found else "no", f"{r.points:.2f}", r.rank, r.error or ""])
+    return buf.getvalue()
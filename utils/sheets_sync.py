@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Protocol, Tuple
+
+from utils.hiscores import normalize_player_name
+from utils.ranks import get_rank_name
+
+logger = logging.getLogger("clan_bot.sheets")
+
+HEADER = ["Name", "Account Type", "Points", "Rank"]
+_A1 = re.compile(r"^([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?$")
+
+
+class RosterRow(NamedTuple):
+    name: str
+    account_type: str
+    points: float
+    rank: str
+
+    def cells(self) -> List[str]:
+        return [self.name, self.account_type, f"{self.points:.2f}", self.rank]
+
+
+def roster_rows(entries: Iterable[Tuple[str, str, float]]) -> List[RosterRow]:
+    # (name, account type, points) -> sheet rows, with the rank bracket for those points
+    return [RosterRow(name, acct, round(points, 2), get_rank_name(points)) for name, acct, points in entries]
+
+
+class SheetsClient(Protocol):
+    def get_values(self) -> List[List[str]]: ...
+
+    def batch_update(self, updates: List[Dict[str, Any]]) -> None: ...
+
+
+def col_letter(index: int) -> str:
+    # 0 -> A, 25 -> Z, 26 -> AA
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def col_index(letters: str) -> int:
+    n = 0
+    for ch in letters:
+        n = n * 26 + (ord(ch) - ord("A") + 1)
+    return n - 1
+
+
+def parse_a1(a1: str) -> Tuple[int, int, int, int]:
+    # "B5:D5" -> zero-based (row0, col0, row1, col1), inclusive
+    m = _A1.match(a1.split("!")[-1])
+    if not m:
+        raise ValueError(f"Unsupported A1 range: {a1}")
+    c0, r0 = col_index(m.group(1)), int(m.group(2)) - 1
+    c1 = col_index(m.group(3)) if m.group(3) else c0
+    r1 = int(m.group(4)) - 1 if m.group(4) else r0
+    return r0, c0, r1, c1
+
+
+def _row_key(cells: List[str]) -> Optional[Tuple[str, str]]:
+    if not cells or not cells[0].strip():
+        return None
+    acct = cells[1].strip().lower() if len(cells) > 1 else ""
+    return normalize_player_name(cells[0]), acct
+
+
+def diff_updates(grid: List[List[str]], rows: List[RosterRow]) -> Tuple[List[Dict[str, Any]], List[List[str]], int]:
+    """Cell updates that bring ``grid`` (columns A-D) in line with ``rows``.
+
+    Existing members keep their sheet row; new members are appended. Only changed
+    cells are sent, with contiguous changes in a row merged into one range.
+    Returns (batch_update payload, the grid after applying it, changed cell count).
+    """
+    width = len(HEADER)
+    new_grid = [list(r) for r in grid]
+    if not new_grid:
+        new_grid.append([])
+    index: Dict[Tuple[str, str], int] = {}
+    for i, cells in enumerate(new_grid[1:], start=1):
+        key = _row_key(cells)
+        if key is not None and key not in index:
+            index[key] = i
+
+    targets: List[Tuple[int, List[str]]] = [(0, HEADER)]
+    for row in rows:
+        key = (normalize_player_name(row.name), row.account_type.lower())
+        i = index.get(key)
+        if i is None:
+            i = len(new_grid)
+            new_grid.append([])
+            index[key] = i
+        targets.append((i, row.cells()))
+
+    updates: List[Dict[str, Any]] = []
+    changed = 0
+    for i, wanted in targets:
+        current = new_grid[i]
+        current.extend([""] * (width - len(current)))
+        run_start: Optional[int] = None
+        for c in range(width + 1):
+            differs = c < width and current[c] != wanted[c]
+            if differs and run_start is None:
+                run_start = c
+            elif not differs and run_start is not None:
+                a1 = f"{col_letter(run_start)}{i + 1}:{col_letter(c - 1)}{i + 1}"
+                updates.append({"range": a1, "values": [wanted[run_start:c]]})
+                changed += c - run_start
+                run_start = None
+        current[:width] = wanted
+    return updates, new_grid, changed
+
+
+class InMemorySheetsClient:
+    """Local stand-in for a worksheet; counts API calls like the real quota would."""
+
+    def __init__(self, grid: Optional[List[List[str]]] = None):
+        self.grid: List[List[str]] = [list(r) for r in (grid or [])]
+        self.reads = 0
+        self.writes = 0
+        self.cells_written = 0
+
+    def get_values(self) -> List[List[str]]:
+        self.reads += 1
+        return [list(r) for r in self.grid]
+
+    def batch_update(self, updates: List[Dict[str, Any]]) -> None:
+        self.writes += 1
+        for update in updates:
+            r0, c0, r1, c1 = parse_a1(update["range"])
+            for dr, values in enumerate(update["values"][: r1 - r0 + 1]):
+                while len(self.grid) <= r0 + dr:
+                    self.grid.append([])
+                row = self.grid[r0 + dr]
+                for dc, value in enumerate(values[: c1 - c0 + 1]):
+                    while len(row) <= c0 + dc:
+                        row.append("")
+                    row[c0 + dc] = value
+                    self.cells_written += 1
+
+
+class GspreadSheetsClient:
+    """gspread-backed worksheet, connected on first use with a service-account JSON."""
+
+    def __init__(self, credentials_path: str, spreadsheet_key: str, worksheet: str):
+        self.credentials_path = credentials_path
+        self.spreadsheet_key = spreadsheet_key
+        self.worksheet_title = worksheet
+        self._worksheet = None
+
+    def _ws(self):
+        if self._worksheet is None:
+            import gspread  # heavy; only needed once Sheets sync actually runs
+
+            gc = gspread.service_account(filename=self.credentials_path)
+            sheet = gc.open_by_key(self.spreadsheet_key)
+            try:
+                self._worksheet = sheet.worksheet(self.worksheet_title)
+            except gspread.WorksheetNotFound:
+                self._worksheet = sheet.add_worksheet(self.worksheet_title, rows=1000, cols=len(HEADER))
+        return self._worksheet
+
+    def get_values(self) -> List[List[str]]:
+        return self._ws().get_all_values()
+
+    def batch_update(self, updates: List[Dict[str, Any]]) -> None:
+        self._ws().batch_update(updates, value_input_option="RAW")
+
+
+def _is_quota_error(e: BaseException) -> bool:
+    # gspread.exceptions.APIError carries the HTTP response; 429 = per-minute quota exhausted
+    response = getattr(e, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+class RosterSheetSync:
+    """Diff-only roster sync: at most one batch_update per sync, run off the event loop.
+
+    The sheet is read once (or on ``full_refresh``) and mirrored locally, so steady-state
+    syncs cost a single write request. Syncs are spaced at least ``min_interval`` apart
+    and quota (429) errors are retried with exponential backoff.
+    """
+
+    def __init__(self, client: SheetsClient, min_interval: float = 10.0, max_retries: int = 4):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self._mirror: Optional[List[List[str]]] = None
+        self._last_call = 0.0
+        self._lock = asyncio.Lock()
+        self.last_changed = 0
+        self.last_synced_at: Optional[float] = None
+
+    async def sync(self, rows: List[RosterRow], full_refresh: bool = False) -> int:
+        async with self._lock:
+            wait = self.min_interval - (time.monotonic() - self._last_call)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                changed = await asyncio.to_thread(self._sync_blocking, rows, full_refresh)
+            finally:
+                self._last_call = time.monotonic()
+            self.last_changed = changed
+            self.last_synced_at = time.time()
+            return changed
+
+    def _sync_blocking(self, rows: List[RosterRow], full_refresh: bool) -> int:
+        if self._mirror is None or full_refresh:
+            self._mirror = self._with_retry(self.client.get_values)
+        updates, new_grid, changed = diff_updates(self._mirror, rows)
+        if updates:
+            try:
+                self._with_retry(self.client.batch_update, updates)
+            except Exception:
+                self._mirror = None  # unknown sheet state; re-read next time
+                raise
+            logger.info(f"Sheets sync wrote {changed} cells in {len(updates)} ranges")
+        self._mirror = new_grid
+        return changed
+
+    def _with_retry(self, fn, *args):
+        delay = 2.0
+        for attempt in range(self.max_retries + 1):
+            try:
+                return fn(*args)
+            except Exception as e:
+                if not _is_quota_error(e) or attempt == self.max_retries:
+                    raise
+                logger.warning(f"Sheets quota hit, retrying in {delay:.0f}s")
+                time.sleep(delay)
+                delay = min(delay * 2, 64.0)
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils.hiscores import normalize_player_name
+
+logger = logging.getLogger("clan_bot.snapshots")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    account_type TEXT NOT NULL,
+    taken_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_player ON snapshots(player, account_type, taken_at);
+CREATE TABLE IF NOT EXISTS snapshot_kc (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id),
+    boss TEXT NOT NULL,
+    kc INTEGER NOT NULL,
+    PRIMARY KEY (snapshot_id, boss)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS latest_kc (
+    player TEXT NOT NULL,
+    account_type TEXT NOT NULL,
+    boss TEXT NOT NULL,
+    kc INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (player, account_type, boss)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS members (
+    player TEXT PRIMARY KEY,
+    guild_id INTEGER,
+    added_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+# (normalized player, account type, taken_at, boss -> kc)
+Snapshot = Tuple[str, str, float, Dict[str, int]]
+
+
+class SnapshotStore:
+    """SQLite store of KC snapshots; only bosses whose KC changed are written.
+
+    ``record`` only buffers; a background task flushes the buffer in one
+    transaction on a dedicated DB thread so the event loop never blocks on disk.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0, batch_size: int = 500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: List[Snapshot] = []
+        self._wakeup = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshots")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def start(self) -> None:
+        await self._run(self._open)
+        self._task = asyncio.create_task(self._writer())
+
+    async def close(self) -> None:
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+        await self.flush()
+        await self._run(self._close_conn)
+        self._executor.shutdown(wait=True)
+
+    def record(self, player: str, account_type: str, kc_map: Dict[str, int]) -> None:
+        if not kc_map or self._closing:
+            return
+        self._pending.append((normalize_player_name(player), account_type, time.time(), dict(kc_map)))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        return await self._run(self._write_batch, batch)
+
+    async def latest(self, player: str, account_type: str) -> Dict[str, int]:
+        return await self._run(self._read_latest, normalize_player_name(player), account_type)
+
+    async def kc_at(self, player: str, account_type: str, ts: float) -> Dict[str, int]:
+        return await self._run(self._read_kc_at, normalize_player_name(player), account_type, ts)
+
+    async def latest_all(self) -> List[Tuple[str, str, Dict[str, int]]]:
+        return await self._run(self._read_all_latest)
+
+    async def players(self) -> List[Tuple[str, str]]:
+        return await self._run(self._read_players)
+
+    async def latest_for(self, players: Iterable[str]) -> List[Tuple[str, str, Dict[str, int]]]:
+        # Latest KCs of the given players on every hiscores table they've been looked up on
+        await self.flush()
+        return await self._run(self._read_latest_for, sorted({normalize_player_name(p) for p in players}))
+
+    # Clan roster: accepted members' RSNs (mains and alts); the leaderboard ranks only these
+
+    async def members(self) -> List[str]:
+        return await self._run(self._read_members)
+
+    async def add_members(self, players: Iterable[str], guild_id: Optional[int] = None) -> List[str]:
+        names = sorted({normalize_player_name(p) for p in players if p.strip()})
+        await self._run(self._write_members, names, guild_id)
+        return names
+
+    async def remove_members(self, players: Iterable[str]) -> List[str]:
+        return await self._run(self._delete_members, sorted({normalize_player_name(p) for p in players}))
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _writer(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"Snapshot flush failed: {e}")
+
+    # --- DB thread only below ---
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def _close_conn(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _write_batch(self, batch: List[Snapshot]) -> int:
+        written = 0
+        with self._conn:
+            for player, acct, taken_at, kc_map in batch:
+                prev = dict(self._conn.execute(
+                    "SELECT boss, kc FROM latest_kc WHERE player = ? AND account_type = ?",
+                    (player, acct),
+                ))
+                changed = [(boss, kc) for boss, kc in kc_map.items() if prev.get(boss) != kc]
+                if not changed:
+                    continue
+                cur = self._conn.execute(
+                    "INSERT INTO snapshots (player, account_type, taken_at) VALUES (?, ?, ?)",
+                    (player, acct, taken_at),
+                )
+                snapshot_id = cur.lastrowid
+                self._conn.executemany(
+                    "INSERT INTO snapshot_kc (snapshot_id, boss, kc) VALUES (?, ?, ?)",
+                    [(snapshot_id, boss, kc) for boss, kc in changed],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO latest_kc (player, account_type, boss, kc, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(player, acct, boss, kc, taken_at) for boss, kc in changed],
+                )
+                written += 1
+        return written
+
+    def _read_latest(self, player: str, acct: str) -> Dict[str, int]:
+        return dict(self._conn.execute(
+            "SELECT boss, kc FROM latest_kc WHERE player = ? AND account_type = ?",
+            (player, acct),
+        ))
+
+    def _read_kc_at(self, player: str, acct: str, ts: float) -> Dict[str, int]:
+        # Most recent stored KC per boss at or before ts
+        rows = self._conn.execute(
+            "SELECT k.boss, k.kc FROM snapshot_kc k JOIN snapshots s ON s.id = k.snapshot_id "
+            "WHERE s.player = ? AND s.account_type = ? AND s.taken_at <= ? "
+            "ORDER BY s.taken_at",
+            (player, acct, ts),
+        )
+        return dict(rows)
+
+    def _read_all_latest(self) -> List[Tuple[str, str, Dict[str, int]]]:
+        out: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for player, acct, boss, kc in self._conn.execute(
+            "SELECT player, account_type, boss, kc FROM latest_kc"
+        ):
+            out.setdefault((player, acct), {})[boss] = kc
+        return [(player, acct, kc_map) for (player, acct), kc_map in out.items()]
+
+    def _read_players(self) -> List[Tuple[str, str]]:
+        return list(self._conn.execute("SELECT DISTINCT player, account_type FROM latest_kc"))
+
+    def _read_latest_for(self, players: List[str]) -> List[Tuple[str, str, Dict[str, int]]]:
+        out: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for player in players:
+            for acct, boss, kc in self._conn.execute(
+                "SELECT account_type, boss, kc FROM latest_kc WHERE player = ?", (player,)
+            ):
+                out.setdefault((player, acct), {})[boss] = kc
+        return [(player, acct, kc_map) for (player, acct), kc_map in out.items()]
+
+    def _read_members(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT player FROM members")]
+
+    def _write_members(self, players: List[str], guild_id: Optional[int]) -> None:
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO members (player, guild_id, added_at) VALUES (?, ?, ?)",
+                [(p, guild_id, time.time()) for p in players],
+            )
+
+    def _delete_members(self, players: List[str]) -> List[str]:
+        with self._conn:
+            return [p for p in players if self._conn.execute("DELETE FROM members WHERE player = ?", (p,)).rowcount]
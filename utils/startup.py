@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger("clan_bot.startup")
+
+
+class Phase(NamedTuple):
+    name: str
+    start: float  # seconds since process start
+    seconds: float
+    background: bool  # overlapped with the gateway handshake instead of delaying it
+
+
+def _process_age() -> float:
+    # Seconds since this process was exec'd (Linux), so interpreter start-up is counted too
+    try:
+        with open("/proc/self/stat", "r") as f:
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class StartupProfile:
+    """Timeline of startup phases (imports, setup, cog loads, gateway) from process start.
+
+    ``phase`` times a block; ``mark`` records the first time a milestone is hit
+    (e.g. ``ready``). The report is logged once the bot is ready and, with
+    ``--profile-startup``, written to a JSON file.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter() - _process_age()
+        self.phases: List[Phase] = []
+        self.marks: Dict[str, float] = {}
+        self.output_path: Optional[str] = None
+
+    def now(self) -> float:
+        return time.perf_counter() - self.t0
+
+    @contextmanager
+    def phase(self, name: str, background: bool = False) -> Iterator[None]:
+        start = self.now()
+        try:
+            yield
+        finally:
+            self.phases.append(Phase(name, start, self.now() - start, background))
+
+    def mark(self, name: str) -> None:
+        self.marks.setdefault(name, self.now())
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "marks": {k: round(v, 4) for k, v in self.marks.items()},
+            "phases": [
+                {"name": p.name, "start": round(p.start, 4), "seconds": round(p.seconds, 4), "background": p.background}
+                for p in sorted(self.phases, key=lambda p: p.start)
+            ],
+        }
+
+    def report_lines(self) -> List[str]:
+        ready = self.marks.get("ready")
+        lines = [f"Startup profile (ready after {ready:.2f}s):" if ready is not None else "Startup profile:"]
+        for p in sorted(self.phases, key=lambda p: p.start):
+            tag = " [background]" if p.background else ""
+            lines.append(f"  {p.start * 1e3:8.0f} ms  {p.seconds * 1e3:8.1f} ms  {p.name}{tag}")
+        for name, at in sorted(self.marks.items(), key=lambda kv: kv[1]):
+            lines.append(f"  {at * 1e3:8.0f} ms  {'':>8}     -> {name}")
+        return lines
+
+    def report(self) -> None:
+        logger.info("\n".join(self.report_lines()))
+        if self.output_path:
+            os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+            with open(self.output_path, "w", encoding="utf-8") as f:
+                json.dump(self.as_dict(), f, indent=2)
+            logger.info(f"Startup profile written to {self.output_path}")
+
+
+PROFILE = StartupProfile()